@@ -0,0 +1,59 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication  # type: ignore
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed  # type: ignore
+from rest_framework_simplejwt.settings import api_settings  # type: ignore
+from apps.user.user_cache import get_cached_user
+from apps.user.session_tracking import SESSION_CLAIM, session_tracker
+from . tokens import claims_are_current, context_from_claims
+from . revocation import token_version_is_current
+
+
+class CasaJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that also authorises from the role/company claims
+    signed into the token (see tokens.py).
+
+    For reads with current claims the request's AccessContext is built from
+    the token, so IsClient / IsStaff / IsCompanyAdmin run without a query.
+    Writes, tokens without claims and stale claims fall back to the database
+    through get_access_context(). Claims are never current when the cache is
+    private to the worker (a role change on another worker would go unseen).
+
+    Tokens issued before the user's last revoke_all_sessions() are rejected.
+
+    request.user comes from the cached user row (apps/user/user_cache.py),
+    so an authenticated request doesn't SELECT custom_user.
+
+    Activity on the token's session is recorded in the cache, at most once
+    a minute per session (apps/user/session_tracking.py).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None:
+            return None
+
+        user, validated_token = result
+        if not token_version_is_current(validated_token, user.pk):
+            raise InvalidToken('Token has been revoked')
+
+        session_tracker.touch(validated_token.get(SESSION_CLAIM), user.pk, request)
+
+        if request.method in SAFE_METHODS and claims_are_current(validated_token, user.pk):
+            http_request = getattr(request, '_request', request)
+            http_request._access_context = context_from_claims(validated_token, user.pk)
+
+        return user, validated_token
@@ -0,0 +1,197 @@
+# ==========================================
+# JWT BLACKLIST FAST PATH
+# ==========================================
+"""
+Answers "is this refresh token blacklisted?" without a join over simplejwt's
+OutstandingToken/BlacklistedToken tables on every refresh.
+
+1. Shared cache, keyed by a hash of the jti. Every blacklist sets the key
+   until the token would have expired anyway.
+2. Per-worker Bloom filter of every blacklisted, unexpired jti. Newer rows
+   are pulled in every SYNC_INTERVAL seconds (id > last seen id), and the
+   filter is rebuilt every REBUILD_INTERVAL to drop expired jtis.
+3. The database, only when the filter says "maybe".
+
+With a cache that is not shared between workers (LocMemCache in dev) a
+miss cannot be trusted, so the database stays the source of truth.
+
+prune_expired_tokens() keeps both tables bounded (see prune_tokens command).
+"""
+
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (  # type: ignore
+    BlacklistedToken, OutstandingToken
+)
+
+from apps.user.caching import cache_is_shared
+from . bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+BLACKLIST_KEY = 'jwt_blacklist:{}'
+PRUNE_LOCK_KEY = 'jwt_blacklist:prune_lock'
+
+
+def _config():
+    return settings.JWT_BLACKLIST
+
+
+def _key(jti):
+    return BLACKLIST_KEY.format(hashlib.sha256(jti.encode()).hexdigest()[:32])
+
+
+class JtiBlacklist:
+    """Per-worker Bloom filter plus the shared-cache lookups"""
+
+    def __init__(self):
+        self._bloom = None
+        self._last_id = 0
+        self._synced_at = 0
+        self._built_at = 0
+        self._lock = threading.Lock()
+
+    def _rebuild(self, now):
+        config = _config()
+        rows = BlacklistedToken.objects.filter(
+            token__expires_at__gt=timezone.now()
+        ).values_list('id', 'token__jti')
+        rows = list(rows)
+        bloom = BloomFilter(
+            max(config['BLOOM_CAPACITY'], len(rows) * 2), config['BLOOM_ERROR_RATE']
+        )
+        bloom.update(jti for _, jti in rows)
+        self._bloom = bloom
+        self._last_id = max((row_id for row_id, _ in rows), default=self._last_id)
+        self._built_at = self._synced_at = now
+
+    def _sync(self):
+        now = time.monotonic()
+        config = _config()
+        if self._bloom is not None and now - self._synced_at < config['SYNC_INTERVAL']:
+            return
+        with self._lock:
+            if self._bloom is None or self._bloom.is_saturated or \
+                    now - self._built_at >= config['REBUILD_INTERVAL']:
+                self._rebuild(now)
+            elif now - self._synced_at >= config['SYNC_INTERVAL']:
+                # Only rows added since the last sync (uses the primary key index)
+                rows = list(BlacklistedToken.objects.filter(
+                    id__gt=self._last_id
+                ).order_by('id').values_list('id', 'token__jti'))
+                self._bloom.update(jti for _, jti in rows)
+                if rows:
+                    self._last_id = rows[-1][0]
+                self._synced_at = now
+
+    def mark(self, jti, expires_at=None):
+        """Record a freshly blacklisted jti in the shared cache and the local filter"""
+        timeout = None
+        if expires_at is not None:
+            timeout = max(1, int((expires_at - timezone.now()).total_seconds()))
+        cache.set(_key(jti), 1, timeout=timeout)
+        if self._bloom is not None:
+            with self._lock:
+                self._bloom.add(jti)
+
+    def contains(self, jti):
+        if cache.get(_key(jti)):
+            return True
+        if not cache_is_shared():
+            return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+        self._sync()
+        if jti not in self._bloom:
+            return False
+        # "maybe" - the database decides, and the answer is cached
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).values_list(
+            'token__expires_at', flat=True
+        ).first()
+        if blacklisted is not None:
+            self.mark(jti, blacklisted)
+            return True
+        return False
+
+
+jti_blacklist = JtiBlacklist()
+
+
+# ==========================================
+# PRUNING
+# ==========================================
+
+def prune_expired_tokens(chunk_size=None, pause=None, now=None, dry_run=False):
+    """
+    Delete expired OutstandingToken rows (their BlacklistedToken rows
+    cascade) in chunks of chunk_size ids, sleeping `pause` seconds between
+    chunks so the tables are never locked for long.
+
+    Returns the number of outstanding tokens deleted (dry_run: that would be).
+    """
+    config = _config()
+    chunk_size = chunk_size or config['PRUNE_CHUNK_SIZE']
+    pause = config['PRUNE_PAUSE'] if pause is None else pause
+    now = now or timezone.now()
+    if dry_run:
+        return OutstandingToken.objects.filter(expires_at__lt=now).count()
+    deleted = 0
+
+    while True:
+        ids = list(OutstandingToken.objects.filter(
+            expires_at__lt=now
+        ).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        # Blacklisted rows first so the cascade finds nothing left to delete
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+        if len(ids) < chunk_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if deleted:
+        logger.info(f"Pruned {deleted} expired outstanding tokens")
+    return deleted
+
+
+_pruner_started = False
+_pruner_lock = threading.Lock()
+
+
+def _prune_loop(interval):
+    while True:
+        time.sleep(interval)
+        # cache.add() is a lock: one worker prunes per interval (when the cache is shared)
+        if cache.add(PRUNE_LOCK_KEY, 1, timeout=interval):
+            try:
+                prune_expired_tokens()
+            except Exception as e:
+                logger.error(f"Token pruning failed: {e}")
+            finally:
+                close_old_connections()
+
+
+def start_background_pruner():
+    """
+    Start the pruning thread of this worker (once). Called lazily when tokens
+    are issued so migrations and management commands don't start it.
+    """
+    global _pruner_started
+    interval = _config()['PRUNE_INTERVAL']
+    if _pruner_started or not interval:
+        return
+    with _pruner_lock:
+        if not _pruner_started:
+            threading.Thread(
+                target=_prune_loop, args=(interval,), name='jwt-token-pruner', daemon=True
+            ).start()
+            _pruner_started = True
@@ -0,0 +1,60 @@
+# ==========================================
+# BLOOM FILTER
+# ==========================================
+"""
+Compact probabilistic set: `item in bloom` is False  -> definitely not added
+                                              True   -> probably added
+With capacity n and false-positive rate p it uses about
+-n*ln(p)/ln(2)^2 bits (~1.2 MB for a million items at 1%).
+
+The k bit positions come from one sha256 digest (double hashing), so a
+lookup costs a single hash whatever k is.
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=0.01, bits=None):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = self.optimal_size(self.capacity, error_rate)
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        # any writable buffer works (bytearray, mmap) - see from_buffer()
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @staticmethod
+    def optimal_size(capacity, error_rate):
+        return max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+
+    @classmethod
+    def from_buffer(cls, buffer, capacity, error_rate=0.01):
+        """Wrap an existing bit buffer built with the same capacity/error_rate"""
+        return cls(capacity, error_rate, bits=buffer)
+
+    def _positions(self, item):
+        digest = hashlib.sha256(str(item).encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    @property
+    def is_saturated(self):
+        """More items than it was sized for - the error rate is no longer honoured"""
+        return self.count > self.capacity
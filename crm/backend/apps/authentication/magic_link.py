@@ -0,0 +1,116 @@
+# ==========================================
+# MAGIC LINK SIGN-IN
+# ==========================================
+"""
+Passwordless sign-in links.
+
+- The raw token only ever exists in the email. The cache stores
+  sha256(token) -> {user_id, email, token_type, audit_id} with the link's
+  TTL, so a link is found without PBKDF2 or a table scan.
+- On a cache miss (a per-worker LocMemCache, an evicted key) the link is
+  looked up by its MagicLinkToken row instead: token_hash is unique.
+- Using a link is one conditional UPDATE of that row (used_at still NULL,
+  not expired), so only one of two concurrent clicks wins, on any worker:
+  every link works once.
+- The email is sent on a background executor after the transaction commits.
+"""
+
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.user.models import User_Model
+from apps.user.user_cache import get_cached_user, invalidate_cached_user
+from . models import MagicLinkToken
+from . utils import send_magic_link_email
+
+MAGIC_LINK_KEY = 'magic_link:{}'
+
+
+def _lifetime(token_type):
+    return settings.MAGIC_LINK['LIFETIME'].get(token_type, settings.MAGIC_LINK['LIFETIME']['login'])
+
+
+def issue_magic_link(user, token_type='login', ip_address='127.0.0.1', user_agent=''):
+    """Create a single-use link for user and email it in the background"""
+    return issue_magic_links([user], token_type, ip_address, user_agent)[0]
+
+
+def issue_magic_links(users, token_type='login', ip_address='127.0.0.1', user_agent=''):
+    """
+    Links for many users at once (e.g. staff invites): one bulk INSERT of
+    audit rows and one cache.set_many()
+    """
+    lifetime = _lifetime(token_type)
+    expires_at = timezone.now() + lifetime
+    tokens = [secrets.token_urlsafe(32) for _ in users]
+
+    audits = MagicLinkToken.objects.bulk_create([
+        MagicLinkToken(
+            user_id=user.pk,
+            email=user.work_email,
+            token_hash=MagicLinkToken.hash_token(token),
+            token_type=token_type,
+            ip_address=ip_address,
+            user_agent=user_agent[:255],
+            expires_at=expires_at,
+        )
+        for user, token in zip(users, tokens)
+    ])
+    cache.set_many({
+        MAGIC_LINK_KEY.format(audit.token_hash): {
+            'user_id': user.pk,
+            'email': user.work_email,
+            'token_type': token_type,
+            'audit_id': audit.id,
+        }
+        for user, audit in zip(users, audits)
+    }, timeout=int(lifetime.total_seconds()))
+
+    emails = [
+        (user.work_email, user.first_name,
+         f"{settings.FRONTEND_URL}/auth/verify?token={token}&action={token_type}")
+        for user, token in zip(users, tokens)
+    ]
+
+    def send_all():
+        for email, first_name, link in emails:
+            send_magic_link_email(email, first_name, link, token_type, expires_at)
+
+    transaction.on_commit(send_all)
+    return audits
+
+
+def consume_magic_link(token):
+    """
+    Verify and use up token. Returns the User_Model it was issued to, or
+    None when it is unknown, expired or already used.
+    """
+    if not token:
+        return None
+    token_hash = MagicLinkToken.hash_token(token)
+    key = MAGIC_LINK_KEY.format(token_hash)
+    data = cache.get(key)
+    now = timezone.now()
+
+    if data is not None:
+        cache.delete(key)
+        unused = MagicLinkToken.objects.filter(id=data['audit_id'])
+        user_id = data['user_id']
+    else:
+        # issued on another worker, or evicted: the audit row is the link
+        unused = MagicLinkToken.objects.filter(token_hash=token_hash)
+        user_id = unused.values_list('user_id', flat=True).first()
+        if user_id is None:
+            return None
+    if not unused.filter(used_at=None, expires_at__gt=now).update(used_at=now):
+        return None
+
+    # Clicking the link proves the user owns the mailbox
+    if User_Model.objects.filter(pk=user_id, email_verified=False).update(email_verified=True):
+        invalidate_cached_user(user_id)
+
+    return get_cached_user(user_id)
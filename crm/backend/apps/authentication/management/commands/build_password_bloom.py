@@ -0,0 +1,65 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.authentication.password_policy import (
+    write_bloom_file, django_common_passwords, BLOOM_HEADER
+)
+
+
+def _read_words(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            # plain lists and "password:count" style dumps
+            word = line.rstrip('\n').split(':', 1)[0].strip()
+            if word:
+                yield word
+
+
+class Command(BaseCommand):
+    """
+    Build the memory-mapped common/breached password filter.
+
+    Usage:
+        python manage.py build_password_bloom rockyou.txt --error-rate 0.001
+        python manage.py build_password_bloom          # Django's 20k common passwords
+    """
+    help = 'Build the breached-password Bloom filter from a plain word list (one password per line)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('wordlist', nargs='?',
+                            help='Word list, plain text or .gz (default: Django common passwords)')
+        parser.add_argument('--output', default=None,
+                            help="Output file (default PASSWORD_POLICY['BLOOM_PATH'])")
+        parser.add_argument('--error-rate', type=float, default=0.001,
+                            help='False positive rate (default 0.001)')
+
+    def handle(self, *args, **options):
+        wordlist = options['wordlist']
+        output = options['output'] or settings.PASSWORD_POLICY['BLOOM_PATH']
+        error_rate = options['error_rate']
+        if not 0 < error_rate < 1:
+            raise CommandError('--error-rate must be between 0 and 1')
+
+        if wordlist:
+            if not os.path.exists(wordlist):
+                raise CommandError(f'{wordlist} does not exist')
+            # first pass counts, so the filter is sized without holding the list in memory
+            capacity = sum(1 for _ in _read_words(wordlist))
+            words = _read_words(wordlist)
+        else:
+            words = list(django_common_passwords())
+            capacity = len(words)
+
+        if not capacity:
+            raise CommandError('The word list is empty')
+
+        count = write_bloom_file(output, words, capacity, error_rate)
+        size = os.path.getsize(output) - BLOOM_HEADER.size
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {output}: {count:,} passwords, {size / 1024:,.0f} KiB, "
+            f"false positive rate {error_rate}"
+        ))
@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.authentication.provisioning import (
+    provision_staff, parse_rows, summarize, ProvisioningError
+)
+
+
+class Command(BaseCommand):
+    """
+    Create staff accounts from a CSV or JSON file.
+
+    CSV header: work_email,first_name,last_name,role,password
+    JSON: a list of objects with the same keys.
+    Rows without a password get an emailed invite link.
+
+    Usage:
+        python manage.py provision_staff intake.csv --dry-run
+        python manage.py provision_staff intake.json --no-invites
+    """
+    help = 'Bulk create staff users and memberships from CSV/JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, create nothing')
+        parser.add_argument('--no-invites', action='store_true',
+                            help="Don't email invite links to rows without a password")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, encoding='utf-8-sig') as f:
+                data = json.load(f) if path.endswith('.json') else f.read()
+            report = provision_staff(
+                parse_rows(data),
+                dry_run=options['dry_run'],
+                send_invites=not options['no_invites'],
+            )
+        except (OSError, ValueError, ProvisioningError) as e:
+            raise CommandError(str(e))
+
+        for entry in report:
+            line = f"row {entry['row']:>4}  {entry['status']:<8} {entry['email']}"
+            if entry['errors']:
+                self.stdout.write(self.style.ERROR(f"{line}  {'; '.join(entry['errors'])}"))
+            else:
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f"Summary: {summarize(report)}"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.authentication.blacklist import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    """
+    Delete expired outstanding/blacklisted JWT refresh tokens in chunks.
+
+    Usage (e.g. from cron):
+        python manage.py prune_tokens --chunk-size 5000 --pause 0.05
+    """
+    help = 'Delete expired OutstandingToken and BlacklistedToken rows in bounded chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help="Rows per DELETE (default JWT_BLACKLIST['PRUNE_CHUNK_SIZE'])")
+        parser.add_argument('--pause', type=float, default=None,
+                            help="Seconds to sleep between chunks (default JWT_BLACKLIST['PRUNE_PAUSE'])")
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_tokens(chunk_size=options['chunk_size'], pause=options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired outstanding tokens"))
@@ -0,0 +1,157 @@
+# ==========================================
+# PASSWORD POLICY
+# ==========================================
+"""
+Password rules for signup (ClientManager.ValidatePassword).
+
+- The regex rules are compiled once at import, not on every signup.
+- Candidates are also screened against a large list of common/breached
+  passwords, held as a Bloom filter in a memory-mapped file (build it with
+  `python manage.py build_password_bloom`). One sha256 per check, whatever
+  the size of the list. The file is shared by every worker through the page
+  cache, so a few MB cover millions of passwords. A false positive only
+  asks the user for another password.
+- Without a built file the filter is built in memory from Django's
+  common-passwords list (20k entries) the first time it is needed.
+"""
+
+import gzip
+import logging
+import mmap
+import re
+import struct
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.password_validation import CommonPasswordValidator
+
+from . bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+# (pattern, must_match, message)
+# must_match=True: the password must contain the pattern, False: must not.
+RULES = [
+    (r'[a-z]', True, 'Password must contain at least one lowercase letter (a-z)'),
+    (r'[A-Z]', True, 'Password must contain at least one uppercase letter (A-Z)'),
+    (r'\d', True, 'Password must contain at least one digit (0-9)'),
+    (r'[!@#$%^&*()_+=\[\]{};:\'",.<>/?\\|-]', True,
+     'Password must contain at least one special character (!@#$%^&*()_+=[]{};:\'",.<>/?\\|-)'),
+    (r'\s', False, 'Password must not contain whitespace.'),
+    (r'012|123|234|345|456|567|678|789|890', False, 'Password must not contain sequential numbers.'),
+    (r'abc|bcd|cde|def|efg|fgh|ghi|hij|ijk|jkl|klm|lmn|mno|nop|opq|pqr|qrs|rst|stu|tuv|uvw|vwx|wxy|xyz',
+     False, 'Password must not contain sequential letters.'),
+    # Common weak patterns
+    (r'password|12345678|qwerty|admin|letmein', False,
+     'Password is too easy. Please make a strong password'),
+]
+
+MIN_LENGTH = 8
+BREACHED_MESSAGE = 'This password is too common or has appeared in a data breach. Please choose another.'
+
+# Bloom file layout: header, then the filter's bit array
+BLOOM_MAGIC = b'CASABLM1'
+BLOOM_HEADER = struct.Struct('<8sQdQ')  # magic, capacity, error_rate, count
+
+
+def normalize(password):
+    return password.strip().lower()
+
+
+# ==========================================
+# BREACHED PASSWORD FILTER
+# ==========================================
+
+def write_bloom_file(path, words, capacity, error_rate=0.001):
+    """Build a Bloom filter file at path from an iterable of passwords"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    size = (BloomFilter.optimal_size(capacity, error_rate) + 7) // 8
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'w+b') as f:
+        f.truncate(BLOOM_HEADER.size + size)
+        with mmap.mmap(f.fileno(), 0) as mm:
+            bloom = BloomFilter.from_buffer(memoryview(mm)[BLOOM_HEADER.size:], capacity, error_rate)
+            for word in words:
+                if word:
+                    bloom.add(normalize(word))
+            BLOOM_HEADER.pack_into(mm, 0, BLOOM_MAGIC, capacity, error_rate, bloom.count)
+            bloom.bits.release()
+            mm.flush()
+    # readers never see a half written file
+    tmp.replace(path)
+    return bloom.count
+
+
+def open_bloom_file(path):
+    """Memory-map a filter written by write_bloom_file (read-only)"""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, capacity, error_rate, count = BLOOM_HEADER.unpack_from(mm, 0)
+    if magic != BLOOM_MAGIC:
+        mm.close()
+        raise ValueError(f'{path} is not a password bloom filter')
+    bloom = BloomFilter.from_buffer(memoryview(mm)[BLOOM_HEADER.size:], capacity, error_rate)
+    bloom.count = count
+    return bloom
+
+
+def django_common_passwords():
+    """Django's bundled list of 20k common passwords"""
+    with gzip.open(CommonPasswordValidator().DEFAULT_PASSWORD_LIST_PATH, 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield line.strip()
+
+
+_blocklist = None
+_blocklist_lock = threading.Lock()
+
+
+def get_breached_filter():
+    global _blocklist
+    if _blocklist is None:
+        with _blocklist_lock:
+            if _blocklist is None:
+                path = settings.PASSWORD_POLICY['BLOOM_PATH']
+                try:
+                    _blocklist = open_bloom_file(path)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Password bloom filter unavailable ({e}); using Django's common passwords")
+                    words = list(django_common_passwords())
+                    bloom = BloomFilter(len(words), 0.001)
+                    bloom.update(normalize(word) for word in words)
+                    _blocklist = bloom
+    return _blocklist
+
+
+# ==========================================
+# POLICY ENGINE
+# ==========================================
+
+class PasswordPolicy:
+
+    def __init__(self, rules, min_length=MIN_LENGTH, check_breached=True):
+        self.min_length = min_length
+        self.check_breached = check_breached
+        self.rules = [
+            (re.compile(pattern, re.IGNORECASE if not must_match else 0), must_match, message)
+            for pattern, must_match, message in rules
+        ]
+
+    def validate(self, password):
+        """List of error messages (empty when the password is acceptable)"""
+        errors = []
+        if len(password) < self.min_length:
+            errors.append(f'Password must be {self.min_length} characters long.')
+
+        for regex, must_match, message in self.rules:
+            if bool(regex.search(password)) != must_match:
+                errors.append(message)
+
+        if self.check_breached and normalize(password) in get_breached_filter():
+            errors.append(BREACHED_MESSAGE)
+        return errors
+
+
+password_policy = PasswordPolicy(RULES)
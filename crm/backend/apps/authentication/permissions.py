@@ -0,0 +1,39 @@
+from rest_framework.permissions import BasePermission
+from apps.membership.context import get_access_context
+from apps.membership.constant import CLIENT_ROLE, ADMIN_ROLE, STAFF_ROLES
+
+# These permissions read the request's AccessContext, so the membership and
+# profile are loaded once and the view reuses them via get_access_context().
+# Use them together with IsAuthenticated so anonymous callers still get 401:
+#
+#   @permission_classes([IsAuthenticated, IsClient])
+
+
+class HasCompanyRole(BasePermission):
+    """Base class - allow callers whose Casa Community role is in allowed_roles"""
+    allowed_roles = ()
+    # A dict message keeps the {'error': ...} body the frontend already reads
+    message = {'error': 'Access denied.'}
+
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        return get_access_context(request).role in self.allowed_roles
+
+
+class IsClient(HasCompanyRole):
+    allowed_roles = (CLIENT_ROLE,)
+    message = {'error': 'Access denied. Client account required.'}
+
+
+class IsCompanyAdmin(HasCompanyRole):
+    allowed_roles = (ADMIN_ROLE,)
+    message = {
+        'error': 'Access denied. Admin privileges required.',
+        'required_role': ADMIN_ROLE,
+    }
+
+
+class IsStaff(HasCompanyRole):
+    allowed_roles = tuple(STAFF_ROLES)
+    message = {'error': 'Access denied. Employee account required.'}
@@ -0,0 +1,175 @@
+# ==========================================
+# BULK STAFF PROVISIONING
+# ==========================================
+"""
+Creates many staff accounts in one go (API: admin_bulk_add_employees,
+CLI: manage.py provision_staff).
+
+1. Every row is validated up front (fields, email, role, password policy,
+   duplicates in the file and in the database - one query for all emails).
+2. Passwords are hashed across a process pool. Rows without a password get
+   an unusable password and an emailed invite link instead (magic_link.py).
+3. Users and memberships are inserted with bulk_create in one transaction.
+
+Returns a per-row report: {'row', 'email', 'status', 'errors', 'user_id'}
+with status 'created', 'invalid' or (dry run) 'valid'.
+"""
+
+import csv
+import io
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from apps.user.models import User_Model
+from apps.user.hashing import password_hashing
+from apps.membership.models import CompanyMembership
+from apps.membership.context import get_default_company_id
+from apps.membership.constant import EMPLOYEE_ROLES, normalize_role
+from . password_policy import password_policy
+from . magic_link import issue_magic_links
+
+FIELDS = ['work_email', 'first_name', 'last_name', 'role', 'password']
+
+
+class ProvisioningError(Exception):
+    """The input as a whole can't be processed (bad format, too many rows)"""
+
+
+def parse_rows(data):
+    """
+    Rows from a list of dicts (JSON) or CSV text with a header line
+    (work_email,first_name,last_name,role,password).
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if isinstance(data, str):
+        rows = list(csv.DictReader(io.StringIO(data)))
+    elif isinstance(data, list):
+        rows = data
+    else:
+        raise ProvisioningError('Expected a list of employees or CSV text')
+
+    max_rows = settings.STAFF_PROVISIONING_MAX_ROWS
+    if not rows:
+        raise ProvisioningError('No employees supplied')
+    if len(rows) > max_rows:
+        raise ProvisioningError(f'At most {max_rows} employees per request')
+    if not all(isinstance(row, dict) for row in rows):
+        raise ProvisioningError('Every employee must be an object')
+    return rows
+
+
+def _clean(row):
+    return {field: str(row.get(field) or '').strip() for field in FIELDS}
+
+
+def validate_rows(rows):
+    """Cleaned rows plus the report entry of each (errors filled in)"""
+    cleaned, report = [], []
+    seen = set()
+
+    for index, raw in enumerate(rows, start=1):
+        row = _clean(raw)
+        row['work_email'] = row['work_email'].lower()
+        row['role'] = normalize_role(row['role'] or 'EMPLOYEE')
+        errors = []
+
+        missing = [field for field in ('work_email', 'first_name', 'last_name') if not row[field]]
+        if missing:
+            errors.append(f'Missing: {", ".join(missing)}')
+        if row['work_email']:
+            try:
+                validate_email(row['work_email'])
+            except ValidationError:
+                errors.append('Invalid email format')
+            if row['work_email'] in seen:
+                errors.append('Duplicate email in this upload')
+            seen.add(row['work_email'])
+        if row['role'] not in EMPLOYEE_ROLES:
+            errors.append(f'Invalid role. Must be one of: {", ".join(EMPLOYEE_ROLES)}')
+        if len(row['first_name']) > 30 or len(row['last_name']) > 30:
+            errors.append('Names must be at most 30 characters')
+        if row['password']:
+            errors += password_policy.validate(row['password'])
+
+        cleaned.append(row)
+        report.append({
+            'row': index, 'email': row['work_email'], 'status': 'valid',
+            'errors': errors, 'user_id': None,
+        })
+
+    # one query for every email in the upload
+    existing = set(User_Model.objects.filter(
+        work_email__lower__in=[row['work_email'] for row in cleaned if row['work_email']]
+    ).values_list('work_email', flat=True))
+    existing = {email.lower() for email in existing}
+    for row, entry in zip(cleaned, report):
+        if row['work_email'] in existing:
+            entry['errors'].append('An account with this email already exists')
+        if entry['errors']:
+            entry['status'] = 'invalid'
+
+    return cleaned, report
+
+
+def provision_staff(rows, dry_run=False, send_invites=True):
+    """
+    Validate rows and create every valid one. Invalid rows are reported and
+    skipped; valid rows are all created or (on a database error) none are.
+    """
+    company_id = get_default_company_id()
+    if company_id is None:
+        raise ProvisioningError('Company configuration error. Please contact support.')
+
+    cleaned, report = validate_rows(rows)
+    valid = [(row, entry) for row, entry in zip(cleaned, report) if entry['status'] == 'valid']
+    if dry_run or not valid:
+        return report
+
+    # hashed on the bulk process pool; rows without a password get an unusable one
+    hashes = password_hashing.make_passwords([row['password'] or None for row, _ in valid])
+
+    with transaction.atomic():
+        users = User_Model.objects.bulk_create([
+            User_Model(
+                work_email=row['work_email'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                password=encoded,
+                is_active=True,
+            )
+            for (row, _), encoded in zip(valid, hashes)
+        ])
+        # bulk_create only sets primary keys on backends that return them
+        if any(user.pk is None for user in users):
+            by_email = dict(User_Model.objects.filter(
+                work_email__in=[user.work_email for user in users]
+            ).values_list('work_email', 'id'))
+            for user in users:
+                user.pk = user.id = by_email[user.work_email]
+
+        CompanyMembership.objects.bulk_create([
+            CompanyMembership(user_id=user.pk, company_id=company_id, role=row['role'], is_active=True)
+            for user, (row, _) in zip(users, valid)
+        ])
+
+        invited = [user for user, (row, _) in zip(users, valid) if not row['password']]
+        if invited and send_invites:
+            issue_magic_links(invited, token_type='invite')
+
+    for user, (row, entry) in zip(users, valid):
+        entry['status'] = 'created'
+        entry['user_id'] = user.pk
+        entry['invited'] = not row['password']
+
+    return report
+
+
+def summarize(report):
+    counts = {}
+    for entry in report:
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    return counts
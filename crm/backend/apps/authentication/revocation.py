@@ -0,0 +1,75 @@
+# ==========================================
+# SIGN OUT EVERYWHERE
+# ==========================================
+"""
+Every token carries the user's token_version as the 'tv' claim.
+CasaJWTAuthentication and CasaRefreshToken.verify reject tokens whose 'tv'
+differs from the current version, so revoking every session of a user is one
+UPDATE plus one cache write - no walk over the outstanding-token table.
+
+The version is mirrored in the shared cache for TOKEN_VERSION_CACHE_TTL
+seconds, so authentication reads it from the database at most that often
+per user. A revoke writes the new version to the cache, which every worker
+sees at once. A process-local cache (LocMemCache) would only tell the worker
+that revoked, so then the version is read from the database every time.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from apps.user.caching import cache_is_shared
+from apps.user.models import User_Model
+from apps.user.session_tracking import session_tracker
+
+TOKEN_VERSION_KEY = 'token_version:{}'
+TOKEN_VERSION_CLAIM = 'tv'
+
+
+def _ttl():
+    return getattr(settings, 'TOKEN_VERSION_CACHE_TTL', 300)
+
+
+def _stored_version(user_id):
+    return User_Model.objects.filter(pk=user_id).values_list(
+        'token_version', flat=True
+    ).first() or 0
+
+
+def get_token_version(user_id):
+    if not cache_is_shared():
+        return _stored_version(user_id)
+    key = TOKEN_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _stored_version(user_id)
+        # add() never overwrites a value a concurrent revoke just wrote
+        cache.add(key, version, timeout=_ttl())
+    return version
+
+
+def token_version_is_current(token, user_id):
+    # tokens issued before the claim existed count as version 0
+    return token.get(TOKEN_VERSION_CLAIM, 0) == get_token_version(user_id)
+
+
+def revoke_all_sessions(user_id):
+    """Invalidate every access and refresh token of user_id; returns the new version"""
+    User_Model.objects.filter(pk=user_id).update(token_version=F('token_version') + 1)
+    version = _stored_version(user_id)
+    cache.set(TOKEN_VERSION_KEY.format(user_id), version, timeout=_ttl())
+    session_tracker.end_all([user_id])
+    return version
+
+
+def revoke_sessions_for(user_ids):
+    """revoke_all_sessions() for many users: one UPDATE, one SELECT, one cache write"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    User_Model.objects.filter(pk__in=user_ids).update(token_version=F('token_version') + 1)
+    versions = User_Model.objects.filter(pk__in=user_ids).values_list('id', 'token_version')
+    cache.set_many(
+        {TOKEN_VERSION_KEY.format(user_id): version for user_id, version in versions}, timeout=_ttl()
+    )
+    session_tracker.end_all(user_ids)
@@ -1,3 +1,390 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.company.models import Company
+from apps.membership import context as access_context
+from apps.membership.models import CompanyMembership
+from apps.membership.tests import LOCAL_CACHE, SHARED_CACHE, clear_test_caches
+from apps.participant.tests import make_admin
+from apps.user.models import User_Model
+from apps.user.session_tracking import SESSION_CLAIM, session_tracker
+from . magic_link import consume_magic_link, issue_magic_link
+from . models import MagicLinkToken
+from . import password_policy as policy_module
+from . password_policy import BREACHED_MESSAGE, RULES, PasswordPolicy, write_bloom_file
+from . revocation import TOKEN_VERSION_KEY, get_token_version, revoke_all_sessions, revoke_sessions_for
+from . tokens import CasaRefreshToken, claims_are_current
+
+PASSWORD = 'Zq8!mWp2#Rk7'
+
+
+class SigninTestCase(TestCase):
+    """Signs clients up and in through the API"""
+
+    def setUp(self):
+        access_context._default_company_id = None
+        clear_test_caches()
+        Company.objects.create(title='Casa Community Pty Ltd', category='HEALTHCARE',
+                               no_of_employees='1-10', country='AU', address='x', is_active=True)
+
+    def _signin(self, email='client@example.com'):
+        client = APIClient()
+        client.post('/api/auth/client/signup/', {
+            'work_email': email, 'password': PASSWORD, 'first_name': 'Jo', 'last_name': 'Citizen',
+        }, format='json')
+        response = client.post('/api/auth/client/signin/', {'work_email': email, 'password': PASSWORD}, format='json')
+        self.assertEqual(response.status_code, 200)
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + response.data['tokens']['access'])
+        client.refresh_token = response.data['tokens']['refresh']
+        return client, User_Model.objects.get(work_email=email)
+
+    def _status(self, client):
+        return client.get('/api/client/profile/status').status_code
+
+
+class RevocationTests(SigninTestCase):
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_revoke_rejects_existing_tokens(self):
+        client, user = self._signin()
+        self.assertEqual(self._status(client), 200)
+        revoke_all_sessions(user.pk)
+        self.assertEqual(self._status(client), 401)
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_revoke_many(self):
+        first, first_user = self._signin('one@example.com')
+        second, second_user = self._signin('two@example.com')
+        revoke_sessions_for([first_user.pk, second_user.pk])
+        self.assertEqual(self._status(first), 401)
+        self.assertEqual(self._status(second), 401)
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_local_cache_reads_database(self):
+        client, user = self._signin()
+        self.assertEqual(self._status(client), 200)
+        # a revoke handled by another worker: only the database changed
+        User_Model.objects.filter(pk=user.pk).update(token_version=1)
+        self.assertEqual(get_token_version(user.pk), 1)
+        self.assertIsNone(cache.get(TOKEN_VERSION_KEY.format(user.pk)))
+        self.assertEqual(self._status(client), 401)
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class SessionTests(SigninTestCase):
+
+    def _sessions(self, user):
+        return [session['sid'] for session in session_tracker.list(user.pk)]
+
+    def test_refresh_keeps_the_session(self):
+        client, user = self._signin()
+        sid = CasaRefreshToken(client.refresh_token)[SESSION_CLAIM]
+        self.assertIn(sid, self._sessions(user))
+
+        response = client.post('/api/auth/token/refresh/', {'refresh': client.refresh_token}, format='json')
+        self.assertEqual(response.status_code, 200)
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + response.data['access'])
+        self.assertEqual(self._status(client), 200)
+        self.assertIn(sid, self._sessions(user))
+
+        # signout ends it
+        response = client.post('/api/auth/signout/', {'refresh': response.data['refresh']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(sid, self._sessions(user))
+
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class BulkUpdateTests(SigninTestCase):
+    """admin_bulk_update_employees"""
+
+    def _staff(self, email, role='SUPPORT WORKER'):
+        user = User_Model.objects.create(work_email=email, first_name='Sam', last_name='Staff', is_active=True)
+        CompanyMembership.objects.create(user=user, company=Company.objects.get(), role=role, is_active=True)
+        refresh = CasaRefreshToken.for_user(user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        client.refresh_token, client.access_token = str(refresh), refresh.access_token
+        return client, user
+
+    def test_roles_and_deactivation(self):
+        admin = make_admin()
+        promoted_client, promoted = self._staff('promoted@example.com')
+        leaver_client, leaver = self._staff('leaver@example.com')
+        self.assertEqual(promoted_client.get('/api/admin/employees/').status_code, 403)
+        self.assertEqual(leaver_client.get('/api/admin/employees/').status_code, 403)
+        self.assertTrue(claims_are_current(promoted_client.access_token, promoted.pk))
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.patch('/api/admin/employees/bulk-update/', {'changes': [
+            {'user_id': promoted.pk, 'role': 'admin'},
+            {'user_id': leaver.pk, 'is_active': False},
+            {'user_id': admin.pk, 'role': 'EMPLOYEE'},
+            {'user_id': 999999, 'role': 'MANAGER'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary'], {'updated': 2, 'invalid': 1, 'not_found': 1})
+
+        memberships = {m.user_id: m for m in CompanyMembership.objects.all()}
+        self.assertEqual(memberships[promoted.pk].role, 'ADMIN')
+        self.assertTrue(memberships[promoted.pk].is_active)
+        self.assertFalse(memberships[leaver.pk].is_active)
+        self.assertEqual(memberships[admin.pk].role, 'ADMIN')
+
+        # claims signed before the change are stale: the new role comes from the database
+        self.assertFalse(claims_are_current(promoted_client.access_token, promoted.pk))
+        self.assertFalse(claims_are_current(leaver_client.access_token, leaver.pk))
+        self.assertEqual(promoted_client.get('/api/admin/employees/').status_code, 200)
+
+        # the deactivated employee's old tokens are rejected
+        self.assertEqual(leaver_client.get('/api/admin/employees/').status_code, 401)
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': leaver_client.refresh_token}, format='json')
+        self.assertEqual(response.status_code, 401)
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': promoted_client.refresh_token}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+class MagicLinkTests(TestCase):
+
+    def setUp(self):
+        clear_test_caches()
+        self.user = User_Model.objects.create(work_email='jo@example.com', first_name='Jo', last_name='Citizen')
+
+    def _issue(self, token='the-token'):
+        with mock.patch('apps.authentication.magic_link.secrets.token_urlsafe', return_value=token):
+            issue_magic_link(self.user)
+        return token
+
+    def test_link_works_once(self):
+        token = self._issue()
+        self.assertEqual(consume_magic_link(token).pk, self.user.pk)
+        self.assertIsNone(consume_magic_link(token))
+        self.assertIsNotNone(MagicLinkToken.objects.get().used_at)
+
+    def test_issued_on_another_worker(self):
+        token = self._issue()
+        # this worker's cache never saw the link
+        clear_test_caches()
+        self.assertEqual(consume_magic_link(token).pk, self.user.pk)
+        self.assertIsNone(consume_magic_link(token))
+
+    def test_expired_or_unknown(self):
+        token = self._issue()
+        clear_test_caches()
+        MagicLinkToken.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertIsNone(consume_magic_link(token))
+        self.assertIsNone(consume_magic_link('unknown'))
+
+
+@mock.patch('apps.authentication.magic_link.send_magic_link_email')
+class ProvisioningTests(SigninTestCase):
+    """admin_bulk_add_employees / provision_staff"""
+
+    def setUp(self):
+        super().setUp()
+        User_Model.objects.create(work_email='taken@example.com', first_name='Al', last_name='Ready')
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+
+    def _row(self, email, password=PASSWORD, role='EMPLOYEE'):
+        return {'work_email': email, 'first_name': 'Sam', 'last_name': 'Staff', 'role': role, 'password': password}
+
+    def _errors(self, response):
+        return {entry['email']: entry['errors'] for entry in response.data['results']}
+
+    def test_mixed_upload(self, send_email):
+        employees = [
+            self._row('Jane@Example.com'),
+            self._row('invite@example.com', password='', role='support_worker'),
+            self._row('not-an-email'),
+            self._row('weak@example.com', password='password'),
+            self._row('jane@example.com'),
+            self._row('TAKEN@example.com'),
+            self._row('boss@example.com', role='OWNER'),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/employees/bulk/', {'employees': employees}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.data['success'])
+        self.assertEqual(response.data['summary'], {'created': 2, 'invalid': 5})
+        errors = self._errors(response)
+        self.assertEqual(errors['jane@example.com'], ['Duplicate email in this upload'])
+        self.assertEqual(errors['not-an-email'], ['Invalid email format'])
+        self.assertTrue(errors['weak@example.com'])
+        self.assertEqual(errors['taken@example.com'], ['An account with this email already exists'])
+        self.assertIn('Invalid role', errors['boss@example.com'][0])
+
+        # the first jane row was created, its duplicate was not
+        jane = User_Model.objects.get(work_email='jane@example.com')
+        self.assertTrue(jane.is_active and jane.has_usable_password())
+        self.assertEqual(response.data['results'][0]['user_id'], jane.pk)
+        roles = dict(CompanyMembership.objects.filter(
+            user__work_email__in=['jane@example.com', 'invite@example.com']
+        ).values_list('user__work_email', 'role'))
+        self.assertEqual(roles, {'jane@example.com': 'EMPLOYEE', 'invite@example.com': 'SUPPORT WORKER'})
+        self.assertFalse(User_Model.objects.filter(work_email__in=['weak@example.com', 'boss@example.com']).exists())
+
+        # invite-only row: no password, an invite link is emailed instead
+        invited = User_Model.objects.get(work_email='invite@example.com')
+        self.assertFalse(invited.has_usable_password())
+        self.assertTrue(response.data['results'][1]['invited'])
+        self.assertFalse(response.data['results'][0]['invited'])
+        self.assertEqual(MagicLinkToken.objects.get().user_id, invited.pk)
+        self.assertEqual(MagicLinkToken.objects.get().token_type, 'invite')
+        self.assertEqual([c.args[0] for c in send_email.call_args_list], ['invite@example.com'])
+
+    def test_csv_upload(self, send_email):
+        upload = SimpleUploadedFile('staff.csv', (
+            '\ufeffwork_email,first_name,last_name,role,password\n'
+            'csv@example.com,Cee,Ess,MANAGER,\n'
+            'taken@example.com,Al,Ready,EMPLOYEE,\n'
+        ).encode('utf-8'), content_type='text/csv')
+        response = self.client.post('/api/auth/employees/bulk/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['summary'], {'created': 1, 'invalid': 1})
+        membership = CompanyMembership.objects.get(user__work_email='csv@example.com')
+        self.assertEqual(membership.role, 'MANAGER')
+
+    def test_dry_run(self, send_email):
+        employees = [self._row('one@example.com'), self._row('two@example.com', password=''), self._row('taken@example.com')]
+        users = User_Model.objects.count()
+        response = self.client.post('/api/auth/employees/bulk/', {'employees': employees, 'dry_run': True}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['dry_run'])
+        self.assertEqual([entry['status'] for entry in response.data['results']], ['valid', 'valid', 'invalid'])
+        self.assertEqual(User_Model.objects.count(), users)
+        self.assertFalse(MagicLinkToken.objects.exists())
+        send_email.assert_not_called()
+
+    def test_bad_input(self, send_email):
+        response = self.client.post('/api/auth/employees/bulk/', {'employees': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+        with override_settings(STAFF_PROVISIONING_MAX_ROWS=1):
+            response = self.client.post('/api/auth/employees/bulk/', {
+                'employees': [self._row('one@example.com'), self._row('two@example.com')],
+            }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(User_Model.objects.filter(work_email__in=['one@example.com', 'two@example.com']).count(), 0)
+
+    def test_command(self, send_email):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump([self._row('cli@example.com', password=''), self._row('cli@example.com')], f)
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+        call_command('provision_staff', f.name, '--no-invites', stdout=out)
+
+        self.assertIn("Summary: {'created': 1, 'invalid': 1}", out.getvalue())
+        self.assertFalse(User_Model.objects.get(work_email='cli@example.com').has_usable_password())
+        self.assertFalse(MagicLinkToken.objects.exists())
+
+
+def legacy_password_errors(password):
+    """The checks ClientManager.ValidatePassword made before password_policy.py"""
+    errors = []
+    if len(password) < 8:
+        errors.append('Password must be 8 characters long.')
+    if not re.search(r'[a-z]', password):
+        errors.append('Password must contain at least one lowercase letter (a-z)')
+    if not re.search(r'[A-Z]', password):
+        errors.append('Password must contain at least one uppercase letter (A-Z)')
+    if not re.search(r'\d', password):
+        errors.append('Password must contain at least one digit (0-9)')
+    if not re.search(r'[!@#$%^&*()_+=\[\]{};:\'",.<>/?\\|-]', password):
+        errors.append('Password must contain at least one special character (!@#$%^&*()_+=[]{};:\'",.<>/?\\|-)')
+    if re.search(r'\s', password):
+        errors.append('Password must not contain whitespace.')
+    # inverted: rejected passwords WITHOUT a run of numbers
+    if not re.search(r'(012|123|234|345|456|567|678|789|890)', password):
+        errors.append('Password must not contain sequential numbers.')
+    if re.search(r'(abc|bcd|cde|def|efg|fgh|ghi|hij|ijk|jkl|klm|lmn|mno|nop|opq|pqr|qrs|rst|stu|tuv|uvw|vwx|wxy|xyz)',
+                 password.lower()):
+        errors.append('Password must not contain sequential letters.')
+    for pattern in ['password', '12345678', 'qwerty', 'admin', 'letmein']:
+        if re.search(pattern, password.lower()):
+            errors.append('Password is too easy. Please make a strong password')
+    return errors
+
+
+SHORT, LOWER, UPPER, DIGIT, SPECIAL, SPACE, NUMBERS, LETTERS, WEAK = (
+    ['Password must be 8 characters long.'] + [message for _, _, message in RULES]
+)
+
+# (password, errors the policy reports)
+PASSWORD_CASES = [
+    (PASSWORD, []),
+    ('Zq8!mW', [SHORT]),
+    ('ZQ8!MWP2#RK7', [LOWER]),
+    ('zq8!mwp2#rk7', [UPPER]),
+    ('Zq!!mWp#Rkx', [DIGIT]),
+    ('Zq8xmWp2nRk7', [SPECIAL]),
+    ('Zq8! mWp2#Rk7', [SPACE]),
+    ('Zq8!mWp2#Rk7\t', [SPACE]),
+    ('Zq8!mW123#Rk', [NUMBERS]),
+    ('Zq8!7890#Rk', [NUMBERS]),
+    ('Zq8!m135#Rk', []),
+    ('Zq8!ABCp2#Rk7', [LETTERS]),
+    ('Zq8!xYzp2#Rk7', [LETTERS]),
+    ('Zq8!PassWord2#', [WEAK]),
+    ('Zq8!QWERTY#m', [WEAK]),
+    ('Zq8!Admin#Lm', [WEAK]),
+    ('Zq8!letMEin#', [WEAK]),
+    ('zz', [SHORT, UPPER, DIGIT, SPECIAL]),
+]
+
+
+class PasswordPolicyTests(TestCase):
+
+    def setUp(self):
+        self.policy = PasswordPolicy(RULES, check_breached=False)
+
+    def test_rules(self):
+        for password, expected in PASSWORD_CASES:
+            with self.subTest(password=password):
+                self.assertEqual(self.policy.validate(password), expected)
+
+    def test_same_as_legacy_checks(self):
+        for password, _ in PASSWORD_CASES:
+            with self.subTest(password=password):
+                legacy = set(legacy_password_errors(password))
+                # the sequential-number rule was inverted before; it is the only difference
+                legacy ^= {NUMBERS}
+                self.assertEqual(set(self.policy.validate(password)), legacy)
+
+    def test_sequential_numbers_rejected(self):
+        self.assertIn(NUMBERS, self.policy.validate('Zq8!m123#Rk'))
+        self.assertNotIn(NUMBERS, self.policy.validate('Zq8!m135#Rk'))
+
+    def test_breached_filter_fallback(self):
+        self.addCleanup(setattr, policy_module, '_blocklist', None)
+        policy_module._blocklist = None
+        policy = PasswordPolicy(RULES)
+        with override_settings(PASSWORD_POLICY={'BLOOM_PATH': '/nonexistent/breached.bloom'}), \
+                self.assertLogs('apps.authentication.password_policy', 'WARNING'):
+            # passes every rule but is on Django's common-passwords list
+            self.assertEqual(policy.validate('P@ssw0rd'), [BREACHED_MESSAGE])
+        self.assertEqual(policy.validate(PASSWORD), [])
+
+    def test_breached_filter_file(self):
+        self.addCleanup(setattr, policy_module, '_blocklist', None)
+        policy_module._blocklist = None
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'breached.bloom')
+            write_bloom_file(path, ['Zq8!mWp2#Rk7'], capacity=10)
+            with override_settings(PASSWORD_POLICY={'BLOOM_PATH': path}):
+                self.assertEqual(PasswordPolicy(RULES).validate(PASSWORD), [BREACHED_MESSAGE])
+                self.assertEqual(PasswordPolicy(RULES).validate('P@ssw0rd'), [])
@@ -0,0 +1,146 @@
+# ==========================================
+# LOGIN / SIGNUP THROTTLING
+# ==========================================
+"""
+Sliding-window counters kept in the shared cache (no database access).
+
+Each scope (ip / email) keeps one counter per fixed window. The sliding
+count is the current window plus the previous window weighted by how much
+of it still overlaps the last `window` seconds:
+
+    estimate = current + previous * (1 - elapsed_in_current / window)
+
+So a check is one cache.get_many() and a hit is one add() + incr(), O(1)
+whatever the traffic. Counters expire on their own after two windows.
+
+Use a cache shared by all workers (REDIS_URL) in production - LocMemCache
+only throttles inside one process.
+"""
+
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.user.buffers import BulkCreateBuffer
+from apps.user.models import LoginAttempt
+
+
+@dataclass
+class ThrottleStatus:
+    locked: bool
+    retry_after: int = 0    # seconds until the estimate drops below the limit
+    scope: str = None       # which scope is locked ('ip' / 'email')
+
+
+class SlidingWindowThrottle:
+    """
+    limits: {'ip': (max_hits, window_seconds), 'email': (...)}
+    Identifiers are hashed so emails never end up in cache keys.
+    """
+
+    def __init__(self, name, limits):
+        self.name = name
+        self.limits = limits
+
+    def _key(self, scope, identifier, bucket):
+        digest = hashlib.sha256(str(identifier).lower().encode()).hexdigest()[:32]
+        return f"throttle:{self.name}:{scope}:{digest}:{bucket}"
+
+    def _estimate(self, counts, scope, identifier, now):
+        limit, window = self.limits[scope]
+        bucket = int(now // window)
+        current = counts.get(self._key(scope, identifier, bucket), 0)
+        previous = counts.get(self._key(scope, identifier, bucket - 1), 0)
+        overlap = 1 - (now % window) / window
+        return current + previous * overlap, current, previous, overlap
+
+    def check(self, **identifiers):
+        """
+        Lockout state for identifiers (e.g. ip='1.2.3.4', email='a@b.c')
+        without recording a hit.
+        """
+        now = time.time()
+        scopes = [(s, i) for s, i in identifiers.items() if i and s in self.limits]
+        keys = []
+        for scope, identifier in scopes:
+            window = self.limits[scope][1]
+            bucket = int(now // window)
+            keys += [self._key(scope, identifier, bucket), self._key(scope, identifier, bucket - 1)]
+        counts = cache.get_many(keys) if keys else {}
+
+        for scope, identifier in scopes:
+            limit, window = self.limits[scope]
+            estimate, current, previous, overlap = self._estimate(counts, scope, identifier, now)
+            if estimate >= limit:
+                return ThrottleStatus(True, self._retry_after(limit, window, current, previous, now), scope)
+        return ThrottleStatus(False)
+
+    def _retry_after(self, limit, window, current, previous, now):
+        elapsed = now % window
+        if current >= limit:
+            # wait for the next window, where `current` becomes the decaying previous one
+            target = window * (1 - limit / current)
+            return max(1, math.ceil(window - elapsed + target))
+        # the previous window decays until current + previous * weight < limit
+        target = window * (1 - (limit - current) / previous)
+        return max(1, math.ceil(target - elapsed))
+
+    def hit(self, **identifiers):
+        """Record one hit for every identifier"""
+        now = time.time()
+        for scope, identifier in identifiers.items():
+            if not identifier or scope not in self.limits:
+                continue
+            window = self.limits[scope][1]
+            key = self._key(scope, identifier, int(now // window))
+            # add() is a no-op when the counter exists; incr() is atomic on
+            # Redis/Memcached. The counter outlives the previous-window read.
+            cache.add(key, 0, timeout=window * 2)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # evicted between add() and incr()
+                cache.set(key, 1, timeout=window * 2)
+
+    def reset(self, **identifiers):
+        """Forget the hits of identifiers (e.g. the email after a successful signin)"""
+        now = time.time()
+        keys = []
+        for scope, identifier in identifiers.items():
+            if not identifier or scope not in self.limits:
+                continue
+            window = self.limits[scope][1]
+            bucket = int(now // window)
+            keys += [self._key(scope, identifier, bucket), self._key(scope, identifier, bucket - 1)]
+        if keys:
+            cache.delete_many(keys)
+
+
+def _limits(name):
+    return {scope: tuple(value) for scope, value in settings.AUTH_THROTTLE[name].items()}
+
+
+# Failed signins only; a success resets the email counter.
+login_throttle = SlidingWindowThrottle('login', _limits('LOGIN'))
+# Every signup attempt counts.
+signup_throttle = SlidingWindowThrottle('signup', _limits('SIGNUP'))
+# Every magic link request counts (each one sends an email).
+magic_link_throttle = SlidingWindowThrottle('magic_link', _limits('MAGIC_LINK'))
+
+
+# LoginAttempt rows are written in batches (see apps/user/buffers.py)
+login_attempt_buffer = BulkCreateBuffer(
+    LoginAttempt,
+    batch_size=settings.AUTH_THROTTLE.get('ATTEMPT_BATCH_SIZE', 100),
+    flush_interval=settings.AUTH_THROTTLE.get('ATTEMPT_FLUSH_INTERVAL', 5),
+)
+
+
+def record_login_attempt(email, ip_address, success, attempt_type='password'):
+    login_attempt_buffer.add(LoginAttempt(
+        email=email, ip_address=ip_address, success=success, attempt_type=attempt_type
+    ))
@@ -0,0 +1,141 @@
+from rest_framework_simplejwt.tokens import RefreshToken  # type: ignore
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer  # type: ignore
+from rest_framework_simplejwt.settings import api_settings  # type: ignore
+from rest_framework_simplejwt.exceptions import TokenError  # type: ignore
+from rest_framework_simplejwt.token_blacklist.models import (  # type: ignore
+    BlacklistedToken, OutstandingToken
+)
+from rest_framework_simplejwt.utils import datetime_from_epoch  # type: ignore
+from apps.membership.context import (
+    AccessContext, load_access_context, get_claims_version
+)
+from . blacklist import jti_blacklist, start_background_pruner
+from apps.user.session_tracking import SESSION_CLAIM, session_tracker
+from . revocation import TOKEN_VERSION_CLAIM, get_token_version, token_version_is_current
+
+# Claims signed into every token so most requests can be authorised without
+# asking the database for the caller's role (see authentication.py).
+#
+# | Claim           | Value                                               |
+# | --------------- | --------------------------------------------------- |
+# | `role`          | CompanyMembership.role in the default company        |
+# | `company_id`    | Company id of that membership                       |
+# | `membership_id` | CompanyMembership id                                |
+# | `profile_id`    | Participant id (clients) or Employee id (staff)     |
+# | `profile_type`  | 'participant' / 'employee' / None                   |
+# | `ctx_v`         | claims version, compared with the shared cache      |
+# | `tv`            | User_Model.token_version (revocation.py)            |
+# | `sid`           | tracked session id (apps/user/session_tracking.py)  |
+
+ACCESS_CLAIMS = ('role', 'company_id', 'membership_id', 'profile_id', 'profile_type', 'ctx_v')
+
+
+def stamp_access_claims(token, context):
+    """Write the AccessContext of a user into token"""
+    if context.participant_id and context.is_client:
+        profile_id, profile_type = context.participant_id, 'participant'
+    elif context.employee_id:
+        profile_id, profile_type = context.employee_id, 'employee'
+    else:
+        profile_id, profile_type = None, None
+
+    token['role'] = context.role
+    token['company_id'] = context.company_id
+    token['membership_id'] = context.membership_id
+    token['profile_id'] = profile_id
+    token['profile_type'] = profile_type
+    token['ctx_v'] = get_claims_version(context.user_id, seed=True)
+
+
+def claims_are_current(token, user_id):
+    """True when token carries claims and nothing changed since they were signed"""
+    if 'ctx_v' not in token:
+        return False
+    current = get_claims_version(user_id)
+    return current is not None and current == token['ctx_v']
+
+
+def context_from_claims(token, user_id):
+    """Build an AccessContext straight from trusted claims (no database access)"""
+    profile_type = token.get('profile_type')
+    profile_id = token.get('profile_id')
+    return AccessContext(
+        user_id,
+        role=token.get('role'),
+        company_id=token.get('company_id'),
+        membership_id=token.get('membership_id'),
+        participant_id=profile_id if profile_type == 'participant' else None,
+        employee_id=profile_id if profile_type == 'employee' else None,
+    )
+
+
+class CasaRefreshToken(RefreshToken):
+    """
+    Refresh token that carries the caller's role/company claims.
+    Access tokens derived from it copy the claims automatically.
+    """
+
+    @classmethod
+    def for_user(cls, user, request=None):
+        token = super().for_user(user)
+        stamp_access_claims(token, load_access_context(user.pk, use_cache=False))
+        token[TOKEN_VERSION_CLAIM] = get_token_version(user.pk)
+        if request is not None:
+            token[SESSION_CLAIM] = session_tracker.start(user.pk, request)
+        start_background_pruner()
+        return token
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        # rejected after revoke_all_sessions() (revocation.py)
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and not token_version_is_current(self, user_id):
+            raise TokenError('Token has been revoked')
+
+    def check_blacklist(self):
+        # cache / Bloom filter first, the database only on a "maybe" (blacklist.py)
+        if jti_blacklist.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError('Token is blacklisted')
+
+    def blacklist(self):
+        """
+        Blacklist this token. The outstanding row normally exists already
+        (for_user / outstand), so skip simplejwt's user lookup and
+        get_or_create, and only fall back to them when it is missing.
+
+        Also called on every refresh (BLACKLIST_AFTER_ROTATION): the rotated
+        token keeps the sid, so the session is not ended here (see signout).
+        """
+        jti = self.payload[api_settings.JTI_CLAIM]
+        outstanding = OutstandingToken.objects.filter(jti=jti).only('id', 'expires_at').first()
+        if outstanding is None:
+            result = super().blacklist()
+        else:
+            result = BlacklistedToken.objects.get_or_create(token=outstanding)
+        jti_blacklist.mark(jti, datetime_from_epoch(self.payload['exp']))
+        return result
+
+    def outstand(self):
+        # Called on rotation right after set_jti(), so the jti is new: one
+        # INSERT instead of a user lookup + get_or_create.
+        token = OutstandingToken.objects.create(
+            user_id=self.payload.get(api_settings.USER_ID_CLAIM),
+            jti=self.payload[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload['exp']),
+        )
+        return token, True
+
+    @property
+    def access_token(self):
+        # Re-stamp stale claims on refresh so a role change reaches the next
+        # access token (and the rotated refresh token) without a new signin.
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and not claims_are_current(self, user_id):
+            stamp_access_claims(self, load_access_context(user_id, use_cache=False))
+        return super().access_token
+
+
+class CasaTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CasaRefreshToken
@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.urls import path
 from . import views
+from apps.employee import views as employee_views
+from apps.participant import views as participant_views
+from apps.search import views as search_views
 from rest_framework_simplejwt.views import TokenRefreshView # type: ignore
 
 urlpatterns = [
@@ -9,9 +12,18 @@ urlpatterns = [
     path('employee/signup/', views.employee_signup, name='employee_signup'),
     path('employee/signin/', views.employee_signin, name='employee_signin'),
     path('signout/', views.signout, name='signout'),
+    path('signout/all/', views.signout_all, name='signout_all'),
+    path('magic-link/request/', views.magic_link_request, name='magic_link_request'),
+    path('magic-link/verify/', views.magic_link_verify, name='magic_link_verify'),
     path('employee/add/', views.admin_add_employee, name='admin_add_employee'),
     path('employees/', views.admin_get_employees, name='admin_get_employee'),
-    path('employee/update/', views.admin_update_employee, name='admin_update_employee'),
+    path('employees/profiles/', employee_views.admin_get_employees_with_profiles, name='admin_get_employees_with_profiles'),
+    path('participants/completion/', participant_views.admin_profile_completion_report, name='admin_profile_completion_report'),
+    path('participants/needs/', participant_views.admin_participants_by_needs, name='admin_participants_by_needs'),
+    path('search/', search_views.admin_search, name='admin_search'),
+    path('employees/bulk/', views.admin_bulk_add_employees, name='admin_bulk_add_employees'),
+    path('employees/<int:employee_id>/', views.admin_update_employee, name='admin_update_employee'),
+    path('employees/bulk-update/', views.admin_bulk_update_employees, name='admin_bulk_update_employees'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('user/profile/', views.admin_get_current_user, name='get_current_user'),
 ]
@@ -1,61 +1,72 @@
-# from django.template.loader import render_to_string
-# from django.conf import settings
-# from django.core.mail import send_mail
-
-# def get_client_ip(request):
-#     """Get real client IP address"""
-#     # request.META is a dictionary-like object in Django that contains all the HTTP headers.
-#     # HTTP_X_FORWARDED_FOR is a common proxy header that holds the original IP address of the client
-#     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-#     if x_forwarded_for:
-#         return x_forwarded_for.split(',')[0].strip()
-#     return request.META.get('REMOTE_ADDR', '127.0.0.1')
-
-
-# def send_magic_link_email(magic_token, action):
-#     """Send magic link email with beautiful templates"""
-#     try:
-#         link_url = magic_token.get_login_url()
-
-#         # Email content based on action
-#         email_configs = {
-#             'login': {
-#                 'subject': '🔐 Your secure login link',
-#                 'template': 'emails/magic_link_login.html'
-#             },
-#             'register': {
-#                 'subject': '🎉 Verify your email to get started',
-#                 'template': 'emails/magic_link_verify.html'
-#             },
-#             'invite': {
-#                 'subject': '👋 You\'re invited to join a team',
-#                 'template': 'emails/magic_link_invite.html'
-#             }
-#         }
-
-#         config = email_configs.get(action, email_configs['login'])
-
-#         html_content = render_to_string(config['template'], {
-#             'magic_link': link_url,
-#             'email': magic_token.email,
-#             'expires_at': magic_token.expires_at,
-#             'company_name': getattr(settings, 'COMPANY_NAME', 'CRM SaaS'),
-#             'support_email': getattr(settings, 'SUPPORT_EMAIL', 'support@yourcrm.com'),
-#             'action': action,
-#             'user': magic_token.user
-#         })
-
-#         send_mail(
-#             subject=config['subject'],
-#             message='Please use an HTML-capable email client to view this message.',
-#             from_email=getattr(settings, 'DEFAULT_FROM_EMAIL',
-#                                'noreply@yourcrm.com'),
-#             recipient_list=[magic_token.email],
-#             html_message=html_content,
-#             fail_silently=False
-#         )
-
-#         return True
-#     except Exception as e:
-#         print(f"Failed to send magic link email: {e}")
-#         return False
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# Emails are sent off the request thread; SMTP can take seconds.
+_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='auth-email')
+
+
+def get_client_ip(request):
+    """Get real client IP address"""
+    # request.META is a dictionary-like object in Django that contains all the HTTP headers.
+    # HTTP_X_FORWARDED_FOR is a common proxy header that holds the original IP address of the client
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '127.0.0.1')
+
+
+# Email content based on action
+MAGIC_LINK_EMAILS = {
+    'login': {
+        'subject': '🔐 Your secure login link',
+        'intro': 'Use the link below to sign in to Casa Community.',
+    },
+    'register': {
+        'subject': '🎉 Verify your email to get started',
+        'intro': 'Use the link below to verify your email address.',
+    },
+    'invite': {
+        'subject': '👋 You\'re invited to join Casa Community',
+        'intro': 'Use the link below to accept your invitation.',
+    },
+}
+
+
+def _send_magic_link_email(email, first_name, link, action, expires_at):
+    try:
+        config = MAGIC_LINK_EMAILS.get(action, MAGIC_LINK_EMAILS['login'])
+        message = f"""
+            Hi {first_name},
+
+            {config['intro']}
+
+            {link}
+
+            This link works once and expires at {expires_at.strftime('%d/%m/%Y %I:%M %p')} UTC.
+            If you didn't ask for it, you can ignore this email.
+
+            ---
+            Casa Community
+        """
+        send_mail(
+            subject=config['subject'],
+            message=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[email],
+            fail_silently=False,
+        )
+    except Exception as e:
+        logger.error(f"Failed to send magic link email to {email}: {e}")
+    finally:
+        close_old_connections()
+
+
+def send_magic_link_email(email, first_name, link, action, expires_at):
+    """Queue the magic link email; returns immediately"""
+    return _email_executor.submit(_send_magic_link_email, email, first_name, link, action, expires_at)
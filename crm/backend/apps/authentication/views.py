@@ -10,17 +10,31 @@ from rest_framework import status, permissions
 from django.core.validators import validate_email 
 from django.core.exceptions import ValidationError 
 from django.db import transaction
+from django.db.models import Count, Q
 # from django.core.mail import send_mail
-from rest_framework_simplejwt.tokens import RefreshToken  # type: ignore
 from rest_framework_simplejwt.exceptions import TokenError  # type: ignore
 
 from . serializers import SignupSerializer
+from . tokens import CasaRefreshToken
+from . revocation import revoke_all_sessions, revoke_sessions_for
 from apps.user.models import User_Model
 from apps.user.serializers import UserSerializer
 from apps.company.models import Company
 from apps.membership.models import CompanyMembership
-# from .utils import get_client_ip, send_magic_link_email
-# from . models import MagicLinkToken
+from apps.membership.context import (
+    get_access_context, invalidate_access_contexts, bump_claims_versions
+)
+from apps.membership.constant import EMPLOYEE_ROLES, STAFF_ROLES, ROLE_ALIASES, normalize_role
+from apps.user.pagination import KeysetPaginator, InvalidCursor
+from apps.user.session_tracking import SESSION_CLAIM, session_tracker
+from apps.user.hashing import PasswordHashingBusy
+from . throttle import (
+    login_throttle, signup_throttle, magic_link_throttle, record_login_attempt
+)
+from . magic_link import issue_magic_link, consume_magic_link
+from . utils import get_client_ip
+from . provisioning import provision_staff, parse_rows, summarize, ProvisioningError
+from . permissions import IsCompanyAdmin
 
 # | Permission Class |    Description |
 # | ------------------ | -------------------------------------------------------------- |
@@ -37,6 +51,16 @@ from apps.membership.models import CompanyMembership
 The @api_view decorator wraps your function and transforms the Django request
 into a DRF Request object before passing it to your view.
 """
+def throttled_response(throttle_status):
+    """429 with a Retry-After header for a locked throttle"""
+    response = Response({
+        'error': 'Too many attempts. Please try again later.',
+        'retry_after': throttle_status.retry_after
+    }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(throttle_status.retry_after)
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def client_signup(request):
@@ -64,6 +88,13 @@ def client_signup(request):
             'error': 'All fields are required',
             'required_fields': ['work_email', 'password', 'first_name', 'last_name']
         }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Signup throttle per IP (counts every attempt, checked before hashing)
+    client_ip = get_client_ip(request)
+    throttle_status = signup_throttle.check(ip=client_ip)
+    if throttle_status.locked:
+        return throttled_response(throttle_status)
+    signup_throttle.hit(ip=client_ip)
     
     # check if user already exists
     if User_Model.objects.filter(work_email = work_email).exists():
@@ -111,7 +142,7 @@ def client_signup(request):
             )
 
             # Generate tokens for immediate login
-            refresh = RefreshToken.for_user(user)
+            refresh = CasaRefreshToken.for_user(user, request)
 
             return Response({
                 'success': True,
@@ -135,6 +166,10 @@ def client_signup(request):
         return Response({
             'error': 'Company configuration error. Please contact support.'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except PasswordHashingBusy:
+        return Response({
+            'error': 'Server is busy. Please try again shortly.'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response({
             'error': 'Registration failed. Please try again.'
@@ -167,6 +202,13 @@ def employee_signup(request):
             'error': 'All fields are required',
             'required_fields': ['work_email', 'password', 'first_name', 'last_name']
         }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Signup throttle per IP (counts every attempt, checked before hashing)
+    client_ip = get_client_ip(request)
+    throttle_status = signup_throttle.check(ip=client_ip)
+    if throttle_status.locked:
+        return throttled_response(throttle_status)
+    signup_throttle.hit(ip=client_ip)
     
     # validate employee email domain
     # if not work_email.endswith('@casa-community.com'):
@@ -220,7 +262,7 @@ def employee_signup(request):
             )
 
             # Generate tokens for immediate signin
-            refresh = RefreshToken.for_user(user)
+            refresh = CasaRefreshToken.for_user(user, request)
 
             return Response({
                 'success': True,
@@ -244,6 +286,10 @@ def employee_signup(request):
         return Response({
             'error': 'Company configuration error. Please contact support.'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except PasswordHashingBusy:
+        return Response({
+            'error': 'Server is busy. Please try again shortly.'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response({
             'error': 'Registration failed. Please try again.'
@@ -278,6 +324,13 @@ def client_signin(request):
             {'error': 'Invalid email format'},
             status = status.HTTP_400_BAD_REQUEST
         )
+
+    # Reject locked IPs/emails before any password hashing runs
+    client_ip = get_client_ip(request)
+    throttle_status = login_throttle.check(ip=client_ip, email=work_email)
+    if throttle_status.locked:
+        record_login_attempt(work_email, client_ip, success=False)
+        return throttled_response(throttle_status)
     
     # Authenticate User
     try:
@@ -303,8 +356,10 @@ def client_signin(request):
                 return Response({
                     'error': 'Access denied. Client account required.'
                 }, status=status.HTTP_403_FORBIDDEN)
+            login_throttle.reset(email=work_email)
+            record_login_attempt(work_email, client_ip, success=True)
             # Generate tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = CasaRefreshToken.for_user(user, request)
 
             return Response({
                 'message': 'Login successful',
@@ -323,10 +378,16 @@ def client_signin(request):
             }, status=status.HTTP_200_OK)
         
         else:
+            login_throttle.hit(ip=client_ip, email=work_email)
+            record_login_attempt(work_email, client_ip, success=False)
             return Response({
                 'error': 'Invalid credentials'
             }, status = status.HTTP_401_UNAUTHORIZED)
         
+    except PasswordHashingBusy:
+        return Response({
+            'error': 'Server is busy. Please try again shortly.'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response({
             'error': 'An error occured during authentication'
@@ -364,6 +425,13 @@ def employee_signin(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    # Reject locked IPs/emails before any password hashing runs
+    client_ip = get_client_ip(request)
+    throttle_status = login_throttle.check(ip=client_ip, email=work_email)
+    if throttle_status.locked:
+        record_login_attempt(work_email, client_ip, success=False)
+        return throttled_response(throttle_status)
+
     # Authenticate User
     try:
         user = authenticate(request, work_email=work_email, password=password)
@@ -387,8 +455,10 @@ def employee_signin(request):
                 return Response({
                     'error': 'Access denied. Client account required.'
                 }, status=status.HTTP_403_FORBIDDEN)
+            login_throttle.reset(email=work_email)
+            record_login_attempt(work_email, client_ip, success=True)
             # Generate tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = CasaRefreshToken.for_user(user, request)
 
             return Response({
                 'message': 'Login successful',
@@ -407,10 +477,16 @@ def employee_signin(request):
             }, status=status.HTTP_200_OK)
 
         else:
+            login_throttle.hit(ip=client_ip, email=work_email)
+            record_login_attempt(work_email, client_ip, success=False)
             return Response({
                 'error': 'Invalid credentials'
             }, status=status.HTTP_401_UNAUTHORIZED)
 
+    except PasswordHashingBusy:
+        return Response({
+            'error': 'Server is busy. Please try again shortly.'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response({
             'error': 'An error occured during authentication'
@@ -438,8 +514,9 @@ def signout(request):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Blacklist the refresh token
-        token = RefreshToken(refresh_token)
+        token = CasaRefreshToken(refresh_token)
         token.blacklist()  # prevents the token from being used again
+        session_tracker.end(token.get(SESSION_CLAIM))
 
         user = request.user
 
@@ -458,12 +535,141 @@ def signout(request):
             'error': "Logout Failed!"
         }, status = status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def signout_all(request):
+    """
+    Sign out of every device: all access and refresh tokens issued to the
+    user so far stop working (one counter bump, see revocation.py)
+    URL: /api/auth/signout/all/
+    """
+    try:
+        revoke_all_sessions(request.user.pk)
+
+        return Response({
+            'message': f'Goodbye! {request.user.first_name}! You have been signed out of all devices.',
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            'error': "Logout Failed!"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+# ==========================================
+# MAGIC LINK SIGN-IN
+# ==========================================
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def magic_link_request(request):
+    """
+    Email a single-use sign-in link (see magic_link.py)
+    URL: /api/auth/magic-link/request/
+
+    Expected payload:
+    {
+        "work_email": "user@example.com"
+    }
+    """
+    work_email = request.data.get('work_email', '').strip().lower()
+
+    try:
+        validate_email(work_email)
+    except ValidationError:
+        return Response(
+            {'error': 'Invalid email format'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    client_ip = get_client_ip(request)
+    throttle_status = magic_link_throttle.check(ip=client_ip, email=work_email)
+    if throttle_status.locked:
+        return throttled_response(throttle_status)
+    magic_link_throttle.hit(ip=client_ip, email=work_email)
+
+    try:
+        user = User_Model.objects.filter(
+            work_email__lower=work_email, is_active=True
+        ).only('id', 'work_email', 'first_name').first()
+
+        if user is not None:
+            issue_magic_link(
+                user,
+                token_type='login',
+                ip_address=client_ip,
+                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            )
+
+        # Same answer either way so the endpoint doesn't reveal which emails exist
+        return Response({
+            'message': 'If an account exists for this email, a sign-in link has been sent.'
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            'error': 'Could not send sign-in link. Please try again.'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def magic_link_verify(request):
+    """
+    Exchange a magic link token for JWT tokens. Each link works once.
+    URL: /api/auth/magic-link/verify/
+
+    Expected payload:
+    {
+        "token": "<token from the emailed link>"
+    }
+    """
+    client_ip = get_client_ip(request)
+
+    try:
+        user = consume_magic_link(request.data.get('token', ''))
+
+        if user is None:
+            return Response({
+                'error': 'This sign-in link is invalid or has expired'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not user.is_active:
+            return Response({
+                'error': 'Account is inactive. Contact Support.'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        login_throttle.reset(email=user.work_email)
+        record_login_attempt(user.work_email, client_ip, success=True, attempt_type='magic_link')
+        refresh = CasaRefreshToken.for_user(user, request)
+
+        return Response({
+            'message': 'Login successful',
+            'user': {
+                'id': user.id,
+                'email': user.work_email,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+                'is_active': user.is_active,
+                'email_verified': user.email_verified,
+                'role': refresh.get('role'),
+            },
+            'tokens': {
+                'access': str(refresh.access_token),
+                'refresh': str(refresh),
+            }
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            'error': 'An error occured during authentication'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 # ==========================================
 # ADD NEW EMPLOYEE (ADMIN ONLY)
 # ==========================================
 
 @api_view(['POST'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
 def admin_add_employee(request):
     """
     Admin can add new employees directly
@@ -481,20 +687,6 @@ def admin_add_employee(request):
     }
     """
     
-    # Check if current user is admin
-    try:
-
-        admin_membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title='Casa Community Pty Ltd',
-            role='ADMIN'
-        )
-    except CompanyMembership.DoesNotExist:
-        return Response({
-            'error': 'Access denied. Admin privileges required.',
-            'required_role': 'ADMIN'
-        }, status=status.HTTP_403_FORBIDDEN)
-    
     # Get form data
     work_email = request.data.get('work_email', '').strip().lower()
     password = request.data.get('password', '')
@@ -596,44 +788,142 @@ def admin_add_employee(request):
         return Response({
             'error': 'Company configuration error. Please contact support.'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except PasswordHashingBusy:
+        return Response({
+            'error': 'Server is busy. Please try again shortly.'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response({
             'error': 'Failed to create employee account. Please try again.',
             'details': str(e) if request.user.is_superuser else None  # Only show details to superuser
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# ==========================================
+# BULK ADD EMPLOYEES (ADMIN ONLY)
+# ==========================================
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
+def admin_bulk_add_employees(request):
+    """
+    Create many employees in one request (see provisioning.py)
+    URL: /api/auth/employees/bulk/
+
+    Accepts a CSV upload (multipart "file" with header
+    work_email,first_name,last_name,role,password) or JSON:
+    {
+        "employees": [
+            {"work_email": "jane@example.com", "first_name": "Jane",
+             "last_name": "Smith", "role": "SUPPORT WORKER", "password": "..."},
+            ...
+        ],
+        "dry_run": false
+    }
+    Rows without a password are emailed an invite link instead.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        data = upload.read()
+    elif isinstance(request.data, list):
+        data = request.data
+    else:
+        data = request.data.get('employees') or request.data.get('csv')
+
+    dry_run = str(request.data.get('dry_run', 'false')).lower() in ('1', 'true', 'yes') \
+        if not isinstance(request.data, list) else False
+
+    try:
+        report = provision_staff(parse_rows(data), dry_run=dry_run)
+    except ProvisioningError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'error': 'Failed to create employee accounts. No accounts were created.',
+            'details': str(e) if request.user.is_superuser else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    counts = summarize(report)
+    return Response({
+        'success': not counts.get('invalid'),
+        'dry_run': dry_run,
+        'summary': counts,
+        'results': report,
+    }, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
 # ==========================================
 # GET ALL EMPLOYEES (ADMIN ONLY)
 # ==========================================
 
+directory_paginator = KeysetPaginator(ordering=('joined_at', 'id'))
+
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
 def admin_get_employees(request):
     """
-    Get list of all employees - Admin only
+    Staff directory, one page at a time - Admin only
     URL: /api/admin/employees/
+
+    Query params:
+        role       EMPLOYEE / SUPPORT_WORKER / MANAGER / ADMIN (comma separated)
+        is_active  true / false
+        search     part of a name or email
+        page_size  default 50, max 200
+        cursor     next_cursor of the previous page
+
+    Pages by (joined_at, id) instead of OFFSET, so every page is one index
+    range scan. role_summary is a single GROUP BY query over all staff;
+    total_count counts the staff matching the filters.
     """
+    company_id = get_access_context(request).company_id
+    staff = CompanyMembership.objects.filter(company_id=company_id, role__in=STAFF_ROLES)
 
-    # Check if current user is admin
-    try:
-        admin_membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title=settings.DEFAULT_COMPANY['title'],
-            role='ADMIN'
+    # one GROUP BY for the summary instead of counting a Python list
+    role_summary = {'ADMIN': 0, 'MANAGER': 0, 'SUPPORT_WORKER': 0, 'EMPLOYEE': 0}
+    for row in staff.order_by().values('role').annotate(count=Count('id')):
+        key = normalize_role(row['role']).replace(' ', '_')
+        role_summary[key] = role_summary.get(key, 0) + row['count']
+
+    employee_memberships = staff
+    roles = request.query_params.get('role')
+    if roles:
+        roles = {normalize_role(role) for role in roles.split(',')}
+        # legacy rows may still use 'SUPPORT_WORKER'
+        roles |= {alias for alias, role in ROLE_ALIASES.items() if role in roles}
+        employee_memberships = employee_memberships.filter(role__in=roles)
+
+    is_active = request.query_params.get('is_active')
+    if is_active in ('true', 'false'):
+        employee_memberships = employee_memberships.filter(is_active=is_active == 'true')
+
+    search = request.query_params.get('search', '').strip()
+    if search:
+        employee_memberships = employee_memberships.filter(
+            Q(user__first_name__icontains=search) |
+            Q(user__last_name__icontains=search) |
+            Q(user__work_email__icontains=search)
         )
-    except CompanyMembership.DoesNotExist:
-        return Response({
-            'error': 'Access denied. Admin privileges required.'
-        }, status=status.HTTP_403_FORBIDDEN)
 
-    # Get all employee memberships
-    employee_memberships = CompanyMembership.objects.filter(
-        company__title=settings.DEFAULT_COMPANY['title'],
-        role__in=['EMPLOYEE', 'SUPPORT_WORKER', 'ADMIN']
-    ).select_related('user')
+    if roles or is_active in ('true', 'false') or search:
+        total_count = employee_memberships.order_by().count()
+    else:
+        # unfiltered: the summary already counted every staff member
+        total_count = sum(role_summary.values())
+
+    employee_memberships = employee_memberships.select_related('user').only(
+        'id', 'role', 'is_active', 'joined_at',
+        'user__id', 'user__work_email', 'user__first_name', 'user__last_name',
+    )
+    try:
+        page, next_cursor = directory_paginator.paginate(employee_memberships, request)
+    except InvalidCursor:
+        return Response({
+            'error': 'Invalid cursor'
+        }, status=status.HTTP_400_BAD_REQUEST)
 
     employees = []
-    for membership in employee_memberships:
+    for membership in page:
         employees.append({
             'id': membership.user.id,
             'email': membership.user.work_email,
@@ -647,13 +937,10 @@ def admin_get_employees(request):
 
     return Response({
         'employees': employees,
-        'total_count': len(employees),
-        'role_summary': {
-            'ADMIN': len([e for e in employees if e['role'] == 'ADMIN']),
-            'MANAGER': len([e for e in employees if e['role'] == 'MANAGER']),
-            'SUPPORT_WORKER': len([e for e in employees if e['role'] == 'SUPPORT_WORKER']),
-            'EMPLOYEE': len([e for e in employees if e['role'] == 'EMPLOYEE'])
-        }
+        'total_count': total_count,
+        'role_summary': role_summary,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
     })
 
 @api_view(['GET'])
@@ -664,18 +951,14 @@ def admin_get_current_user(request):
     URL: /api/user/profile/
     """
     user = request.user
-    # Get user's membershipt to determine role
-    try:
-        membership = CompanyMembership.objects.filter(
-            user = user,
-            company__title = settings.DEFAULT_COMPANY['title']
-        )
-        role = membership.role
-        user_type = 'client' if role == 'CLIENT' else 'employee'
-    except CompanyMembership.DoesNotExist:
+    # Get user's membership to determine role
+    membership = get_access_context(request).membership
+    if membership is None:
         return Response({
             'error': "User membership not found"
         }, status=status.HTTP_404_NOT_FOUND)
+    role = membership.role
+    user_type = 'client' if role == 'CLIENT' else 'employee'
     
     return Response({
         'user': {
@@ -699,7 +982,7 @@ def admin_get_current_user(request):
 
 
 @api_view(['PATCH'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
 def admin_update_employee(request, employee_id):
     """
     Update employee role or status - Admin only
@@ -712,23 +995,11 @@ def admin_update_employee(request, employee_id):
     }
     """
 
-    # Check if current user is admin
-    try:
-        admin_membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title='Casa Community Pty Ltd',
-            role='ADMIN'
-        )
-    except CompanyMembership.DoesNotExist:
-        return Response({
-            'error': 'Access denied. Admin privileges required.'
-        }, status=status.HTTP_403_FORBIDDEN)
-
     # Get employee membership
     try:
-        employee_membership = CompanyMembership.objects.get(
+        employee_membership = CompanyMembership.objects.select_related('user').get(
             user__id=employee_id,
-            company__title='Casa Community Pty Ltd'
+            company_id=get_access_context(request).company_id
         )
     except CompanyMembership.DoesNotExist:
         return Response({
@@ -746,18 +1017,23 @@ def admin_update_employee(request, employee_id):
     new_status = request.data.get('is_active')
 
     if new_role:
-        valid_roles = ['EMPLOYEE', 'SUPPORT_WORKER', 'MANAGER', 'ADMIN']
-        if new_role.upper() not in valid_roles:
+        # 'SUPPORT_WORKER' is stored as 'SUPPORT WORKER' (the spelling signin accepts)
+        new_role = normalize_role(new_role)
+        if new_role not in EMPLOYEE_ROLES:
             return Response({
-                'error': f'Invalid role. Must be one of: {", ".join(valid_roles)}'
+                'error': f'Invalid role. Must be one of: {", ".join(EMPLOYEE_ROLES)}'
             }, status=status.HTTP_400_BAD_REQUEST)
-        employee_membership.role = new_role.upper()
+        employee_membership.role = new_role
 
     if new_status is not None:
         employee_membership.is_active = new_status
 
     employee_membership.save()
 
+    # A deactivated employee is signed out of every device straight away
+    if new_status is not None and not new_status:
+        revoke_all_sessions(employee_membership.user_id)
+
     return Response({
         'success': True,
         'message': f'Employee {employee_membership.user.first_name} {employee_membership.user.last_name} updated successfully',
@@ -770,3 +1046,128 @@ def admin_update_employee(request, employee_id):
             'is_active': employee_membership.is_active
         }
     })
+
+
+# ==========================================
+# BULK UPDATE EMPLOYEES (ADMIN ONLY)
+# ==========================================
+
+@api_view(['PATCH'])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
+def admin_bulk_update_employees(request):
+    """
+    Change the role and/or status of many employees at once - Admin only
+    URL: /api/admin/employees/bulk-update/
+
+    Expected payload:
+    {
+        "changes": [
+            {"user_id": 12, "role": "MANAGER"},
+            {"user_id": 13, "is_active": false},
+            ...
+        ]
+    }
+
+    One locked SELECT for every membership, one bulk_update, and the cached
+    role data of every changed user invalidated in one pass. Deactivated
+    employees are signed out of every device.
+    """
+    changes = request.data if isinstance(request.data, list) else request.data.get('changes')
+    if not isinstance(changes, list) or not changes:
+        return Response({
+            'error': 'changes must be a non-empty list'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(changes) > settings.STAFF_PROVISIONING_MAX_ROWS:
+        return Response({
+            'error': f'At most {settings.STAFF_PROVISIONING_MAX_ROWS} changes per request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Validate every item before touching the database
+    results, wanted = [], {}
+    for index, change in enumerate(changes):
+        result = {'index': index, 'user_id': None, 'status': 'invalid', 'errors': []}
+        results.append(result)
+        if not isinstance(change, dict):
+            result['errors'].append('Each change must be an object')
+            continue
+
+        try:
+            user_id = int(change.get('user_id'))
+        except (TypeError, ValueError):
+            result['errors'].append('user_id is required')
+            continue
+        result['user_id'] = user_id
+
+        role = change.get('role')
+        is_active = change.get('is_active')
+        if role is not None:
+            role = normalize_role(role)
+            if role not in EMPLOYEE_ROLES:
+                result['errors'].append(f'Invalid role. Must be one of: {", ".join(EMPLOYEE_ROLES)}')
+        if is_active is not None and not isinstance(is_active, bool):
+            result['errors'].append('is_active must be true or false')
+        if role is None and is_active is None:
+            result['errors'].append('Nothing to change (role / is_active)')
+        if user_id == request.user.id:
+            result['errors'].append('Cannot modify your own account')
+        if user_id in wanted:
+            result['errors'].append('Duplicate user_id in this request')
+
+        if not result['errors']:
+            wanted[user_id] = (role, is_active, result)
+
+    changed, deactivated = [], []
+    try:
+        with transaction.atomic():
+            memberships = CompanyMembership.objects.select_for_update().filter(
+                user_id__in=list(wanted),
+                company_id=get_access_context(request).company_id,
+                role__in=STAFF_ROLES,
+            ).only('id', 'user_id', 'role', 'is_active')
+
+            found = {membership.user_id: membership for membership in memberships}
+            for user_id, (role, is_active, result) in wanted.items():
+                membership = found.get(user_id)
+                if membership is None:
+                    result['status'] = 'not_found'
+                    result['errors'].append('Employee not found')
+                    continue
+
+                updated = False
+                if role is not None and role != membership.role:
+                    membership.role, updated = role, True
+                if is_active is not None and is_active != membership.is_active:
+                    membership.is_active, updated = is_active, True
+                    if not is_active:
+                        deactivated.append(user_id)
+
+                result.update(status='updated' if updated else 'unchanged',
+                              role=membership.role, is_active=membership.is_active)
+                if updated:
+                    changed.append(membership)
+
+            if changed:
+                CompanyMembership.objects.bulk_update(changed, ['role', 'is_active'], batch_size=500)
+
+    except Exception as e:
+        return Response({
+            'error': 'Failed to update employees. No changes were saved.',
+            'details': str(e) if request.user.is_superuser else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    # bulk_update sends no signals: invalidate cached contexts and token claims here
+    changed_ids = [membership.user_id for membership in changed]
+    if changed_ids:
+        invalidate_access_contexts(changed_ids)
+        bump_claims_versions(changed_ids)
+    revoke_sessions_for(deactivated)
+
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+
+    return Response({
+        'success': not any(result['errors'] for result in results),
+        'summary': summary,
+        'results': results,
+    }, status=status.HTTP_200_OK)
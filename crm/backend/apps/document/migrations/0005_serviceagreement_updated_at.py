@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0004_rename_owner_name_serviceagreement_casa_rep_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serviceagreement',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
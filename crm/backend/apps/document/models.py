@@ -17,6 +17,7 @@ class ServiceAgreement(models.Model):
     signed_date = models.DateTimeField(null=True, blank=True)
     document_url = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     casa_rep_name = models.CharField('Owner', blank=False, null=False, default = 'Anju Isenth')
     # Individual signer dates
     casa_rep_signature_date = models.DateTimeField('Owner Signed Date',null=True, blank=True)
@@ -18,6 +18,9 @@ from django.conf import settings
 import logging
 from django.db import transaction
 from .models import ServiceAgreement
+from apps.membership.context import get_access_context
+from apps.user.conditional import conditional_get, latest
+from apps.user.models import AuditLog
 from django.utils import timezone
 
 zoho_service = ZohoSignService()
@@ -109,10 +112,14 @@ class ZohoSignWebhook(APIView):
 
                     logger.info(f"Service Agreement {service_agreement.id} ({zoho_request_id}) marked as SIGNED.")
                     service_agreement.save()
+                    AuditLog.log_action(None, 'agreement_signed', f'Service agreement {service_agreement.id}',
+                                        request, buffered=True)
 
                 elif event_type == 'request.declined':
                     service_agreement.status = 'DECLINED'
                     service_agreement.save()
+                    AuditLog.log_action(None, 'agreement_declined', f'Service agreement {service_agreement.id}',
+                                        request, buffered=True)
                     logger.info(f"Service Agreement {service_agreement.id} ({zoho_request_id}) marked as DECLINED.")
 
                 elif event_type == 'request.sent':
@@ -283,6 +290,10 @@ def create_service_agreement(request):
             # 7. Save Zoho request_id
             service_agreement.zoho_request_id = request_id
             service_agreement.save()
+            AuditLog.log_action(
+                request.user, 'agreement_created',
+                f'Service agreement {service_agreement.id} for participant {participant.id}', request, buffered=True,
+            )
             
             logger.info(f"ServiceAgreement {service_agreement.id} updated with Zoho request_id: {request_id}")
 
@@ -337,6 +348,8 @@ def download_signed_agreement(request, request_id):
     """Download completed signed document"""
     try:
         pdf_content = zoho_service.download_signed_document(request_id)
+        AuditLog.log_action(request.user, 'agreement_downloaded', f'Zoho request {request_id}', request,
+                            buffered=True)
         
         response = HttpResponse(pdf_content, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="service_agreement_{request_id}.pdf"'
@@ -410,23 +423,47 @@ def list_service_agreements(request):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _agreement_validators(request, service_agreement_id):
+    # one narrow row: the agreement's, its participant's and their user's updated_at
+    access = get_access_context(request)
+    agreements = ServiceAgreement.objects.filter(id=service_agreement_id)
+    if access.is_client:
+        # clients only validate their own (others get the view's 403)
+        agreements = agreements.filter(participant_id=access.participant_id)
+    row = agreements.values_list(
+        'updated_at', 'participant__updated_at', 'participant__user__updated_at'
+    ).first()
+    if row is None:
+        return None
+    return (service_agreement_id, *row), latest(*row)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(_agreement_validators)
 def get_service_agreement_details(request, service_agreement_id):
-    """Get detailed information about a specific service agreement"""
+    """
+    Get detailed information about a specific service agreement
+    URL: /api/document/service-agreements/<service_agreement_id>/
+    Conditional: ETag / Last-Modified, 304 when unchanged
+    """
     try:
-        service_agreement = ServiceAgreement.objects.get(id=service_agreement_id)
-        
+        service_agreement = ServiceAgreement.objects.select_related('participant__user').get(
+            id=service_agreement_id
+        )
+
         # Check permissions - participants can only see their own agreements
-        if hasattr(request.user, 'participant') and service_agreement.participant != request.user.participant:
+        access = get_access_context(request)
+        if access.is_client and service_agreement.participant_id != access.participant_id:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-        
+        participant = service_agreement.participant
+
         agreement_data = {
             'id': service_agreement.id,
             'participant': {
-                'id': service_agreement.participant.id,
-                'name': service_agreement.participant.user.get_full_name(),
-                'email': service_agreement.participant.user.email,
+                'id': participant.id,
+                'name': participant.user.get_full_name(),
+                'email': participant.user.work_email,
             },
             'status': service_agreement.status,
             'zoho_request_id': service_agreement.zoho_request_id,
@@ -436,10 +473,11 @@ def get_service_agreement_details(request, service_agreement_id):
             'casa_rep_signature_date': service_agreement.casa_rep_signature_date,
             'client_signature_date': service_agreement.client_signature_date,
             'guardian_signature_date': service_agreement.guardian_signature_date,
-            'guardian_name': service_agreement.guardian_name,
-            'guardian_email': service_agreement.guardian_email,
-            'guardian_address': service_agreement.guardian_address,
-            'guardian_contact': service_agreement.guardian_contact,
+            # guardian details live on the participant
+            'guardian_name': participant.guardian_name,
+            'guardian_email': participant.guardian_email,
+            'guardian_address': participant.guardian_address,
+            'guardian_contact': str(participant.guardian_contact) if participant.guardian_contact else None,
             'client_additional_comments': service_agreement.client_additional_comments,
             'owner_additional_comments': service_agreement.owner_additional_comments,
             'informed_refusal_consent': service_agreement.informed_refusal_consent,
@@ -7,10 +7,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.db import transaction
+from django.db.models import BooleanField, Case, Count, Q, Value, When
 from . models import Employee  # Adjust import path as needed
 from apps.membership.models import CompanyMembership
+from apps.membership.context import get_access_context
+from apps.membership.constant import STAFF_ROLES
+from apps.user.pagination import KeysetPaginator, InvalidCursor
+from apps.user.models import AuditLog
+from apps.authentication.permissions import IsStaff, IsCompanyAdmin
 from datetime import datetime
-from django.conf import settings
 from django.utils import timezone
 
 # ==========================================
@@ -18,35 +23,21 @@ from django.utils import timezone
 # ==========================================
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsStaff])
 def get_employee_profile(request):
     """
     Get current employee's profile information
     URL: /api/employee/profile/
     """
-    
-    # Verify user is an employee/admin
-    try:
-        membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title='Casa Community Pty Ltd',
-            role__in=['EMPLOYEE', 'ADMIN', 'SUPPORT_WORKER']
-        )
-    except CompanyMembership.DoesNotExist:
-        return Response({
-            'error': 'Access denied. Employee account required.'
-        }, status=status.HTTP_403_FORBIDDEN)
-    
-    # Get employee profile
-    try:
-        employee = Employee.objects.get(user=request.user)
-        profile_exists = True
-    except Employee.DoesNotExist:
-        # Return empty profile structure
-        profile_exists = False
-        employee = None
+
+    # Membership and profile were already loaded by IsStaff in one query
+    access = get_access_context(request)
+    membership = access.membership
+    employee = access.employee
+    profile_exists = employee is not None
     
     if profile_exists:
+        AuditLog.log_action(request.user, 'profile_viewed', f'Employee {employee.id}', request, buffered=True)
         profile_data = {
             'id': employee.id,
             'uuid': str(employee.uuid),
@@ -106,7 +97,7 @@ def get_employee_profile(request):
 # ==========================================
 
 @api_view(['POST', 'PUT'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsStaff])
 def create_update_employee_profile(request):
     """
     Create or update employee profile
@@ -144,19 +135,7 @@ def create_update_employee_profile(request):
         "emergency_contact_relationship": "Spouse"
     }
     """
-    
-    # Verify user is an employee/admin
-    try:
-        membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title='Casa Community Pty Ltd',
-            role__in=['EMPLOYEE', 'ADMIN', 'SUPPORT WORKER']
-        )
-    except CompanyMembership.DoesNotExist:
-        return Response({
-            'error': 'Access denied. Employee account required.'
-        }, status=status.HTTP_403_FORBIDDEN)
-    
+        
     # Get data from request
     data = request.data
     
@@ -299,75 +278,15 @@ def create_update_employee_profile(request):
 # ==========================================
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsStaff])
 def get_employee_profile_completion_status(request):
     """
     Get employee profile completion status
     URL: /api/employee/profile/status/
     """
-    
-    try:
-        membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title='Casa Community Pty Ltd',
-            role__in=['EMPLOYEE', 'ADMIN', 'SUPPORT_WORKER', 'MANAGER']
-        )
-    except CompanyMembership.DoesNotExist:
-        return Response({
-            'error': 'Access denied. Employee account required.'
-        }, status=status.HTTP_403_FORBIDDEN)
-    
-    try:
-        employee = Employee.objects.get(user=request.user)
-        
-        # Check required field groups
-        required_checks = {
-            'basic_info': bool(employee.user.first_name and employee.user.last_name and employee.user.work_email and employee.date_of_birth and employee.address and employee.phone and employee.tfn),
-            'bank_details': bool(employee.bank_name and employee.account_name and employee.bsb and employee.account_number),
-            'emergency_contact': bool(employee.emergency_contact_first_name and employee.emergency_contact_number and employee.emergency_contact_relationship)
-        }
-        
-        # Check optional field groups
-        optional_checks = {
-            'location_details': bool(employee.suburb and employee.state_territory and employee.postcode),
-            'superannuation': bool(employee.fund_name or employee.abn or employee.member_number),
-            'extended_emergency_contact': bool(employee.emergency_contact_last_name and employee.emergency_contact_home)
-        }
-        
-        completed_required = sum(required_checks.values())
-        total_required = len(required_checks)
-        
-        completed_optional = sum(optional_checks.values())
-        total_optional = len(optional_checks)
-        
-        overall_completion = ((completed_required + completed_optional) / (total_required + total_optional)) * 100
-        is_profile_complete = completed_required == total_required
-        
-        return Response({
-            'profile_exists': True,
-            'is_completed': is_profile_complete,
-            'completion_percentage': round(overall_completion, 1),
-            'required_fields': {
-                'completed': completed_required,
-                'total': total_required,
-                'status': required_checks
-            },
-            'optional_fields': {
-                'completed': completed_optional,
-                'total': total_optional,
-                'status': optional_checks
-            },
-            'recommendations': [
-                'Complete basic information (date of birth, address, phone, TFN)' if not required_checks['basic_info'] else None,
-                'Add bank details for payroll setup' if not required_checks['bank_details'] else None,
-                'Add emergency contact information' if not required_checks['emergency_contact'] else None,
-                'Add location details (suburb, state, postcode)' if not optional_checks['location_details'] else None,
-                'Add superannuation details' if not optional_checks['superannuation'] else None,
-                'Complete emergency contact details' if not optional_checks['extended_emergency_contact'] else None
-            ]
-        })
-        
-    except Employee.DoesNotExist:
+
+    employee = get_access_context(request).employee
+    if employee is None:
         return Response({
             'profile_exists': False,
             'is_completed': False,
@@ -376,97 +295,171 @@ def get_employee_profile_completion_status(request):
             'next_steps': ['Create your employee profile to access payroll and HR systems']
         })
 
+    # Check required field groups
+    required_checks = {
+        'basic_info': bool(employee.user.first_name and employee.user.last_name and employee.user.work_email and employee.date_of_birth and employee.address and employee.phone and employee.tfn),
+        'bank_details': bool(employee.bank_name and employee.account_name and employee.bsb and employee.account_number),
+        'emergency_contact': bool(employee.emergency_contact_first_name and employee.emergency_contact_number and employee.emergency_contact_relationship)
+    }
+    
+    # Check optional field groups
+    optional_checks = {
+        'location_details': bool(employee.suburb and employee.state_territory and employee.postcode),
+        'superannuation': bool(employee.fund_name or employee.abn or employee.member_number),
+        'extended_emergency_contact': bool(employee.emergency_contact_last_name and employee.emergency_contact_home)
+    }
+    
+    completed_required = sum(required_checks.values())
+    total_required = len(required_checks)
+    
+    completed_optional = sum(optional_checks.values())
+    total_optional = len(optional_checks)
+    
+    overall_completion = ((completed_required + completed_optional) / (total_required + total_optional)) * 100
+    is_profile_complete = completed_required == total_required
+    
+    return Response({
+        'profile_exists': True,
+        'is_completed': is_profile_complete,
+        'completion_percentage': round(overall_completion, 1),
+        'required_fields': {
+            'completed': completed_required,
+            'total': total_required,
+            'status': required_checks
+        },
+        'optional_fields': {
+            'completed': completed_optional,
+            'total': total_optional,
+            'status': optional_checks
+        },
+        'recommendations': [
+            'Complete basic information (date of birth, address, phone, TFN)' if not required_checks['basic_info'] else None,
+            'Add bank details for payroll setup' if not required_checks['bank_details'] else None,
+            'Add emergency contact information' if not required_checks['emergency_contact'] else None,
+            'Add location details (suburb, state, postcode)' if not optional_checks['location_details'] else None,
+            'Add superannuation details' if not optional_checks['superannuation'] else None,
+            'Complete emergency contact details' if not optional_checks['extended_emergency_contact'] else None
+        ]
+    })
+
 # ==========================================
 # GET ALL EMPLOYEES (ADMIN ONLY) - UPDATED FOR PROFILES
 # ==========================================
 
+# Fields an employee profile needs before it counts as completed
+PROFILE_REQUIRED_FIELDS = [
+    'date_of_birth', 'address', 'phone', 'tfn',
+    'bank_name', 'account_name', 'bsb', 'account_number',
+    'emergency_contact_first_name', 'emergency_contact_number', 'emergency_contact_relationship',
+]
+
+
+def _profile_completed_q(prefix='user__Employee_Profile__'):
+    """Q matching memberships whose employee profile has every required field"""
+    condition = Q(**{f'{prefix}id__isnull': False})
+    for name in PROFILE_REQUIRED_FIELDS:
+        condition &= Q(**{f'{prefix}{name}__isnull': False})
+        if Employee._meta.get_field(name).empty_strings_allowed:
+            condition &= ~Q(**{prefix + name: ''})
+    return condition
+
+
+roster_paginator = KeysetPaginator(ordering=('joined_at', 'id'))
+
+
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
 def admin_get_employees_with_profiles(request):
     """
     Get list of all employees with profile completion status - Admin only
     URL: /api/admin/employees/profiles/
+
+    Query params:
+        profile_completed  true / false
+        page_size          default 50, max 200
+        cursor             next_cursor of the previous page
+
+    One query for the page (profile joined, completeness computed in SQL
+    with Case/When) and one for every count.
     """
-    
-    # Check if current user is admin
+    completed_q = _profile_completed_q()
+    staff = CompanyMembership.objects.filter(
+        company_id=get_access_context(request).company_id,
+        role__in=STAFF_ROLES,
+    )
+
+    # every count in one aggregate query
+    totals = staff.aggregate(
+        total_count=Count('id'),
+        profiles_completed=Count('id', filter=completed_q),
+        admin=Count('id', filter=Q(role='ADMIN')),
+        manager=Count('id', filter=Q(role='MANAGER')),
+        support_worker=Count('id', filter=Q(role__in=['SUPPORT_WORKER', 'SUPPORT WORKER'])),
+        employee=Count('id', filter=Q(role='EMPLOYEE')),
+    )
+
+    roster = staff.annotate(
+        profile_exists=Case(
+            When(user__Employee_Profile__id__isnull=False, then=Value(True)),
+            default=Value(False), output_field=BooleanField(),
+        ),
+        profile_completed=Case(
+            When(completed_q, then=Value(True)),
+            default=Value(False), output_field=BooleanField(),
+        ),
+    ).values(
+        'id', 'joined_at', 'role', 'is_active', 'profile_exists', 'profile_completed',
+        'user_id', 'user__work_email', 'user__first_name', 'user__last_name',
+    )
+
+    profile_completed = request.query_params.get('profile_completed')
+    if profile_completed in ('true', 'false'):
+        roster = roster.filter(profile_completed=profile_completed == 'true')
+
     try:
-        admin_membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title='Casa Community Pty Ltd',
-            role='ADMIN'
-        )
-    except CompanyMembership.DoesNotExist:
+        page, next_cursor = roster_paginator.paginate(roster, request)
+    except InvalidCursor:
         return Response({
-            'error': 'Access denied. Admin privileges required.'
-        }, status=status.HTTP_403_FORBIDDEN)
-    
-    # Get all employee memberships
-    employee_memberships = CompanyMembership.objects.filter(
-        company__title='Casa Community Pty Ltd',
-        role__in=['EMPLOYEE', 'SUPPORT_WORKER', 'MANAGER', 'ADMIN']
-    ).select_related('user')
-    
-    employees = []
-    profiles_completed = 0
-    
-    for membership in employee_memberships:
-        # Check if employee has completed profile
-        try:
-            employee_profile = Employee.objects.get(user=membership.user)
-            profile_exists = True
-            
-            # Check if all required fields are completed
-            required_complete = all([
-                employee_profile.date_of_birth,
-                employee_profile.address,
-                employee_profile.phone,
-                employee_profile.tfn,
-                employee_profile.bank_name,
-                employee_profile.account_name,
-                employee_profile.bsb,
-                employee_profile.account_number,
-                employee_profile.emergency_contact_first_name,
-                employee_profile.emergency_contact_number,
-                employee_profile.emergency_contact_relationship
-            ])
-            
-            if required_complete:
-                profiles_completed += 1
-                
-        except Employee.DoesNotExist:
-            profile_exists = False
-            required_complete = False
-        
-        employees.append({
-            'id': membership.user.id,
-            'email': membership.user.work_email,
-            'first_name': membership.user.first_name,
-            'last_name': membership.user.last_name,
-            'role': membership.role,
-            'is_active': membership.is_active,
-            'joined_at': membership.joined_at.strftime('%Y-%m-%d'),
-            'profile_exists': profile_exists,
-            'profile_completed': required_complete,
-            'is_current_user': membership.user.id == request.user.id
-        })
-    
+            'error': 'Invalid cursor'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    employees = [
+        {
+            'id': row['user_id'],
+            'email': row['user__work_email'],
+            'first_name': row['user__first_name'],
+            'last_name': row['user__last_name'],
+            'role': row['role'],
+            'is_active': row['is_active'],
+            'joined_at': row['joined_at'].strftime('%Y-%m-%d'),
+            'profile_exists': row['profile_exists'],
+            'profile_completed': row['profile_completed'],
+            'is_current_user': row['user_id'] == request.user.id
+        }
+        for row in page
+    ]
+
+    total_count = totals['total_count']
+    profiles_completed = totals['profiles_completed']
     return Response({
         'employees': employees,
-        'total_count': len(employees),
+        'total_count': total_count,
         'profiles_completed': profiles_completed,
-        'profiles_pending': len(employees) - profiles_completed,
-        'completion_rate': round((profiles_completed / len(employees)) * 100, 1) if employees else 0,
+        'profiles_pending': total_count - profiles_completed,
+        'completion_rate': round((profiles_completed / total_count) * 100, 1) if total_count else 0,
         'role_summary': {
-            'ADMIN': len([e for e in employees if e['role'] == 'ADMIN']),
-            'MANAGER': len([e for e in employees if e['role'] == 'MANAGER']),
-            'SUPPORT_WORKER': len([e for e in employees if e['role'] == 'SUPPORT_WORKER']),
-            'EMPLOYEE': len([e for e in employees if e['role'] == 'EMPLOYEE'])
-        }
+            'ADMIN': totals['admin'],
+            'MANAGER': totals['manager'],
+            'SUPPORT_WORKER': totals['support_worker'],
+            'EMPLOYEE': totals['employee'],
+        },
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
     })
 
 
 @api_view(['POST'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsStaff])
 def add_note(request):
     """
     Add a note provided by employee regarding their everyday tasks
@@ -478,18 +471,6 @@ def add_note(request):
     }
     """
 
-    # Verify user is an employee/admin
-    try:
-        membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title=settings.DEFAULT_COMPANY['title'],
-            role__in=['ADMIN', 'EMPLOYEE', 'SUPPORT_WORKER', 'MANAGER']
-        )
-    except CompanyMembership.DoesNotExist:
-        return Response({
-            'error': 'Access denied. Employee account required.'
-        }, status=status.HTTP_403_FORBIDDEN)
-
     # Get and validate request data
     data = request.data
     notes = data.get('notes')
@@ -507,9 +488,8 @@ def add_note(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     # Get employee profile
-    try:
-        employee = Employee.objects.get(user=request.user)
-    except Employee.DoesNotExist:
+    employee = get_access_context(request).employee
+    if employee is None:
         return Response({
             'error': 'Employee profile not found',
             'message': 'Please complete your employee profile first',
@@ -543,29 +523,16 @@ def add_note(request):
 
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsStaff])
 def get_employee_notes(request):
     """
     Get employee's notes from their profile
     URL: /api/employee/notes/
     """
 
-    # Verify user is an employee/admin
-    try:
-        membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title=settings.DEFAULT_COMPANY['title'],
-            role__in=['ADMIN', 'EMPLOYEE', 'SUPPORT_WORKER', 'MANAGER']
-        )
-    except CompanyMembership.DoesNotExist:
-        return Response({
-            'error': 'Access denied. Employee account required.'
-        }, status=status.HTTP_403_FORBIDDEN)
-
     # Get employee profile
-    try:
-        employee = Employee.objects.get(user=request.user)
-    except Employee.DoesNotExist:
+    employee = get_access_context(request).employee
+    if employee is None:
         return Response({
             'error': 'Employee profile not found',
             'message': 'Please complete your employee profile first',
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MembershipConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.membership'
+
+    def ready(self):
+        # connect the access-context invalidation signals
+        from . import signals  # noqa: F401
@@ -3,3 +3,21 @@ ROLES = [
     ('SUPPORT WORKER', 'Support_worker'),
     ('ADMIN', 'Admin'),
 ]
+
+# Role groups used by the permission classes. The legacy spellings
+# ('SUPPORT WORKER' / 'SUPPORT_WORKER', 'EMPLOYEE', 'MANAGER') all exist in
+# stored rows, so every staff spelling is listed here.
+CLIENT_ROLE = 'CLIENT'
+ADMIN_ROLE = 'ADMIN'
+STAFF_ROLES = ['ADMIN', 'MANAGER', 'EMPLOYEE', 'SUPPORT_WORKER', 'SUPPORT WORKER']
+
+# Roles an admin can give staff (admin_add_employee / bulk provisioning).
+# 'SUPPORT_WORKER' is accepted as input and stored as 'SUPPORT WORKER', the
+# spelling employee_signin looks for.
+EMPLOYEE_ROLES = ['EMPLOYEE', 'SUPPORT WORKER', 'MANAGER', 'ADMIN']
+ROLE_ALIASES = {'SUPPORT_WORKER': 'SUPPORT WORKER'}
+
+
+def normalize_role(role):
+    role = (role or '').strip().upper()
+    return ROLE_ALIASES.get(role, role)
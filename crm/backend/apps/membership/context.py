@@ -0,0 +1,265 @@
+# ==========================================
+# REQUEST ACCESS CONTEXT
+# ==========================================
+"""
+Resolves "who is calling" for the Casa Community company: the caller's
+membership, role and linked profile (Participant or Employee).
+
+Everything is loaded with ONE select_related query and stored on the
+request so permission classes and the view share it. Across requests only
+the ids and the role are cached, in the shared cache keyed by user id;
+the profile rows themselves are always read per request. Signals (see
+signals.py) delete the entry whenever a membership or profile row is saved
+or deleted, which every worker sees. With a cache private to one process
+(LocMemCache) that delete would not reach the other workers, so nothing is
+cached across requests then.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+from apps.company.models import Company
+from apps.user.caching import cache_is_shared
+from . models import CompanyMembership
+from . constant import CLIENT_ROLE, ADMIN_ROLE, STAFF_ROLES
+
+# Marks a lazily loaded attribute that has not been fetched yet
+_NOT_LOADED = object()
+
+
+class AccessContext:
+    """
+    Membership + profile of one user inside the default company.
+
+    Built either from a loaded membership row (from_membership) or from
+    signed JWT claims (see apps/authentication/tokens.py). In the claims case
+    only ids are known; the membership and profile rows are fetched lazily
+    the first time a view touches them.
+    """
+
+    def __init__(self, user_id, role=None, company_id=None, membership_id=None,
+                 participant_id=None, employee_id=None):
+        self.user_id = user_id
+        self.role = role
+        self.company_id = company_id
+        self.membership_id = membership_id
+        self.participant_id = participant_id
+        self.employee_id = employee_id
+        self._membership = _NOT_LOADED
+        self._participant = _NOT_LOADED
+        self._employee = _NOT_LOADED
+
+    @classmethod
+    def from_membership(cls, user_id, membership, participant=None, employee=None):
+        if membership is None:
+            context = cls(user_id)
+        else:
+            context = cls(
+                user_id,
+                role=membership.role,
+                company_id=membership.company_id,
+                membership_id=membership.id,
+                participant_id=participant.id if participant else None,
+                employee_id=employee.id if employee else None,
+            )
+        context._membership = membership
+        context._participant = participant
+        context._employee = employee
+        return context
+
+    @property
+    def membership(self):
+        if self._membership is _NOT_LOADED:
+            self._membership = CompanyMembership.objects.select_related('company').filter(
+                id=self.membership_id
+            ).first() if self.membership_id else None
+        return self._membership
+
+    @property
+    def participant(self):
+        if self._participant is _NOT_LOADED:
+            from apps.participant.models import Participant
+            self._participant = Participant.objects.filter(
+                id=self.participant_id
+            ).first() if self.participant_id else None
+        return self._participant
+
+    @property
+    def employee(self):
+        if self._employee is _NOT_LOADED:
+            from apps.employee.models import Employee
+            self._employee = Employee.objects.filter(
+                id=self.employee_id
+            ).first() if self.employee_id else None
+        return self._employee
+
+    @property
+    def is_client(self):
+        return self.role == CLIENT_ROLE
+
+    @property
+    def is_admin(self):
+        return self.role == ADMIN_ROLE
+
+    @property
+    def is_staff(self):
+        return self.role in STAFF_ROLES
+
+    @property
+    def profile(self):
+        """The profile matching the role (Participant for clients, Employee for staff)"""
+        return self.participant if self.is_client else self.employee
+
+
+# ==========================================
+# CONTEXT CACHE
+# ==========================================
+
+ACCESS_CONTEXT_KEY = 'access_ctx:{}'
+# what is cached: ids and role, never model instances
+_CACHED_IDS = ('role', 'company_id', 'membership_id', 'participant_id', 'employee_id')
+_default_company_id = None
+
+
+def _cache_ttl():
+    return getattr(settings, 'ACCESS_CONTEXT_CACHE_TTL', 60)
+
+
+def get_default_company_id():
+    """
+    Resolve the id of settings.DEFAULT_COMPANY once per worker so lookups
+    filter on company_id instead of joining on company__title.
+    """
+    global _default_company_id
+    if _default_company_id is None:
+        _default_company_id = Company.objects.filter(
+            title=settings.DEFAULT_COMPANY['title']
+        ).values_list('id', flat=True).first()
+    return _default_company_id
+
+
+def invalidate_access_context(user_id):
+    """Drop the cached context of one user"""
+    cache.delete(ACCESS_CONTEXT_KEY.format(user_id))
+
+
+def invalidate_access_contexts(user_ids):
+    """invalidate_access_context() for many users in one cache round trip"""
+    cache.delete_many([ACCESS_CONTEXT_KEY.format(user_id) for user_id in user_ids])
+
+
+# ==========================================
+# CLAIMS VERSION
+# ==========================================
+
+# JWT access tokens carry a copy of the context (apps/authentication/tokens.py)
+# stamped with this version. Every membership/profile change writes a new
+# version to the shared cache, so a token whose 'ctx_v' claim no longer
+# matches is treated as stale and the database is consulted instead.
+# A bump in a process-local cache is invisible to the other workers, so
+# claims are only trusted when the cache is shared. The version lives as
+# long as an access token: a token outliving it is just checked against
+# the database.
+CLAIMS_VERSION_KEY = 'access_ctx_version:{}'
+
+
+def _claims_version_ttl():
+    return int(settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds())
+
+
+def get_claims_version(user_id, seed=False):
+    """Current claims version of user_id (None when unknown and seed=False, or the cache isn't shared)"""
+    if not cache_is_shared():
+        return None
+    key = CLAIMS_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None and seed:
+        # add() keeps whichever value a concurrent request stored first
+        cache.add(key, time.time_ns() // 1000, timeout=_claims_version_ttl())
+        version = cache.get(key)
+    return version
+
+
+def bump_claims_version(user_id):
+    cache.set(CLAIMS_VERSION_KEY.format(user_id), time.time_ns() // 1000, timeout=_claims_version_ttl())
+
+
+def bump_claims_versions(user_ids):
+    """bump_claims_version() for many users in one cache round trip"""
+    version = time.time_ns() // 1000
+    cache.set_many(
+        {CLAIMS_VERSION_KEY.format(user_id): version for user_id in user_ids},
+        timeout=_claims_version_ttl(),
+    )
+
+
+def _get_related(instance, name):
+    # Reverse one-to-one accessors raise instead of returning None
+    try:
+        return getattr(instance, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+def load_access_context(user_id, use_cache=True):
+    """
+    Build the AccessContext for user_id.
+
+    From the shared cache when possible (membership and profile rows then
+    load lazily, on first use); otherwise one query: membership -> company,
+    and membership -> user -> profile (both reverse one-to-ones are
+    followed by select_related).
+    """
+    use_cache = use_cache and cache_is_shared()
+    key = ACCESS_CONTEXT_KEY.format(user_id)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return AccessContext(user_id, **cached)
+
+    company_id = get_default_company_id()
+    membership = None
+    if company_id is not None:
+        membership = CompanyMembership.objects.select_related(
+            'company',
+            'user__Participant_Profile',
+            'user__Employee_Profile',
+        ).filter(user_id=user_id, company_id=company_id).first()
+
+    if membership is not None:
+        context = AccessContext.from_membership(
+            user_id,
+            membership,
+            participant=_get_related(membership.user, 'Participant_Profile'),
+            employee=_get_related(membership.user, 'Employee_Profile'),
+        )
+    else:
+        context = AccessContext.from_membership(user_id, None)
+
+    if use_cache:
+        # a read racing an invalidation can store an older copy: the TTL bounds it
+        cache.set(key, {name: getattr(context, name) for name in _CACHED_IDS}, timeout=_cache_ttl())
+
+    return context
+
+
+def get_access_context(request):
+    """
+    Return the AccessContext for request.user, loading it at most once per
+    request. Writes (POST/PUT/PATCH/DELETE) always read the database so a
+    view never mutates a row that another worker has since changed.
+    """
+    # Store on the underlying HttpRequest so DRF and plain Django code share it
+    http_request = getattr(request, '_request', request)
+    user = request.user
+    context = getattr(http_request, '_access_context', None)
+
+    if context is None or context.user_id != user.pk:
+        context = load_access_context(user.pk, use_cache=request.method in SAFE_METHODS)
+        http_request._access_context = context
+
+    return context
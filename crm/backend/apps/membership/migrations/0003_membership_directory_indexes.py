@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0001_initial'),
+        ('membership', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='companymembership',
+            index=models.Index(fields=['company', 'joined_at', 'id'], name='membership_directory_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companymembership',
+            index=models.Index(fields=['company', 'role', 'is_active'], name='membership_role_idx'),
+        ),
+    ]
@@ -23,6 +23,12 @@ class CompanyMembership(models.Model):
     class Meta:
         unique_together = ['user', 'company']
         db_table = 'company_membership'
+        indexes = [
+            # staff directory: keyset pages ordered by (joined_at, id)
+            models.Index(fields=['company', 'joined_at', 'id'], name='membership_directory_idx'),
+            # role_summary GROUP BY and role/status filters, index-only
+            models.Index(fields=['company', 'role', 'is_active'], name='membership_role_idx'),
+        ]
         verbose_name = 'Company Membership'
         verbose_name_plural = 'Company Memberships'
 
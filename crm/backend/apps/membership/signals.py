@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.participant.models import Participant
+from apps.employee.models import Employee
+from . models import CompanyMembership
+from . context import invalidate_access_context, bump_claims_version
+
+
+@receiver([post_save, post_delete], sender=CompanyMembership)
+@receiver([post_save, post_delete], sender=Participant)
+@receiver([post_save, post_delete], sender=Employee)
+def clear_cached_access_context(sender, instance, **kwargs):
+    """A membership or profile changed - cached contexts and token claims are stale"""
+    invalidate_access_context(instance.user_id)
+    bump_claims_version(instance.user_id)
@@ -1,3 +1,118 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from apps.authentication.tokens import claims_are_current, stamp_access_claims
+from apps.company.models import Company
+from apps.participant.models import Participant
+from apps.user.models import User_Model
+from . import context as access_context
+from . context import ACCESS_CONTEXT_KEY, load_access_context
+from . models import CompanyMembership
+
+
+class SharedLocMemCache(LocMemCache):
+    """LocMemCache under another name: counts as a shared cache (apps/user/caching.py)"""
+
+
+SHARED_CACHE = {'default': {'BACKEND': 'apps.membership.tests.SharedLocMemCache'}}
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def clear_test_caches():
+    # setUp runs outside a test's override_settings: clear the caches the tests use
+    for config in (SHARED_CACHE, LOCAL_CACHE):
+        with override_settings(CACHES=config):
+            cache.clear()
+
+
+def make_client(email='client@example.com', ndis_number='430000001', phone='+61412345678'):
+    company = Company.objects.get_or_create(
+        title='Casa Community Pty Ltd',
+        defaults={'category': 'HEALTHCARE', 'no_of_employees': '1-10', 'country': 'AU',
+                  'address': 'x', 'is_active': True},
+    )[0]
+    user = User_Model.objects.create(work_email=email, first_name='Jo', last_name='Citizen')
+    CompanyMembership.objects.create(user=user, company=company, role='CLIENT')
+    participant = Participant.objects.create(
+        user=user, phone=phone, ndis_number=ndis_number, address='1 Main St Adelaide',
+        ndis_plan_start='2024-01-01', ndis_plan_end='2026-12-31', ndis_plan_managed_details='Self',
+        emergency_contact_1='+61412345679', emergency_contact_2='+61412345670',
+    )
+    return user, participant
+
+
+class AccessContextCacheTests(TestCase):
+
+    def setUp(self):
+        access_context._default_company_id = None
+        clear_test_caches()
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_shared_cache_holds_ids_not_rows(self):
+        user, participant = make_client()
+        load_access_context(user.pk)
+
+        cached = cache.get(ACCESS_CONTEXT_KEY.format(user.pk))
+        self.assertEqual(cached['participant_id'], participant.id)
+        self.assertEqual(cached['role'], 'CLIENT')
+        self.assertTrue(all(value is None or isinstance(value, (int, str)) for value in cached.values()))
+
+        # served from the cache; the profile row is read when used
+        with self.assertNumQueries(0):
+            context = load_access_context(user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(context.participant.id, participant.id)
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_profile_save_invalidates_for_every_worker(self):
+        user, participant = make_client()
+        load_access_context(user.pk)
+        participant.address = '2 Other St'
+        participant.save()
+        self.assertIsNone(cache.get(ACCESS_CONTEXT_KEY.format(user.pk)))
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_local_cache_is_not_trusted(self):
+        user, _ = make_client()
+        load_access_context(user.pk)
+        with self.assertNumQueries(1):
+            load_access_context(user.pk)
+        self.assertIsNone(cache.get(ACCESS_CONTEXT_KEY.format(user.pk)))
+
+
+class ClaimsVersionTests(TestCase):
+
+    def setUp(self):
+        access_context._default_company_id = None
+        clear_test_caches()
+
+    def _claims(self, user):
+        token = {}
+        stamp_access_claims(token, load_access_context(user.pk, use_cache=False))
+        return token
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_role_change_makes_claims_stale(self):
+        user, _ = make_client()
+        token = self._claims(user)
+        self.assertTrue(claims_are_current(token, user.pk))
+
+        membership = CompanyMembership.objects.get(user=user)
+        membership.role = 'ADMIN'
+        membership.save()
+        self.assertFalse(claims_are_current(token, user.pk))
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_version_expires(self):
+        user, _ = make_client()
+        token = self._claims(user)
+        self.assertIsNotNone(cache.get(access_context.CLAIMS_VERSION_KEY.format(user.pk)))
+        cache.delete(access_context.CLAIMS_VERSION_KEY.format(user.pk))
+        # an expired version means the database is asked, never that claims are trusted
+        self.assertFalse(claims_are_current(token, user.pk))
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_claims_not_trusted_with_local_cache(self):
+        user, _ = make_client()
+        self.assertFalse(claims_are_current(self._claims(user), user.pk))
@@ -1,4 +1,26 @@
 from django.contrib import admin
-from . models import Participant
+from . models import Participant, ParticipantMedical, ParticipantCards, ParticipantSupportDetails, ParticipantExpiry
 # Register your models here.
-admin.site.register(Participant)
+
+
+class ParticipantMedicalInline(admin.StackedInline):
+    model = ParticipantMedical
+
+
+class ParticipantCardsInline(admin.StackedInline):
+    model = ParticipantCards
+
+
+class ParticipantSupportDetailsInline(admin.StackedInline):
+    model = ParticipantSupportDetails
+
+
+@admin.register(Participant)
+class ParticipantAdmin(admin.ModelAdmin):
+    inlines = [ParticipantMedicalInline, ParticipantCardsInline, ParticipantSupportDetailsInline]
+
+
+@admin.register(ParticipantExpiry)
+class ParticipantExpiryAdmin(admin.ModelAdmin):
+    list_display = ['participant', 'credential', 'expires_on', 'reminded_at']
+    list_filter = ['credential']
@@ -0,0 +1,110 @@
+# ==========================================
+# PROFILE COMPLETION STATE
+# ==========================================
+"""
+Which profile sections a participant has filled in, stored on the row as a
+bitmask (Participant.completion_mask, one bit per section) plus the
+percentage, so the status endpoint and admin reports read two integers
+instead of re-checking ~100 columns.
+
+Participant.save() recomputes both, and only when a section field is part
+of the save (all fields, or update_fields naming one).
+
+    mask & REQUIRED_MASK == REQUIRED_MASK   every required section done
+    mask & SECTION_BITS['ndis_plan_dates']  plan dates present
+
+Bits are positions in SECTIONS: append new sections at the end and run
+`python manage.py backfill_participant_completion` after changing a check.
+Checks only read attributes, so they also work on migration (historical)
+models.
+"""
+
+from . details import query_paths
+
+# (section, required, fields it reads, check)
+SECTIONS = [
+    # Required
+    ('basic_info', True, ('date_of_birth', 'address', 'phone'),
+     lambda p: bool(p.date_of_birth and p.address and p.phone)),
+    ('ndis_number', True, ('ndis_number',),
+     lambda p: bool(p.ndis_number)),
+    ('ndis_plan_dates', True, ('ndis_plan_start', 'ndis_plan_end'),
+     lambda p: bool(p.ndis_plan_start and p.ndis_plan_end)),
+    ('emergency_contacts', True, ('emergency_contact_1', 'emergency_contact_2'),
+     lambda p: bool(p.emergency_contact_1 and p.emergency_contact_2)),
+    ('ndis_plan_details', True, ('ndis_plan_managed_details',),
+     lambda p: bool(p.ndis_plan_managed_details)),
+
+    # Optional
+    ('personal_details', False, ('preferred_name', 'gender'),
+     lambda p: bool(p.preferred_name and p.gender)),
+    ('medical_info', False, ('medical_condition', 'medical_food_other_allergies'),
+     lambda p: bool(p.medical_condition or p.medical_food_other_allergies)),
+    ('dietary_requirements', False, ('dietary_requirements',),
+     lambda p: bool(p.dietary_requirements)),
+    ('daily_living_support', False,
+     ('mobility', 'communication', 'medication', 'eating', 'dressing', 'toileting'),
+     lambda p: any([p.mobility, p.communication, p.medication, p.eating, p.dressing, p.toileting])),
+    ('community_support', False,
+     ('community_access', 'transport_or_travel', 'friendships_or_relationships'),
+     lambda p: any([p.community_access, p.transport_or_travel, p.friendships_or_relationships])),
+    ('life_skills', False,
+     ('education_or_employment', 'handling_money_or_budgeting', 'learning_new_skills', 'chores'),
+     lambda p: any([p.education_or_employment, p.handling_money_or_budgeting,
+                    p.learning_new_skills, p.chores])),
+    ('about_me', False, ('likes', 'dislikes', 'hobbies_interests'),
+     lambda p: bool(p.likes or p.dislikes or p.hobbies_interests)),
+]
+
+SECTION_BITS = {name: 1 << i for i, (name, *_rest) in enumerate(SECTIONS)}
+REQUIRED_SECTIONS = [name for name, required, *_rest in SECTIONS if required]
+OPTIONAL_SECTIONS = [name for name, required, *_rest in SECTIONS if not required]
+REQUIRED_MASK = sum(SECTION_BITS[name] for name in REQUIRED_SECTIONS)
+
+# every column a check reads: a save touching none of them keeps the mask
+SECTION_FIELDS = frozenset(field for _, _, fields, _ in SECTIONS for field in fields)
+COMPLETION_FIELDS = ('completion_mask', 'completion_percentage')
+
+
+def compute_completion(participant):
+    """(mask, percentage rounded to 1 decimal) for participant's current values"""
+    mask = 0
+    for name, _, _, check in SECTIONS:
+        if check(participant):
+            mask |= SECTION_BITS[name]
+    return mask, percentage(mask)
+
+
+def percentage(mask):
+    done = bin(mask & ((1 << len(SECTIONS)) - 1)).count('1')
+    return round(done / len(SECTIONS) * 100, 1)
+
+
+def decode(mask):
+    """({required section: done}, {optional section: done})"""
+    return (
+        {name: bool(mask & SECTION_BITS[name]) for name in REQUIRED_SECTIONS},
+        {name: bool(mask & SECTION_BITS[name]) for name in OPTIONAL_SECTIONS},
+    )
+
+
+def backfill_completion(model, chunk_size=500):
+    """Recompute every row's mask and percentage; returns the number of rows changed"""
+    changed = []
+    updated = 0
+    # one query per chunk, side tables joined in (see details.py)
+    paths, relations = query_paths(model, (*COMPLETION_FIELDS, *SECTION_FIELDS))
+    rows = model.objects.select_related(*relations).only(*paths).order_by('id')
+    for participant in rows.iterator(chunk_size=chunk_size):
+        mask, percent = compute_completion(participant)
+        if (mask, percent) != (participant.completion_mask, participant.completion_percentage):
+            participant.completion_mask, participant.completion_percentage = mask, percent
+            changed.append(participant)
+        if len(changed) >= chunk_size:
+            model.objects.bulk_update(changed, COMPLETION_FIELDS)
+            updated += len(changed)
+            changed = []
+    if changed:
+        model.objects.bulk_update(changed, COMPLETION_FIELDS)
+        updated += len(changed)
+    return updated
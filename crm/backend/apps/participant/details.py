@@ -0,0 +1,87 @@
+# ==========================================
+# PARTICIPANT DETAIL TABLES (VERTICAL SPLIT)
+# ==========================================
+"""
+Participant is split into a narrow core row and one-to-one side tables
+keyed by the participant id:
+
+    participant_participant            identity, personal details, NDIS plan,
+                                       contacts, support flags, completion
+    participant_participantmedical     doctor, allergies, conditions, diet
+    participant_participantcards       pension / insurance / card numbers and expiries
+    participant_participantsupportdetails
+                                       about me + the details text of every support flag
+
+List queries and joins (ServiceAgreement.participant, the access context)
+only read the core row. The side rows load lazily on first access or in
+the same query with select_related().
+
+The moved columns stay attributes of Participant (property proxies, see
+models.py), so participant.medical_condition = ... and
+Participant(medicare_number=...) work as before. QuerySets must name them
+through the relation: use query_paths() for .only() / select_related().
+A side row only exists once one of its values was saved.
+"""
+
+MEDICAL_FIELDS = (
+    'name_of_doctor', 'medical_food_other_allergies', 'medical_condition', 'dietary_requirements',
+)
+
+CARD_FIELDS = (
+    'pension_type', 'pension_number', 'pension_expiry',
+    'private_insurance_type', 'private_insurance_number', 'private_insurance_expiry',
+    'medicare_number', 'medicare_expiry',
+    'healthcare_card_number', 'healthcare_card_expiry',
+    'companion_card_number', 'companion_card_expiry',
+)
+
+# the support flags themselves stay on the core row
+SUPPORT_FLAGS = (
+    'opg_guardian_consent_required', 'public_trustee_or_financial_administrator',
+    'behaviour_management', 'restrictive_practices', 'complex_health_support_plan',
+    'unsupported_time', 'mobility', 'aids_equipment', 'communication', 'eating',
+    'menstrual_management', 'toileting', 'getting_drinks', 'food_preparation',
+    'dressing', 'showering_or_bathing', 'medication', 'friendships_or_relationships',
+    'home_safety_and_security', 'community_access', 'personal_or_road_safety',
+    'transport_or_travel', 'chores', 'hobbies_or_activities', 'pet_care',
+    'handling_money_or_budgeting', 'education_or_employment', 'learning_new_skills',
+    'other_needs_and_support',
+)
+
+SUPPORT_DETAIL_FIELDS = (
+    'likes', 'dislikes', 'hobbies_interests', 'supports_required', 'level_assistance_required',
+) + tuple(f'{flag}_details' for flag in SUPPORT_FLAGS)
+
+# relation (reverse one-to-one accessor on Participant) -> its columns
+DETAIL_RELATIONS = {
+    'medical': MEDICAL_FIELDS,
+    'cards': CARD_FIELDS,
+    'support_details': SUPPORT_DETAIL_FIELDS,
+}
+
+# Participant attribute -> (relation, column)
+DETAIL_FIELDS = {
+    name: (relation, name) for relation, names in DETAIL_RELATIONS.items() for name in names
+}
+# the column used to be Mobility_details on Participant
+DETAIL_FIELDS['Mobility_details'] = ('support_details', 'mobility_details')
+
+
+def query_paths(model, names):
+    """
+    (only() paths, select_related() relations) that load the Participant
+    attributes `names` in one query. Works for the live model and for the
+    historical models of migrations written before the split (where every
+    column is still on the row).
+    """
+    concrete = {field.name for field in model._meta.concrete_fields}
+    paths, relations = ['id'], []
+    for name in names:
+        if name in concrete:
+            paths.append(name)
+        else:
+            relation, column = DETAIL_FIELDS[name]
+            paths.append(f'{relation}__{column}')
+            if relation not in relations:
+                relations.append(relation)
+    return paths, relations
@@ -0,0 +1,227 @@
+# ==========================================
+# CREDENTIAL EXPIRY INDEX
+# ==========================================
+"""
+Every expiry date of a participant - the NDIS plan end and the card
+expiries of ParticipantCards - mirrored into ParticipantExpiry, one narrow
+row per (participant, credential):
+
+    participant_id  credential   expires_on   reminded_at
+    42              ndis_plan    2026-12-31   NULL
+    42              medicare     2026-11-01   2026-10-02 08:00
+
+Participant.save() (ndis_plan_end) and ParticipantCards.save() keep the
+rows in step; a changed date clears reminded_at so the new date gets its
+own reminder. backfill_expiries() rebuilds the table.
+
+"What expires in the next N days and was not reminded yet" is one range
+scan of participant_expiry_due_idx, a partial index holding only the
+rows not reminded yet - the participant table is never scanned.
+`python manage.py send_expiry_reminders` (daily from cron) sends them,
+grouped per participant, in batches.
+"""
+
+import logging
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# credential -> (Participant attribute, label)
+CREDENTIALS = OrderedDict([
+    ('ndis_plan', ('ndis_plan_end', 'NDIS plan')),
+    ('pension', ('pension_expiry', 'Pension card')),
+    ('private_insurance', ('private_insurance_expiry', 'Private health insurance')),
+    ('medicare', ('medicare_expiry', 'Medicare card')),
+    ('healthcare_card', ('healthcare_card_expiry', 'Health care card')),
+    ('companion_card', ('companion_card_expiry', 'Companion card')),
+])
+NDIS_CREDENTIALS = ('ndis_plan',)
+CARD_CREDENTIALS = tuple(c for c in CREDENTIALS if c not in NDIS_CREDENTIALS)
+
+
+def _config():
+    return settings.EXPIRY_REMINDERS
+
+
+def expiry_dates(source, credentials):
+    """{credential: date or None} read from source (a Participant or its cards row)"""
+    return {credential: getattr(source, CREDENTIALS[credential][0]) for credential in credentials}
+
+
+def sync_expiries(expiry_model, participant_id, dates):
+    """
+    Make participant_id's rows for the credentials in dates match them:
+    new dates are inserted, changed ones updated (reminder reset), cleared
+    ones deleted. Unchanged rows are not written.
+    """
+    current = dict(
+        expiry_model.objects.filter(participant_id=participant_id, credential__in=list(dates))
+        .values_list('credential', 'expires_on')
+    )
+    new, cleared = [], []
+    for credential, expires_on in dates.items():
+        if expires_on is None:
+            if credential in current:
+                cleared.append(credential)
+        elif credential not in current:
+            new.append(expiry_model(participant_id=participant_id, credential=credential, expires_on=expires_on))
+        elif current[credential] != expires_on:
+            expiry_model.objects.filter(participant_id=participant_id, credential=credential).update(
+                expires_on=expires_on, reminded_at=None,
+            )
+    if new:
+        expiry_model.objects.bulk_create(new)
+    if cleared:
+        expiry_model.objects.filter(participant_id=participant_id, credential__in=cleared).delete()
+
+
+def backfill_expiries(participant_model, cards_model, expiry_model, batch_size=1000):
+    """
+    Rebuild the whole table from the participant and cards tables (no
+    join); returns the number of rows. Reminders already sent are lost,
+    so run it on an empty table or accept resends. Takes the models so
+    migrations can pass their historical ones.
+    """
+    expiry_model.objects.all().delete()
+    rows = []
+    written = 0
+
+    def flush():
+        nonlocal rows, written
+        expiry_model.objects.bulk_create(rows, batch_size=batch_size)
+        written += len(rows)
+        rows = []
+
+    sources = [
+        (participant_model.objects.exclude(ndis_plan_end=None), 'id', NDIS_CREDENTIALS),
+        (cards_model.objects.all(), 'participant_id', CARD_CREDENTIALS),
+    ]
+    for queryset, key, credentials in sources:
+        columns = [CREDENTIALS[credential][0] for credential in credentials]
+        for values in queryset.order_by().values_list(key, *columns).iterator(chunk_size=batch_size):
+            for credential, expires_on in zip(credentials, values[1:]):
+                if expires_on is not None:
+                    rows.append(expiry_model(participant_id=values[0], credential=credential, expires_on=expires_on))
+            if len(rows) >= batch_size:
+                flush()
+    flush()
+    return written
+
+
+# ------------------------------------------
+# Reminders
+# ------------------------------------------
+
+def due_expiries(expiry_model, days=None, today=None):
+    """Rows expiring from today to today + days that were not reminded yet"""
+    days = _config()['DAYS_AHEAD'] if days is None else days
+    today = today or timezone.localdate()
+    return expiry_model.objects.filter(
+        expires_on__range=(today, today + timedelta(days=days)), reminded_at=None,
+    )
+
+
+def _group(rows):
+    # participant_id -> [(row id, credential, expires_on)], soonest first
+    grouped = OrderedDict()
+    for row_id, participant_id, credential, expires_on in rows:
+        grouped.setdefault(participant_id, []).append((row_id, credential, expires_on))
+    return grouped
+
+
+def _reminder(participant, items):
+    lines = '\n'.join(
+        f"            • {CREDENTIALS[credential][1]}: expires {expires_on.strftime('%d/%m/%Y')}"
+        for _, credential, expires_on in items
+    )
+    message = f"""
+            Hi {participant['user__first_name']},
+
+            The following will expire soon. Please renew them and update your profile:
+
+{lines}
+
+            ---
+            Casa Community CRM System
+            """
+    return EmailMessage(
+        subject='⏰ Your documents are expiring soon',
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[participant['user__work_email']],
+    )
+
+
+def _staff_digest(summary, days):
+    lines = '\n'.join(
+        f"            • {name} (NDIS {ndis_number}): "
+        + ', '.join(f"{CREDENTIALS[c][1]} {d.strftime('%d/%m/%Y')}" for c, d in items)
+        for name, ndis_number, items in summary
+    )
+    return EmailMessage(
+        subject=f'⏰ {len(summary)} participants with credentials expiring in the next {days} days',
+        body=f"\n{lines}\n\n            ---\n            Casa Community CRM System\n",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=list(getattr(settings, 'NOTIFICATION_EMAILS', [])),
+    )
+
+
+def send_expiry_reminders(participant_model, expiry_model, days=None, batch_size=None,
+                          today=None, dry_run=False):
+    """
+    One reminder per participant listing everything of theirs expiring in
+    the next `days`, sent batch_size participants at a time over one mail
+    connection; the batch's rows are marked reminded once it went out.
+    Staff get one digest of the whole run. Returns (participants, credentials).
+    days and batch_size default to EXPIRY_REMINDERS.
+    """
+    config = _config()
+    days = config['DAYS_AHEAD'] if days is None else days
+    batch_size = batch_size or config['BATCH_SIZE']
+    due = due_expiries(expiry_model, days, today).order_by('expires_on', 'id').values_list(
+        'id', 'participant_id', 'credential', 'expires_on',
+    )
+    grouped = _group(due)
+    if dry_run:
+        return len(grouped), sum(len(items) for items in grouped.values())
+
+    participant_ids = list(grouped)
+    summary, reminded = [], 0
+    connection = get_connection()
+    connection.open()
+    try:
+        for start in range(0, len(participant_ids), batch_size):
+            batch = participant_ids[start:start + batch_size]
+            participants = participant_model.objects.filter(id__in=batch).values(
+                'id', 'ndis_number', 'user__first_name', 'user__last_name', 'user__work_email',
+            )
+            messages, row_ids, batch_summary = [], [], []
+            for participant in participants:
+                items = grouped[participant['id']]
+                messages.append(_reminder(participant, items))
+                row_ids += [row_id for row_id, _, _ in items]
+                batch_summary.append((
+                    f"{participant['user__first_name']} {participant['user__last_name']}",
+                    participant['ndis_number'],
+                    [(credential, expires_on) for _, credential, expires_on in items],
+                ))
+            try:
+                connection.send_messages(messages)
+            except Exception:
+                # leave the batch unmarked: the next run retries it
+                logger.exception('Expiry reminders failed for %d participants', len(messages))
+                continue
+            expiry_model.objects.filter(id__in=row_ids).update(reminded_at=timezone.now())
+            summary += batch_summary
+            reminded += len(row_ids)
+
+        if summary and getattr(settings, 'NOTIFICATION_EMAILS', None):
+            connection.send_messages([_staff_digest(summary, days)])
+    finally:
+        connection.close()
+    return len(summary), reminded
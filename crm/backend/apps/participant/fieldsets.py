@@ -0,0 +1,214 @@
+# ==========================================
+# PROFILE FIELDSETS (SPARSE RESPONSES)
+# ==========================================
+"""
+The profile response keys, grouped into the sections of the profile form
+(one per frontend step), with the columns each key reads and how it is
+formatted.
+
+    GET /api/client/profile/get?sections=basic,ndis
+    GET /api/client/profile/get?fields=ndis_number,ndis_plan_end
+    GET /api/client/profile/get?sections=medical&fields=photo
+
+Only the requested keys are serialized and only their columns are loaded
+(.only(), joining just the side tables they live in), so a step reads a
+few columns instead of the whole profile.
+Without either parameter the full profile is returned, as before.
+"""
+
+from collections import OrderedDict
+
+from . details import query_paths
+from . models import Participant
+
+
+def _date(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def _datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _float(value):
+    return float(value) if value else None
+
+
+def _str(value):
+    return str(value) if value else None
+
+
+def _file_url(value):
+    return value.url if value else None
+
+
+def _plain(value):
+    return value
+
+
+def _column(name, format=_plain):
+    return ((name,), lambda participant, user: format(getattr(participant, name)))
+
+
+def _user(attribute):
+    # comes from request.user, no participant column
+    return ((), lambda participant, user: getattr(user, attribute))
+
+
+def _needs(*names):
+    """Support flag + its details text (Mobility_details keeps its capital M)"""
+    keys = []
+    for name in names:
+        details = 'Mobility_details' if name == 'mobility' else f'{name}_details'
+        keys.append((name, _column(name)))
+        keys.append((f'{name}_details', _column(details)))
+    return keys
+
+
+# section -> [(response key, (columns read, getter(participant, user)))]
+PROFILE_SECTIONS = OrderedDict([
+    ('meta', [
+        ('uuid', _column('uuid', str)),
+        ('is_profile_completed', _column('is_profile_completed')),
+    ]),
+    ('basic', [
+        ('first_name', _user('first_name')),
+        ('last_name', _user('last_name')),
+        ('email', _user('work_email')),
+        ('preferred_name', _column('preferred_name')),
+        ('date_of_birth', _column('date_of_birth', _date)),
+        ('address', _column('address')),
+        ('phone', _column('phone', _str)),
+        ('photo', _column('photo', _file_url)),
+    ]),
+    ('personal', [
+        ('gender', _column('gender')),
+        ('height', _column('height', _float)),
+        ('weight', _column('weight', _float)),
+        ('hair_colour', _column('hair_colour')),
+        ('eye_colour', _column('eye_colour')),
+        ('spoken_language', _column('spoken_language')),
+        ('distinguishing_features', _column('distinguishing_features')),
+        ('clothing_size', _column('clothing_size', _float)),
+        ('shoe_size', _column('shoe_size', _float)),
+        ('religion_or_culture', _column('religion_or_culture')),
+    ]),
+    ('ndis', [
+        ('ndis_number', _column('ndis_number')),
+        ('ndis_plan_start', _column('ndis_plan_start', _date)),
+        ('ndis_plan_end', _column('ndis_plan_end', _date)),
+        ('ndis_plan_managed_details', _column('ndis_plan_managed_details')),
+    ]),
+    ('cards', [
+        ('pension_type', _column('pension_type')),
+        ('pension_number', _column('pension_number')),
+        ('pension_expiry', _column('pension_expiry', _date)),
+        ('private_insurance_type', _column('private_insurance_type')),
+        ('private_insurance_number', _column('private_insurance_number')),
+        ('private_insurance_expiry', _column('private_insurance_expiry', _date)),
+        ('medicare_number', _column('medicare_number')),
+        ('medicare_expiry', _column('medicare_expiry', _date)),
+        ('healthcare_card_number', _column('healthcare_card_number')),
+        ('healthcare_card_expiry', _column('healthcare_card_expiry', _date)),
+        ('companion_card_number', _column('companion_card_number')),
+        ('companion_card_expiry', _column('companion_card_expiry', _date)),
+    ]),
+    ('emergency', [
+        ('emergency_contact_1', _column('emergency_contact_1', _str)),
+        ('emergency_contact_2', _column('emergency_contact_2', _str)),
+    ]),
+    ('medical', [
+        ('name_of_doctor', _column('name_of_doctor')),
+        ('medical_food_other_allergies', _column('medical_food_other_allergies')),
+        ('medical_condition', _column('medical_condition')),
+        ('dietary_requirements', _column('dietary_requirements')),
+    ]),
+    ('about', [
+        ('likes', _column('likes')),
+        ('dislikes', _column('dislikes')),
+        ('hobbies_interests', _column('hobbies_interests')),
+        ('supports_required', _column('supports_required')),
+        ('level_assistance_required', _column('level_assistance_required')),
+    ]),
+    ('support', _needs(
+        # Specific needs
+        'opg_guardian_consent_required', 'public_trustee_or_financial_administrator',
+        'behaviour_management', 'restrictive_practices', 'complex_health_support_plan',
+        'unsupported_time',
+        # Daily living
+        'mobility', 'aids_equipment', 'communication', 'eating', 'menstrual_management',
+        'toileting', 'getting_drinks', 'food_preparation', 'dressing',
+        'showering_or_bathing', 'medication',
+        # Social and community
+        'friendships_or_relationships', 'home_safety_and_security', 'community_access',
+        'personal_or_road_safety', 'transport_or_travel',
+        # Life skills
+        'chores', 'hobbies_or_activities', 'pet_care', 'handling_money_or_budgeting',
+        'education_or_employment', 'learning_new_skills', 'other_needs_and_support',
+    )),
+    ('timestamps', [
+        ('created_at', _column('created_at', _datetime)),
+        ('updated_at', _column('updated_at', _datetime)),
+    ]),
+])
+
+PROFILE_FIELDS = OrderedDict(
+    (key, spec) for keys in PROFILE_SECTIONS.values() for key, spec in keys
+)
+SECTION_KEYS = {
+    section: [key for key, _ in keys] for section, keys in PROFILE_SECTIONS.items()
+}
+
+
+class InvalidFieldset(ValueError):
+    """?fields= or ?sections= named something unknown"""
+
+
+def _split(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def requested_keys(query_params):
+    """
+    Response keys asked for by ?fields= / ?sections= in profile order, or
+    None when neither is given (the full profile). Raises InvalidFieldset.
+    """
+    fields, sections = _split(query_params.get('fields')), _split(query_params.get('sections'))
+    # id is always returned
+    fields = [f for f in fields if f != 'id']
+    if not fields and not sections:
+        return None if not query_params.get('fields') else []
+
+    unknown_sections = [s for s in sections if s not in PROFILE_SECTIONS]
+    if unknown_sections:
+        raise InvalidFieldset(
+            f"Unknown sections: {', '.join(unknown_sections)}. "
+            f"Available: {', '.join(PROFILE_SECTIONS)}"
+        )
+    unknown_fields = [f for f in fields if f not in PROFILE_FIELDS]
+    if unknown_fields:
+        raise InvalidFieldset(f"Unknown fields: {', '.join(unknown_fields)}")
+
+    wanted = set(fields)
+    for section in sections:
+        wanted.update(SECTION_KEYS[section])
+    return [key for key in PROFILE_FIELDS if key in wanted]
+
+
+def profile_queryset(keys=None):
+    """
+    Participants with just the columns keys need (default: every key), side
+    tables joined in the same query
+    """
+    columns = {column for key in (keys if keys is not None else PROFILE_FIELDS)
+               for column in PROFILE_FIELDS[key][0]}
+    paths, relations = query_paths(Participant, sorted(columns))
+    return Participant.objects.select_related(*relations).only(*paths)
+
+
+def serialize_profile(participant, user, keys=None):
+    """{'id': ..., key: value} for keys (default: every profile key)"""
+    data = {'id': participant.id}
+    for key in keys if keys is not None else PROFILE_FIELDS:
+        data[key] = PROFILE_FIELDS[key][1](participant, user)
+    return data
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.participant.completion import backfill_completion
+from apps.participant.models import Participant
+
+
+class Command(BaseCommand):
+    """
+    Recompute Participant.completion_mask / completion_percentage for every
+    row, e.g. after a section check in completion.py changed.
+
+    Usage:
+        python manage.py backfill_participant_completion --chunk-size 500
+    """
+    help = 'Recompute the stored profile completion state of every participant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        updated = backfill_completion(Participant, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} participants"))
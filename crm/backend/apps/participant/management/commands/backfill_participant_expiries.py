@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.participant.expiries import backfill_expiries
+from apps.participant.models import Participant, ParticipantCards, ParticipantExpiry
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the ParticipantExpiry index from the participant and cards
+    tables, e.g. after expiry dates were changed with queryset.update().
+    Sent-reminder marks are reset.
+
+    Usage:
+        python manage.py backfill_participant_expiries --batch-size 1000
+    """
+    help = 'Rebuild the participant credential expiry index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = backfill_expiries(Participant, ParticipantCards, ParticipantExpiry,
+                                    batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} expiry dates"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from apps.participant.expiries import send_expiry_reminders
+from apps.participant.models import Participant, ParticipantExpiry
+
+
+class Command(BaseCommand):
+    """
+    Remind participants (and staff, in one digest) of the NDIS plans and
+    cards expiring soon. Each expiry date is reminded about once.
+
+    Usage (daily from cron):
+        python manage.py send_expiry_reminders --days 30 --batch-size 200
+    """
+    help = 'Send grouped reminders for participant credentials expiring in the next N days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Days ahead to look (default EXPIRY_REMINDERS['DAYS_AHEAD'])")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Participants per batch of emails (default EXPIRY_REMINDERS['BATCH_SIZE'])")
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count what would be sent')
+
+    def handle(self, *args, **options):
+        participants, credentials = send_expiry_reminders(
+            Participant, ParticipantExpiry, days=options['days'],
+            batch_size=options['batch_size'], dry_run=options['dry_run'],
+        )
+        verb = 'Would remind' if options['dry_run'] else 'Reminded'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {participants} participants of {credentials} expiring credentials"
+        ))
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+# The sections as of this migration (bit = position; frozen copy of
+# completion.SECTIONS): a section is done when all / any of its fields are set
+SECTIONS = [
+    ('basic_info', all, ('date_of_birth', 'address', 'phone')),
+    ('ndis_number', all, ('ndis_number',)),
+    ('ndis_plan_dates', all, ('ndis_plan_start', 'ndis_plan_end')),
+    ('emergency_contacts', all, ('emergency_contact_1', 'emergency_contact_2')),
+    ('ndis_plan_details', all, ('ndis_plan_managed_details',)),
+    ('personal_details', all, ('preferred_name', 'gender')),
+    ('medical_info', any, ('medical_condition', 'medical_food_other_allergies')),
+    ('dietary_requirements', all, ('dietary_requirements',)),
+    ('daily_living_support', any, ('mobility', 'communication', 'medication', 'eating', 'dressing', 'toileting')),
+    ('community_support', any, ('community_access', 'transport_or_travel', 'friendships_or_relationships')),
+    ('life_skills', any, ('education_or_employment', 'handling_money_or_budgeting', 'learning_new_skills', 'chores')),
+    ('about_me', any, ('likes', 'dislikes', 'hobbies_interests')),
+]
+CHUNK_SIZE = 500
+
+
+def fill_completion_state(apps, schema_editor):
+    Participant = apps.get_model('participant', 'Participant')
+    fields = {field for _, _, names in SECTIONS for field in names}
+    changed = []
+    for participant in Participant.objects.only('id', *fields).order_by('id').iterator(chunk_size=CHUNK_SIZE):
+        mask = 0
+        for bit, (_, test, names) in enumerate(SECTIONS):
+            if test(getattr(participant, name) for name in names):
+                mask |= 1 << bit
+        participant.completion_mask = mask
+        participant.completion_percentage = round(bin(mask).count('1') / len(SECTIONS) * 100, 1)
+        changed.append(participant)
+        if len(changed) >= CHUNK_SIZE:
+            Participant.objects.bulk_update(changed, ['completion_mask', 'completion_percentage'])
+            changed = []
+    Participant.objects.bulk_update(changed, ['completion_mask', 'completion_percentage'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participant', '0005_participant_guardian_email'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='completion_mask',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Completed Sections'),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='completion_percentage',
+            field=models.FloatField(default=0, editable=False, verbose_name='Completion Percentage'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['completion_mask'], name='participant_completion_idx'),
+        ),
+        migrations.RunPython(fill_completion_state, migrations.RunPython.noop),
+    ]
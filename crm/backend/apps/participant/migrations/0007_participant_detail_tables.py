@@ -0,0 +1,337 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+SIDE_MODELS = ('ParticipantMedical', 'ParticipantCards', 'ParticipantSupportDetails')
+# Participant column of each side column where the name changed
+OLD_NAMES = {'mobility_details': 'Mobility_details'}
+
+
+def _columns(model):
+    columns = [field.name for field in model._meta.concrete_fields if field.name != 'participant']
+    return columns, [OLD_NAMES.get(column, column) for column in columns]
+
+
+def split_participants(apps, schema_editor):
+    """Copy the moved columns into side rows (only for participants with a value)"""
+    Participant = apps.get_model('participant', 'Participant')
+    for model_name in SIDE_MODELS:
+        model = apps.get_model('participant', model_name)
+        columns, sources = _columns(model)
+        rows = []
+        values = Participant.objects.order_by('id').values_list('id', *sources)
+        for participant_id, *row in values.iterator(chunk_size=BATCH_SIZE):
+            if any(value not in (None, '') for value in row):
+                rows.append(model(participant_id=participant_id, **dict(zip(columns, row))))
+            if len(rows) >= BATCH_SIZE:
+                model.objects.bulk_create(rows)
+                rows = []
+        if rows:
+            model.objects.bulk_create(rows)
+
+
+def join_participants(apps, schema_editor):
+    """Reverse: copy the side rows back onto Participant"""
+    Participant = apps.get_model('participant', 'Participant')
+    for model_name in SIDE_MODELS:
+        model = apps.get_model('participant', model_name)
+        columns, sources = _columns(model)
+        rows = []
+        values = model.objects.order_by('pk').values_list('participant_id', *columns)
+        for participant_id, *row in values.iterator(chunk_size=BATCH_SIZE):
+            rows.append(Participant(id=participant_id, **dict(zip(sources, row))))
+            if len(rows) >= BATCH_SIZE:
+                Participant.objects.bulk_update(rows, sources)
+                rows = []
+        if rows:
+            Participant.objects.bulk_update(rows, sources)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participant', '0006_participant_completion_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipantCards',
+            fields=[
+                ('participant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cards', serialize=False, to='participant.participant')),
+                ('pension_type', models.CharField(blank=True, max_length=50, null=True, verbose_name='Pension Type')),
+                ('pension_number', models.CharField(blank=True, max_length=50, null=True, verbose_name='Pension Number')),
+                ('pension_expiry', models.DateField(blank=True, null=True, verbose_name='Pension Expiry')),
+                ('private_insurance_type', models.CharField(blank=True, max_length=50, null=True, verbose_name='Private Insurance Type')),
+                ('private_insurance_number', models.CharField(blank=True, max_length=50, null=True, verbose_name='Private Insurance Number')),
+                ('private_insurance_expiry', models.DateField(blank=True, null=True, verbose_name='Private Insurance Expiry')),
+                ('medicare_number', models.CharField(blank=True, max_length=50, null=True, verbose_name='Medicare Number')),
+                ('medicare_expiry', models.DateField(blank=True, null=True, verbose_name='Medicare Expiry')),
+                ('healthcare_card_number', models.CharField(blank=True, max_length=50, null=True, verbose_name='Healthcare Card Number')),
+                ('healthcare_card_expiry', models.DateField(blank=True, null=True, verbose_name='Healthcare Card Expiry')),
+                ('companion_card_number', models.CharField(blank=True, max_length=50, null=True, verbose_name='Companion Card Number')),
+                ('companion_card_expiry', models.DateField(blank=True, null=True, verbose_name='Companion Card Expiry')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipantMedical',
+            fields=[
+                ('participant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='medical', serialize=False, to='participant.participant')),
+                ('name_of_doctor', models.CharField(blank=True, max_length=50, null=True, verbose_name='Doctor Name')),
+                ('medical_food_other_allergies', models.TextField(blank=True, max_length=500, null=True, verbose_name='Medical, Food or Other Allergies')),
+                ('medical_condition', models.TextField(blank=True, max_length=500, null=True, verbose_name='Medical Condition')),
+                ('dietary_requirements', models.TextField(blank=True, max_length=500, null=True, verbose_name='Dietary Requirements')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipantSupportDetails',
+            fields=[
+                ('participant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='support_details', serialize=False, to='participant.participant')),
+                ('likes', models.TextField(blank=True, max_length=300, null=True, verbose_name='Likes')),
+                ('dislikes', models.TextField(blank=True, max_length=300, null=True, verbose_name='Dislikes')),
+                ('hobbies_interests', models.TextField(blank=True, max_length=300, null=True, verbose_name='Hobbies/Interests')),
+                ('supports_required', models.TextField(blank=True, max_length=300, null=True, verbose_name='Supports Required')),
+                ('level_assistance_required', models.TextField(blank=True, max_length=300, null=True, verbose_name='Leve of Assistance Required')),
+                ('opg_guardian_consent_required_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='OPG/Guardian Consent Required Details')),
+                ('public_trustee_or_financial_administrator_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Public Trustee/Financial Administrator Details')),
+                ('behaviour_management_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Behaviour Management Details')),
+                ('restrictive_practices_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Restrictive Practices Details')),
+                ('complex_health_support_plan_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Complex Health Support Plan Details')),
+                ('unsupported_time_details', models.TextField(blank=True, max_length=300, null=True, verbose_name='Unsupported Time Details')),
+                ('mobility_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Mobility Details')),
+                ('aids_equipment_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Aids & Equipment Details')),
+                ('communication_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Communication Details')),
+                ('eating_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Eating Details')),
+                ('menstrual_management_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Menstrual Management Details')),
+                ('toileting_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Toileting Details')),
+                ('getting_drinks_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Getting Drinks Details')),
+                ('food_preparation_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Food Preparation Details')),
+                ('dressing_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Dressing Details')),
+                ('showering_or_bathing_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Showering/Bathing Details')),
+                ('medication_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Medication Details')),
+                ('friendships_or_relationships_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Friendships/Relationships Details')),
+                ('home_safety_and_security_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Home Safety & Security Details')),
+                ('community_access_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Community Access Details')),
+                ('personal_or_road_safety_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Personal/Road Safety Details')),
+                ('transport_or_travel_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Transport/Travel Details')),
+                ('chores_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Chores Details')),
+                ('hobbies_or_activities_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Hobbies/Activities Details')),
+                ('pet_care_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Pet Care Details')),
+                ('handling_money_or_budgeting_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Handling Money/Budgeting Details')),
+                ('education_or_employment_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Education/Employment Details')),
+                ('learning_new_skills_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Learning New Skills Details')),
+                ('other_needs_and_support_details', models.TextField(blank=True, max_length=500, null=True, verbose_name='Other Needs and Support Details')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(split_participants, join_participants),
+        migrations.RemoveField(
+            model_name='participant',
+            name='Mobility_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='aids_equipment_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='behaviour_management_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='chores_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='communication_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='community_access_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='companion_card_expiry',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='companion_card_number',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='complex_health_support_plan_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='dietary_requirements',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='dislikes',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='dressing_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='eating_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='education_or_employment_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='food_preparation_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='friendships_or_relationships_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='getting_drinks_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='handling_money_or_budgeting_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='healthcare_card_expiry',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='healthcare_card_number',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='hobbies_interests',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='hobbies_or_activities_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='home_safety_and_security_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='learning_new_skills_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='level_assistance_required',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='likes',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='medical_condition',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='medical_food_other_allergies',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='medicare_expiry',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='medicare_number',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='medication_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='menstrual_management_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='name_of_doctor',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='opg_guardian_consent_required_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='other_needs_and_support_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='pension_expiry',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='pension_number',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='pension_type',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='personal_or_road_safety_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='pet_care_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='private_insurance_expiry',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='private_insurance_number',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='private_insurance_type',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='public_trustee_or_financial_administrator_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='restrictive_practices_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='showering_or_bathing_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='supports_required',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='toileting_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='transport_or_travel_details',
+        ),
+        migrations.RemoveField(
+            model_name='participant',
+            name='unsupported_time_details',
+        ),
+    ]
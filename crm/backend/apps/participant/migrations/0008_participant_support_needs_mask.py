@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+# The flags as of this migration (bit = position; frozen copy of details.SUPPORT_FLAGS)
+SUPPORT_FLAGS = (
+    'opg_guardian_consent_required', 'public_trustee_or_financial_administrator',
+    'behaviour_management', 'restrictive_practices', 'complex_health_support_plan',
+    'unsupported_time', 'mobility', 'aids_equipment', 'communication', 'eating',
+    'menstrual_management', 'toileting', 'getting_drinks', 'food_preparation',
+    'dressing', 'showering_or_bathing', 'medication', 'friendships_or_relationships',
+    'home_safety_and_security', 'community_access', 'personal_or_road_safety',
+    'transport_or_travel', 'chores', 'hobbies_or_activities', 'pet_care',
+    'handling_money_or_budgeting', 'education_or_employment', 'learning_new_skills',
+    'other_needs_and_support',
+)
+
+
+def fill_support_needs(apps, schema_editor):
+    # one UPDATE: the mask computed from the flag columns
+    mask = Value(0)
+    for bit, flag in enumerate(SUPPORT_FLAGS):
+        mask += Case(When(**{flag: True}, then=Value(1 << bit)), default=Value(0))
+    apps.get_model('participant', 'Participant').objects.update(support_needs_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participant', '0007_participant_detail_tables'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='support_needs_mask',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Support Needs'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['support_needs_mask', 'id'], name='participant_needs_idx'),
+        ),
+        migrations.RunPython(fill_support_needs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# credential -> column, as of this migration (frozen copy of expiries.CREDENTIALS)
+PLAN_COLUMNS = {'ndis_plan': 'ndis_plan_end'}
+CARD_COLUMNS = {
+    'pension': 'pension_expiry',
+    'private_insurance': 'private_insurance_expiry',
+    'medicare': 'medicare_expiry',
+    'healthcare_card': 'healthcare_card_expiry',
+    'companion_card': 'companion_card_expiry',
+}
+BATCH_SIZE = 1000
+
+
+def fill_expiries(apps, schema_editor):
+    ParticipantExpiry = apps.get_model('participant', 'ParticipantExpiry')
+    sources = [
+        (apps.get_model('participant', 'Participant').objects.exclude(ndis_plan_end=None), 'id', PLAN_COLUMNS),
+        (apps.get_model('participant', 'ParticipantCards').objects.all(), 'participant_id', CARD_COLUMNS),
+    ]
+    rows = []
+    for queryset, key, columns in sources:
+        for values in queryset.order_by().values_list(key, *columns.values()).iterator(chunk_size=BATCH_SIZE):
+            for credential, expires_on in zip(columns, values[1:]):
+                if expires_on is not None:
+                    rows.append(ParticipantExpiry(participant_id=values[0], credential=credential,
+                                                  expires_on=expires_on))
+            if len(rows) >= BATCH_SIZE:
+                ParticipantExpiry.objects.bulk_create(rows)
+                rows = []
+    ParticipantExpiry.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participant', '0008_participant_support_needs_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipantExpiry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('credential', models.CharField(choices=[('ndis_plan', 'NDIS plan'), ('pension', 'Pension card'), ('private_insurance', 'Private health insurance'), ('medicare', 'Medicare card'), ('healthcare_card', 'Health care card'), ('companion_card', 'Companion card')], max_length=30)),
+                ('expires_on', models.DateField()),
+                ('reminded_at', models.DateTimeField(blank=True, null=True)),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expiries', to='participant.participant')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('reminded_at__isnull', True)), fields=['expires_on'], name='participant_expiry_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('participant', 'credential'), name='participant_expiry_unique')],
+            },
+        ),
+        # the rows go with the table on rollback
+        migrations.RunPython(fill_expiries, migrations.RunPython.noop),
+    ]
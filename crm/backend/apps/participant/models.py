@@ -1,13 +1,41 @@
-from django.db import models
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, transaction
 from django.utils.text import slugify
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 import uuid 
 from . import constant
+from . completion import compute_completion, SECTION_FIELDS, COMPLETION_FIELDS
+from . details import DETAIL_FIELDS, SUPPORT_FLAGS
+from . expiries import CREDENTIALS, CARD_CREDENTIALS, NDIS_CREDENTIALS, expiry_dates, sync_expiries
+from . support_needs import MASK_FIELD, MAX_IN_MASKS, mask_for, matching_masks, needs_mask
 from phonenumber_field.modelfields import PhoneNumberField  # type: ignore
 
 User = get_user_model()
 
+NEED_FLAGS = frozenset(SUPPORT_FLAGS)
+
+
+class ParticipantQuerySet(models.QuerySet):
+
+    def with_needs(self, needs, match_all=True):
+        """
+        Participants needing all (or, match_all=False, any) of needs, via the
+        support needs bitmask (see support_needs.py). Raises ValueError for
+        unknown needs.
+        """
+        wanted = mask_for(needs)
+        if not wanted:
+            return self
+        # the combinations in use, from the index alone
+        present = Participant.objects.order_by().values_list(MASK_FIELD, flat=True).distinct()
+        masks = matching_masks(present, wanted, match_all)
+        if len(masks) > MAX_IN_MASKS:
+            # too many combinations for an IN list: bitwise predicate instead
+            matched = self.alias(wanted_bits=models.F(MASK_FIELD).bitand(wanted))
+            return matched.filter(wanted_bits=wanted) if match_all else matched.exclude(wanted_bits=0)
+        return self.filter(**{f'{MASK_FIELD}__in': masks})
+
 
 class Participant(models.Model):
     id = models.AutoField(primary_key=True)
@@ -46,52 +74,258 @@ class Participant(models.Model):
     ndis_plan_managed_details = models.TextField(
         'NDIS Plan Managed Details', max_length=300, blank=False, null=False)
 
-    # Cards & Insurance
+    # Cards & insurance, medical requirements, about me and the support
+    # details live in one-to-one side tables (see details.py)
+
+    # Emergency Contacts
+    emergency_contact_1 = PhoneNumberField(
+        'Emergency Contact 1', blank=False, null=False)
+    emergency_contact_2 = PhoneNumberField(
+        'Emergency Contact 2', blank=False, null=False)
+    guardian_name = models.CharField('Guardian Name', blank=False, null=False, max_length=30, default='John Doe')
+    guardian_address = models.TextField('Guardian Address', blank=False, null=False, max_length=100, default='Australia')
+    guardian_contact = PhoneNumberField('Guardian Contact', blank=False, null=False, default='458493')
+    guardian_email = models.EmailField('Guardian Email', blank=False, null=False, default='john_doe@gmail.com')
+
+    # Specific Needs and Support (flags; their details are in ParticipantSupportDetails)
+    opg_guardian_consent_required = models.BooleanField(
+        'OPG/Guardian Consent Required', default=False)
+    public_trustee_or_financial_administrator = models.BooleanField(
+        'Public Trustee/Financial Administrator', default=False)
+    behaviour_management = models.BooleanField(
+        'Behaviour Management', default=False)
+    restrictive_practices = models.BooleanField(
+        'Restrictive Practices', default=False)
+    complex_health_support_plan = models.BooleanField(
+        'Complex Health Support Plan', default=False)
+    unsupported_time = models.BooleanField('Unsupported Time', default=False)
+    mobility = models.BooleanField(
+        'Mobility', default=False)
+    aids_equipment = models.BooleanField(
+        'Aids & Equipment', default=False)
+    communication = models.BooleanField(
+        'Communication', default=False)
+    eating = models.BooleanField(
+        'Eating', default=False)
+    menstrual_management = models.BooleanField(
+        'Menstrual Management', default=False)
+    toileting = models.BooleanField(
+        'Toileting', default=False)
+    getting_drinks = models.BooleanField(
+        'getting_drinks', default=False)
+    food_preparation = models.BooleanField(
+        'Food Preparation', default=False)
+    dressing = models.BooleanField(
+        'Dressing', default=False)
+    showering_or_bathing = models.BooleanField(
+        'Showering/Bathing', default=False)
+    medication = models.BooleanField(
+        'Medication', default=False)
+    friendships_or_relationships = models.BooleanField(
+        'Friendships/Relationships', default=False)
+    home_safety_and_security = models.BooleanField(
+        'Home Safety & Security', default=False)
+    community_access = models.BooleanField(
+        'Community Access', default=False)
+    personal_or_road_safety = models.BooleanField(
+        'Personal/Road Safety', default=False)
+    transport_or_travel = models.BooleanField(
+        'Transport/Travel', default=False)
+    chores = models.BooleanField(
+        'Chores', default=False)
+    hobbies_or_activities = models.BooleanField(
+        'Hobbies/Activities', default=False)
+    pet_care = models.BooleanField(
+        'Pet Care', default=False)
+    handling_money_or_budgeting = models.BooleanField(
+        'Handling Money/Budgeting', default=False)
+    education_or_employment = models.BooleanField(
+        'Education/Employment', default=False)
+    learning_new_skills = models.BooleanField(
+        'Learning New Skills', default=False)
+    other_needs_and_support = models.BooleanField(
+        'Other Needs and Support', default=False)
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Confirmation
+    is_profile_completed = models.BooleanField('Profile Completed', blank=True, default=False)
+
+    # Sections filled in, one bit each, and their share (see completion.py)
+    completion_mask = models.PositiveIntegerField('Completed Sections', default=0, editable=False)
+    completion_percentage = models.FloatField('Completion Percentage', default=0, editable=False)
+
+    # The support flags above, one bit each (see support_needs.py)
+    support_needs_mask = models.PositiveIntegerField('Support Needs', default=0, editable=False)
+
+    objects = ParticipantQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # admin completion report: counts read this index, not the wide rows
+            models.Index(fields=['completion_mask'], name='participant_completion_idx'),
+            # needs queries: distinct masks and IN (...) lookups, pages by id
+            models.Index(fields=['support_needs_mask', 'id'], name='participant_needs_idx'),
+        ]
+
+    # def save(self, *args, **kwargs):
+    #     if not self.slug:
+    #         self.slug = slugify(f"{self.user.first_name}-{self.ndis_number}")
+    #     super().save(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        # Only recompute completion / the needs mask when their fields are being saved
+        update_fields = kwargs.get('update_fields')
+        deferred = self.get_deferred_fields()
+        changed = set(self._changed_details())
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            # moved columns are written to their side rows
+            detail_fields = {name for name in update_fields if name in DETAIL_FIELDS}
+            changed |= {DETAIL_FIELDS[name][0] for name in detail_fields}
+            update_fields -= detail_fields
+            saved = SECTION_FIELDS & (update_fields | detail_fields)
+            saved_flags = NEED_FLAGS & update_fields
+        else:
+            # a row loaded with .only() saves just its loaded fields, and a
+            # side row counts once one of its values was set
+            saved = {
+                name for name in SECTION_FIELDS
+                if (DETAIL_FIELDS[name][0] in changed if name in DETAIL_FIELDS else name not in deferred)
+            }
+            saved_flags = NEED_FLAGS - deferred
+        missing = ((SECTION_FIELDS if saved else set()) | (NEED_FLAGS if saved_flags else set())) & deferred
+        if missing:
+            # one query for the rest of the checked fields
+            self.refresh_from_db(fields=list(missing))
+        if saved:
+            self.completion_mask, self.completion_percentage = compute_completion(self)
+            if update_fields is not None:
+                update_fields |= set(COMPLETION_FIELDS)
+        if saved_flags:
+            self.support_needs_mask = needs_mask(self)
+            if update_fields is not None:
+                update_fields.add(MASK_FIELD)
+        if update_fields is not None:
+            if changed:
+                # updated_at covers the side rows too (ETags of the profile)
+                update_fields.add('updated_at')
+            kwargs['update_fields'] = update_fields
+
+        # the cards row syncs its own expiries when it is saved
+        saved_plan_end = ('ndis_plan_end' in update_fields if update_fields is not None
+                          else 'ndis_plan_end' not in deferred)
+
+        if not changed:
+            super().save(*args, **kwargs)
+            if saved_plan_end:
+                sync_expiries(ParticipantExpiry, self.id, expiry_dates(self, NDIS_CREDENTIALS))
+            return
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if saved_plan_end:
+                sync_expiries(ParticipantExpiry, self.id, expiry_dates(self, NDIS_CREDENTIALS))
+            for relation in changed:
+                detail = self.get_detail(relation)
+                detail.participant = self
+                detail.save(sync_participant=False)
+        self._changed_details().clear()
+
+    # ---------- side rows (see details.py) ----------
+
+    def get_detail(self, relation):
+        """
+        The side row of relation ('medical', 'cards', 'support_details'),
+        loaded on first use; a blank, unsaved one if there is none yet.
+        """
+        try:
+            return getattr(self, relation)
+        except ObjectDoesNotExist:
+            detail = DETAIL_MODELS[relation](participant=self)
+            setattr(self, relation, detail)
+            return detail
+
+    def _changed_details(self):
+        # relations with values set since the last save
+        return self.__dict__.setdefault('_detail_changes', set())
+
+    def refresh_completion(self):
+        """Recompute the completion state after a side row was saved on its own"""
+        self.completion_mask, self.completion_percentage = compute_completion(self)
+        self.save(update_fields=[*COMPLETION_FIELDS, 'updated_at'])
+
+    def __str__(self):
+        return f"{self.user.first_name} ({self.ndis_number})"
+
+
+# ==========================================
+# SIDE TABLES (see details.py)
+# ==========================================
+
+class ParticipantDetail(models.Model):
+    """Base of the one-to-one side tables of Participant"""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, sync_participant=True, **kwargs):
+        super().save(*args, **kwargs)
+        if sync_participant:
+            # saved on its own (e.g. an admin inline): the participant's
+            # completion state and updated_at depend on it
+            self.participant.refresh_completion()
+
+
+class ParticipantMedical(ParticipantDetail):
+    """Medical requirements"""
+    participant = models.OneToOneField(
+        Participant, primary_key=True, related_name='medical', on_delete=models.CASCADE)
+    name_of_doctor = models.CharField(
+        'Doctor Name', blank=True, max_length=50, null=True)
+    medical_food_other_allergies = models.TextField(
+        'Medical, Food or Other Allergies', max_length=500, blank=True, null=True)
+    medical_condition = models.TextField(
+        'Medical Condition', blank=True, max_length=500, null=True)
+    dietary_requirements = models.TextField(
+        'Dietary Requirements', blank=True, max_length=500, null=True)
+
+
+class ParticipantCards(ParticipantDetail):
+    """Pension, insurance and card numbers with their expiry dates"""
+    participant = models.OneToOneField(
+        Participant, primary_key=True, related_name='cards', on_delete=models.CASCADE)
     pension_type = models.CharField(
         'Pension Type', max_length=50, blank=True, null=True)
     pension_number = models.CharField(
         'Pension Number', max_length=50, blank=True, null=True)
     pension_expiry = models.DateField('Pension Expiry', blank=True, null=True)
-
     private_insurance_type = models.CharField(
         'Private Insurance Type', max_length=50, blank=True, null=True)
     private_insurance_number = models.CharField(
         'Private Insurance Number', max_length=50, blank=True, null=True)
     private_insurance_expiry = models.DateField('Private Insurance Expiry', blank=True, null=True)
-
     medicare_number = models.CharField(
         'Medicare Number', max_length=50, blank=True, null=True)
     medicare_expiry = models.DateField('Medicare Expiry', blank=True, null=True)
-
     healthcare_card_number = models.CharField(
         'Healthcare Card Number', max_length=50, blank=True, null=True)
     healthcare_card_expiry = models.DateField('Healthcare Card Expiry', blank=True, null=True)
-
     companion_card_number = models.CharField(
         'Companion Card Number', max_length=50, blank=True, null=True)
     companion_card_expiry = models.DateField('Companion Card Expiry', blank=True, null=True)
 
-    # Emergency Contacts
-    emergency_contact_1 = PhoneNumberField(
-        'Emergency Contact 1', blank=False, null=False)
-    emergency_contact_2 = PhoneNumberField(
-        'Emergency Contact 2', blank=False, null=False)
-    guardian_name = models.CharField('Guardian Name', blank=False, null=False, max_length=30, default='John Doe')
-    guardian_address = models.TextField('Guardian Address', blank=False, null=False, max_length=100, default='Australia')
-    guardian_contact = PhoneNumberField('Guardian Contact', blank=False, null=False, default='458493')
-    guardian_email = models.EmailField('Guardian Email', blank=False, null=False, default='john_doe@gmail.com')
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        sync_expiries(ParticipantExpiry, self.participant_id, expiry_dates(self, CARD_CREDENTIALS))
 
 
-    # Medical requirements
-    name_of_doctor = models.CharField(
-        'Doctor Name', blank=True, max_length=50, null=True)
-    medical_food_other_allergies = models.TextField(
-        'Medical, Food or Other Allergies', max_length=500, blank=True, null=True)
-    medical_condition = models.TextField(
-        'Medical Condition', blank=True, max_length=500, null=True)
-    dietary_requirements = models.TextField(
-        'Dietary Requirements', blank=True, max_length=500, null=True)
-
+class ParticipantSupportDetails(ParticipantDetail):
+    """About me and the details text of each support flag"""
+    participant = models.OneToOneField(
+        Participant, primary_key=True, related_name='support_details', on_delete=models.CASCADE)
     # About Me
     likes = models.TextField('Likes', blank=True, max_length=300, null=True)
     dislikes = models.TextField(
@@ -103,165 +337,112 @@ class Participant(models.Model):
     level_assistance_required = models.TextField(
         'Leve of Assistance Required', blank=True, max_length=300, null=True)
 
-    # Specific Needs and Support
-    opg_guardian_consent_required = models.BooleanField(
-        'OPG/Guardian Consent Required', default=False)
+    # Details of the support flags on Participant
     opg_guardian_consent_required_details = models.TextField(
         'OPG/Guardian Consent Required Details', max_length=500, blank=True, null=True)
-
-    public_trustee_or_financial_administrator = models.BooleanField(
-        'Public Trustee/Financial Administrator', default=False)
     public_trustee_or_financial_administrator_details = models.TextField(
         'Public Trustee/Financial Administrator Details', max_length=500, blank=True, null=True)
-
-    behaviour_management = models.BooleanField(
-        'Behaviour Management', default=False)
     behaviour_management_details = models.TextField(
         'Behaviour Management Details', max_length=500, blank=True, null=True)
-
-    restrictive_practices = models.BooleanField(
-        'Restrictive Practices', default=False)
     restrictive_practices_details = models.TextField(
         'Restrictive Practices Details', max_length=500, blank=True, null=True)
-
-    complex_health_support_plan = models.BooleanField(
-        'Complex Health Support Plan', default=False)
     complex_health_support_plan_details = models.TextField(
         'Complex Health Support Plan Details', max_length=500, blank=True, null=True)
-
-    unsupported_time = models.BooleanField('Unsupported Time', default=False)
     unsupported_time_details = models.TextField(
         'Unsupported Time Details', max_length=300, blank=True, null=True)
-
-    mobility = models.BooleanField(
-        'Mobility', default=False)
-    Mobility_details = models.TextField(
+    mobility_details = models.TextField(
         'Mobility Details', max_length=500, blank=True, null=True)
-
-    aids_equipment = models.BooleanField(
-        'Aids & Equipment', default=False)
     aids_equipment_details = models.TextField(
         'Aids & Equipment Details', max_length=500, blank=True, null=True)
-
-    communication = models.BooleanField(
-        'Communication', default=False)
     communication_details = models.TextField(
         'Communication Details', max_length=500, blank=True, null=True)
-
-    eating = models.BooleanField(
-        'Eating', default=False)
     eating_details = models.TextField(
         'Eating Details', max_length=500, blank=True, null=True)
-
-    menstrual_management = models.BooleanField(
-        'Menstrual Management', default=False)
     menstrual_management_details = models.TextField(
         'Menstrual Management Details', max_length=500, blank=True, null=True)
-
-    toileting = models.BooleanField(
-        'Toileting', default=False)
     toileting_details = models.TextField(
         'Toileting Details', max_length=500, blank=True, null=True)
-
-    getting_drinks = models.BooleanField(
-        'getting_drinks', default=False)
     getting_drinks_details = models.TextField(
         'Getting Drinks Details', max_length=500, blank=True, null=True)
-
-    food_preparation = models.BooleanField(
-        'Food Preparation', default=False)
     food_preparation_details = models.TextField(
         'Food Preparation Details', max_length=500, blank=True, null=True)
-
-    dressing = models.BooleanField(
-        'Dressing', default=False)
     dressing_details = models.TextField(
         'Dressing Details', max_length=500, blank=True, null=True)
-
-    showering_or_bathing = models.BooleanField(
-        'Showering/Bathing', default=False)
     showering_or_bathing_details = models.TextField(
         'Showering/Bathing Details', max_length=500, blank=True, null=True)
-
-    medication = models.BooleanField(
-        'Medication', default=False)
     medication_details = models.TextField(
         'Medication Details', max_length=500, blank=True, null=True)
-
-    friendships_or_relationships = models.BooleanField(
-        'Friendships/Relationships', default=False)
     friendships_or_relationships_details = models.TextField(
         'Friendships/Relationships Details', max_length=500, blank=True, null=True)
-
-    home_safety_and_security = models.BooleanField(
-        'Home Safety & Security', default=False)
     home_safety_and_security_details = models.TextField(
         'Home Safety & Security Details', max_length=500, blank=True, null=True)
-
-    community_access = models.BooleanField(
-        'Community Access', default=False)
     community_access_details = models.TextField(
         'Community Access Details', max_length=500, blank=True, null=True)
-
-    personal_or_road_safety = models.BooleanField(
-        'Personal/Road Safety', default=False)
     personal_or_road_safety_details = models.TextField(
         'Personal/Road Safety Details', max_length=500, blank=True, null=True)
-
-    transport_or_travel = models.BooleanField(
-        'Transport/Travel', default=False)
     transport_or_travel_details = models.TextField(
         'Transport/Travel Details', max_length=500, blank=True, null=True)
-
-    chores = models.BooleanField(
-        'Chores', default=False)
     chores_details = models.TextField(
         'Chores Details', max_length=500, blank=True, null=True)
-
-    hobbies_or_activities = models.BooleanField(
-        'Hobbies/Activities', default=False)
     hobbies_or_activities_details = models.TextField(
         'Hobbies/Activities Details', max_length=500, blank=True, null=True)
-
-    pet_care = models.BooleanField(
-        'Pet Care', default=False)
     pet_care_details = models.TextField(
         'Pet Care Details', max_length=500, blank=True, null=True)
-
-    handling_money_or_budgeting = models.BooleanField(
-        'Handling Money/Budgeting', default=False)
     handling_money_or_budgeting_details = models.TextField(
         'Handling Money/Budgeting Details', max_length=500, blank=True, null=True)
-
-    education_or_employment = models.BooleanField(
-        'Education/Employment', default=False)
     education_or_employment_details = models.TextField(
         'Education/Employment Details', max_length=500, blank=True, null=True)
-
-    learning_new_skills = models.BooleanField(
-        'Learning New Skills', default=False)
     learning_new_skills_details = models.TextField(
         'Learning New Skills Details', max_length=500, blank=True, null=True)
-
-    other_needs_and_support = models.BooleanField(
-        'Other Needs and Support', default=False)
     other_needs_and_support_details = models.TextField(
         'Other Needs and Support Details', max_length=500, blank=True, null=True)
 
-    # Timestamps
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
 
-    # Confirmation
-    is_profile_completed = models.BooleanField('Profile Completed', blank=True, default=False)
+# ==========================================
+# EXPIRY INDEX (see expiries.py)
+# ==========================================
 
-    class Meta:
-        ordering = ['-created_at']
+class ParticipantExpiry(models.Model):
+    """One expiry date of a participant (NDIS plan end, a card expiry), kept in sync on save"""
+    CREDENTIAL_CHOICES = [(credential, label) for credential, (_, label) in CREDENTIALS.items()]
 
-    # def save(self, *args, **kwargs):
-    #     if not self.slug:
-    #         self.slug = slugify(f"{self.user.first_name}-{self.ndis_number}")
-    #     super().save(*args, **kwargs)
+    participant = models.ForeignKey(Participant, related_name='expiries', on_delete=models.CASCADE)
+    credential = models.CharField(max_length=30, choices=CREDENTIAL_CHOICES)
+    expires_on = models.DateField()
+    reminded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['participant', 'credential'], name='participant_expiry_unique'),
+        ]
+        indexes = [
+            # the reminder scan: only rows not reminded yet, by date
+            models.Index(fields=['expires_on'], condition=models.Q(reminded_at__isnull=True),
+                         name='participant_expiry_due_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.first_name} ({self.ndis_number})"
+        return f"{self.participant_id} {self.credential} {self.expires_on}"
+
+
+DETAIL_MODELS = {
+    'medical': ParticipantMedical,
+    'cards': ParticipantCards,
+    'support_details': ParticipantSupportDetails,
+}
+
+
+def _detail_property(relation, column):
+    def get(self):
+        return getattr(self.get_detail(relation), column)
+
+    def set(self, value):
+        setattr(self.get_detail(relation), column, value)
+        self._changed_details().add(relation)
+
+    return property(get, set, doc=f'{relation}.{column}')
+
+
+# participant.medical_condition etc. read and write the side rows
+for _name, (_relation, _column) in DETAIL_FIELDS.items():
+    setattr(Participant, _name, _detail_property(_relation, _column))
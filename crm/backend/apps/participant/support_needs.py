@@ -0,0 +1,80 @@
+# ==========================================
+# SUPPORT NEEDS BITMASK
+# ==========================================
+"""
+The 29 boolean support flags of a participant (mobility, medication, ...)
+mirrored into one integer, Participant.support_needs_mask, one bit per flag:
+
+    mobility + medication  ->  NEED_BITS['mobility'] | NEED_BITS['medication']
+
+Participant.save() keeps it in sync whenever a flag is saved, and
+backfill_support_needs() rebuilds it in a single UPDATE.
+
+Queries ("needs mobility AND medication") never scan the rows:
+    1. the distinct masks in use are read from participant_needs_idx
+       (an index-only scan; there are far fewer combinations than rows)
+    2. they are matched against the wanted bits in memory
+    3. the rows are fetched with support_needs_mask IN (matching masks),
+       an index lookup
+
+    Participant.objects.with_needs(['mobility', 'medication'])
+    Participant.objects.with_needs(['eating', 'toileting'], match_all=False)
+
+Bits are positions in SUPPORT_FLAGS: append new flags at the end.
+"""
+
+from django.db.models import Case, Value, When
+
+from . details import SUPPORT_FLAGS
+
+NEED_BITS = {flag: 1 << i for i, flag in enumerate(SUPPORT_FLAGS)}
+MASK_FIELD = 'support_needs_mask'
+
+# above this many matching combinations the IN list gets unwieldy: filter
+# with a bitwise predicate on the narrow column instead
+MAX_IN_MASKS = 500
+
+
+def needs_mask(participant):
+    """Mask of participant's current flags"""
+    mask = 0
+    for flag, bit in NEED_BITS.items():
+        if getattr(participant, flag):
+            mask |= bit
+    return mask
+
+
+def mask_for(needs):
+    """Mask of the named needs; raises ValueError for unknown names"""
+    unknown = [need for need in needs if need not in NEED_BITS]
+    if unknown:
+        raise ValueError(f"Unknown support needs: {', '.join(unknown)}")
+    mask = 0
+    for need in needs:
+        mask |= NEED_BITS[need]
+    return mask
+
+
+def decode(mask):
+    """Names of the needs set in mask"""
+    return [flag for flag, bit in NEED_BITS.items() if mask & bit]
+
+
+def matching_masks(masks, wanted, match_all=True):
+    """The masks having every (match_all) or any of the wanted bits"""
+    if match_all:
+        return [mask for mask in masks if mask & wanted == wanted]
+    return [mask for mask in masks if mask & wanted]
+
+
+def mask_expression():
+    """SQL expression of the mask computed from the flag columns"""
+    expression = Value(0)
+    for flag, bit in NEED_BITS.items():
+        expression += Case(When(**{flag: True}, then=Value(bit)), default=Value(0))
+    return expression
+
+
+def backfill_support_needs(model):
+    """Recompute every row's mask in one UPDATE; returns the number of rows"""
+    return model.objects.update(**{MASK_FIELD: mask_expression()})
@@ -1,3 +1,307 @@
-from django.test import TestCase
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.company.models import Company
+from apps.membership import context as access_context
+from apps.membership.models import CompanyMembership
+from apps.membership.tests import clear_test_caches, make_client
+from apps.user.audit import audit_buffer
+from apps.user.models import AuditLog, User_Model
+from . completion import REQUIRED_MASK, SECTION_BITS, SECTIONS, backfill_completion, percentage
+from . expiries import send_expiry_reminders
+from . models import Participant, ParticipantExpiry, ParticipantMedical
+from . support_needs import NEED_BITS, backfill_support_needs
+
+# the other columns a participant row needs
+PROFILE = {
+    'ndis_plan_start': '2024-01-01', 'ndis_plan_end': '2026-12-31', 'ndis_plan_managed_details': 'Self',
+    'emergency_contact_1': '+61412345679', 'emergency_contact_2': '+61412345670',
+}
+
+
+def make_admin(email='admin@example.com'):
+    user = User_Model.objects.create(work_email=email, first_name='Ada', last_name='Admin')
+    CompanyMembership.objects.create(user=user, company=Company.objects.get(), role='ADMIN')
+    return user
+
+
+class CompletionTests(TestCase):
+
+    def setUp(self):
+        access_context._default_company_id = None
+        clear_test_caches()
+        self.user, self.participant = make_client()
+
+    def test_save_computes_mask(self):
+        # make_client fills everything required but the date of birth
+        mask = self.participant.completion_mask
+        self.assertFalse(mask & SECTION_BITS['basic_info'])
+        self.assertTrue(mask & SECTION_BITS['ndis_plan_dates'])
+
+        self.participant.date_of_birth = date(1990, 1, 1)
+        self.participant.save(update_fields=['date_of_birth'])
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.completion_mask & REQUIRED_MASK, REQUIRED_MASK)
+        self.assertEqual(self.participant.completion_percentage, percentage(self.participant.completion_mask))
+
+    def test_side_table_field_counts(self):
+        self.participant.medical_condition = 'Asthma'
+        self.participant.save()
+        self.participant.refresh_from_db()
+        self.assertTrue(self.participant.completion_mask & SECTION_BITS['medical_info'])
+
+    def test_backfill_repairs_rows(self):
+        expected = self.participant.completion_mask
+        Participant.objects.update(completion_mask=0, completion_percentage=0)
+        self.assertEqual(backfill_completion(Participant), 1)
+        self.assertEqual(Participant.objects.get().completion_mask, expected)
+        self.assertEqual(backfill_completion(Participant), 0)
+
+    def test_report(self):
+        self.participant.date_of_birth = date(1990, 1, 1)
+        self.participant.save()
+        make_client('two@example.com', ndis_number='430000002', phone='+61412345677')
+        client = APIClient()
+        client.force_authenticate(make_admin())
+
+        response = client.get('/api/admin/participants/completion/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_participants'], 2)
+        self.assertEqual(response.data['required_complete'], 1)
+        self.assertEqual(response.data['missing']['basic_info'], 1)
+        self.assertEqual(response.data['missing']['ndis_number'], 0)
+        average = sum(p.completion_percentage for p in Participant.objects.all()) / 2
+        self.assertAlmostEqual(response.data['average_completion_percentage'], average, delta=0.1)
+        self.assertEqual(len(response.data['missing']), len(SECTIONS))
+
+
+class DetailTablesTests(TestCase):
+
+    def setUp(self):
+        access_context._default_company_id = None
+        clear_test_caches()
+        self.user, self.participant = make_client()
+
+    def test_create_with_side_table_values(self):
+        user = User_Model.objects.create(work_email='two@example.com', first_name='Al', last_name='Citizen')
+        participant = Participant.objects.create(
+            user=user, phone='+61412345677', ndis_number='430000002', address='2 Main St',
+            medical_condition='Asthma', medicare_expiry=date(2026, 11, 1), **PROFILE,
+        )
+        participant = Participant.objects.get(pk=participant.pk)
+        self.assertEqual(participant.medical.medical_condition, 'Asthma')
+        self.assertEqual(participant.cards.medicare_expiry, date(2026, 11, 1))
+        self.assertTrue(participant.completion_mask & SECTION_BITS['medical_info'])
+        self.assertTrue(ParticipantExpiry.objects.filter(participant=participant, credential='medicare').exists())
+
+    def test_save_update_fields_with_moved_field(self):
+        updated_at = self.participant.updated_at
+        participant = Participant.objects.get(pk=self.participant.pk)
+        participant.medical_condition = 'Asthma'
+        participant.address = 'not saved'
+        participant.save(update_fields=['medical_condition'])
+
+        participant = Participant.objects.get(pk=self.participant.pk)
+        self.assertEqual(participant.medical_condition, 'Asthma')
+        self.assertEqual(participant.address, self.participant.address)
+        self.assertTrue(participant.completion_mask & SECTION_BITS['medical_info'])
+        self.assertGreater(participant.updated_at, updated_at)
+
+    def test_only_rows(self):
+        participant = Participant.objects.only('id', 'address').get(pk=self.participant.pk)
+        # a moved field loads its side row on use
+        self.assertIsNone(participant.medical_condition)
+        participant.address = '3 Other St'
+        participant.save()
+
+        participant = Participant.objects.get(pk=self.participant.pk)
+        self.assertEqual(participant.address, '3 Other St')
+        self.assertEqual(participant.ndis_number, self.participant.ndis_number)
+        self.assertEqual(participant.completion_mask, self.participant.completion_mask)
+        self.assertFalse(ParticipantMedical.objects.exists())
+
+
+class DetailTablesMigrationTests(TransactionTestCase):
+    """0007 moves the columns to the side tables and back"""
+
+    before = [('participant', '0006_participant_completion_state')]
+    after = [('participant', '0007_participant_detail_tables')]
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return MigrationExecutor(connection)._create_project_state(with_applied_migrations=True).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_forward_and_reverse(self):
+        apps = self._migrate(self.before)
+        user = apps.get_model('user', 'User_Model').objects.create(
+            work_email='jo@example.com', first_name='Jo', last_name='Citizen',
+        )
+        apps.get_model('participant', 'Participant').objects.create(
+            user=user, phone='+61412345678', ndis_number='430000001', address='1 Main St',
+            medical_condition='Asthma', medicare_number='2123', Mobility_details='Walker', **PROFILE,
+        )
+        empty = apps.get_model('participant', 'Participant').objects.create(
+            user=apps.get_model('user', 'User_Model').objects.create(work_email='al@example.com'),
+            phone='+61412345677', ndis_number='430000002', address='2 Main St', **PROFILE,
+        )
+
+        apps = self._migrate(self.after)
+        participant = apps.get_model('participant', 'Participant').objects.get(ndis_number='430000001')
+        self.assertEqual(apps.get_model('participant', 'ParticipantMedical').objects.get(
+            participant=participant).medical_condition, 'Asthma')
+        self.assertEqual(apps.get_model('participant', 'ParticipantCards').objects.get(
+            participant=participant).medicare_number, '2123')
+        self.assertEqual(apps.get_model('participant', 'ParticipantSupportDetails').objects.get(
+            participant=participant).mobility_details, 'Walker')
+        # no side rows for a participant without values
+        self.assertFalse(apps.get_model('participant', 'ParticipantMedical').objects.filter(
+            participant_id=empty.pk).exists())
+
+        apps = self._migrate(self.before)
+        participant = apps.get_model('participant', 'Participant').objects.get(ndis_number='430000001')
+        self.assertEqual(
+            (participant.medical_condition, participant.medicare_number, participant.Mobility_details),
+            ('Asthma', '2123', 'Walker'),
+        )
+
+
+class SupportNeedsTests(TestCase):
+
+    def setUp(self):
+        access_context._default_company_id = None
+        clear_test_caches()
+        self.both = self._participant(1, mobility=True, medication=True)
+        self.mobility = self._participant(2, mobility=True)
+        self.none = self._participant(3)
+
+    def _participant(self, number, **flags):
+        _, participant = make_client(f'p{number}@example.com', ndis_number=f'43000000{number}',
+                                     phone=f'+6141234560{number}')
+        for flag, value in flags.items():
+            setattr(participant, flag, value)
+        participant.save()
+        return participant
+
+    def _ids(self, queryset):
+        return sorted(queryset.values_list('id', flat=True))
+
+    def test_mask_follows_saves(self):
+        self.assertEqual(self.both.support_needs_mask, NEED_BITS['mobility'] | NEED_BITS['medication'])
+        self.both.medication = False
+        self.both.save(update_fields=['medication'])
+        self.assertEqual(Participant.objects.get(pk=self.both.pk).support_needs_mask, NEED_BITS['mobility'])
+
+    def test_match_all_and_any(self):
+        self.assertEqual(self._ids(Participant.objects.with_needs(['mobility', 'medication'])), [self.both.pk])
+        self.assertEqual(
+            self._ids(Participant.objects.with_needs(['mobility', 'medication'], match_all=False)),
+            sorted([self.both.pk, self.mobility.pk]),
+        )
+        self.assertEqual(self._ids(Participant.objects.with_needs(['eating'])), [])
+        with self.assertRaises(ValueError):
+            Participant.objects.with_needs(['flying'])
+
+    def test_bitwise_fallback(self):
+        # more matching combinations than MAX_IN_MASKS: the bitwise filter
+        with mock.patch('apps.participant.models.MAX_IN_MASKS', 0):
+            self.assertEqual(self._ids(Participant.objects.with_needs(['mobility', 'medication'])), [self.both.pk])
+            self.assertEqual(
+                self._ids(Participant.objects.with_needs(['medication', 'eating'], match_all=False)),
+                [self.both.pk],
+            )
+
+    def test_backfill(self):
+        Participant.objects.update(support_needs_mask=0)
+        backfill_support_needs(Participant)
+        self.assertEqual(self._ids(Participant.objects.with_needs(['mobility'])),
+                         sorted([self.both.pk, self.mobility.pk]))
+
+
+class ExpiryTests(TestCase):
+
+    def setUp(self):
+        access_context._default_company_id = None
+        clear_test_caches()
+        self.user, self.participant = make_client()
+
+    def _expiries(self):
+        return dict(ParticipantExpiry.objects.values_list('credential', 'expires_on'))
+
+    def test_sync_on_save(self):
+        self.assertEqual(self._expiries(), {'ndis_plan': date(2026, 12, 31)})
+        ParticipantExpiry.objects.update(reminded_at='2026-12-01T08:00:00Z')
+
+        self.participant.ndis_plan_end = date(2027, 6, 30)
+        self.participant.medicare_expiry = date(2026, 11, 1)
+        self.participant.save()
+        self.assertEqual(self._expiries(), {'ndis_plan': date(2027, 6, 30), 'medicare': date(2026, 11, 1)})
+        # the new date gets its own reminder
+        self.assertIsNone(ParticipantExpiry.objects.get(credential='ndis_plan').reminded_at)
+
+        self.participant.medicare_expiry = None
+        self.participant.save(update_fields=['medicare_expiry'])
+        self.assertEqual(self._expiries(), {'ndis_plan': date(2027, 6, 30)})
+
+    @override_settings(NOTIFICATION_EMAILS=['staff@example.com'])
+    def test_reminders_grouped_and_sent_once(self):
+        self.participant.medicare_expiry = date(2026, 12, 20)
+        self.participant.save()
+        make_client('two@example.com', ndis_number='430000002', phone='+61412345677')
+        today = date(2026, 12, 1)
+
+        self.assertEqual(send_expiry_reminders(Participant, ParticipantExpiry, today=today, dry_run=True), (2, 3))
+        self.assertEqual(len(mail.outbox), 0)
+
+        with override_settings(EXPIRY_REMINDERS={'DAYS_AHEAD': 30, 'BATCH_SIZE': 1}):
+            self.assertEqual(send_expiry_reminders(Participant, ParticipantExpiry, today=today), (2, 3))
+        # one email per participant, then the staff digest
+        self.assertEqual([message.to for message in mail.outbox],
+                         [['client@example.com'], ['two@example.com'], ['staff@example.com']])
+        self.assertIn('Medicare card', mail.outbox[0].body)
+        self.assertIn('NDIS plan', mail.outbox[0].body)
+        self.assertFalse(ParticipantExpiry.objects.filter(reminded_at=None).exists())
+
+        self.assertEqual(send_expiry_reminders(Participant, ParticipantExpiry, today=today), (0, 0))
+
+    def test_days_ahead_read_at_call_time(self):
+        today = date(2026, 12, 1)
+        with override_settings(EXPIRY_REMINDERS={'DAYS_AHEAD': 7, 'BATCH_SIZE': 200}):
+            self.assertEqual(send_expiry_reminders(Participant, ParticipantExpiry, today=today, dry_run=True), (0, 0))
+        self.assertEqual(send_expiry_reminders(Participant, ParticipantExpiry, today=today, dry_run=True), (1, 1))
+
+
+class AuditTests(TestCase):
+
+    def setUp(self):
+        access_context._default_company_id = None
+        clear_test_caches()
+        self.user, self.participant = make_client()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_profile_read_is_logged(self):
+        response = self.client.get('/api/client/profile/get')
+        self.assertEqual(response.status_code, 200)
+        # buffered, written at once under BULK_BUFFER_SYNC
+        entry = AuditLog.objects.get(action='profile_viewed')
+        self.assertEqual(entry.user, self.user)
+        self.assertEqual(entry.description, f'Participant {self.participant.id}')
+        self.assertEqual(len(audit_buffer), 0)
+
+    def test_profile_read_is_queued_without_sync(self):
+        with override_settings(BULK_BUFFER_SYNC=False):
+            self.client.get('/api/client/profile/get')
+            self.assertFalse(AuditLog.objects.exists())
+            audit_buffer.flush()
+        self.assertEqual(AuditLog.objects.filter(action='profile_viewed').count(), 1)
@@ -7,9 +7,17 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.db import transaction
+from django.db.models import Count, F, Q
 from . models import Participant
+from . completion import decode, SECTION_BITS, REQUIRED_MASK
+from . fieldsets import requested_keys, profile_queryset, serialize_profile, InvalidFieldset
+from . support_needs import NEED_BITS, decode as decode_needs
 from apps.document.models import ServiceAgreement
-from apps.membership.models import CompanyMembership
+from apps.membership.context import get_access_context
+from apps.user.conditional import conditional_get, latest
+from apps.user.models import AuditLog
+from apps.user.pagination import KeysetPaginator, InvalidCursor
+from apps.authentication.permissions import IsClient, IsCompanyAdmin
 from apps.document.email_services import EmailService
 from decimal import Decimal
 from datetime import datetime
@@ -21,169 +29,48 @@ from django.utils import timezone
 # ==========================================
 user_model = get_user_model()
 
+
+def _profile_validators(request):
+    # updated_at by primary key: the 304 path never loads the wide row
+    participant_id = get_access_context(request).participant_id
+    updated_at = Participant.objects.filter(id=participant_id).values_list(
+        'updated_at', flat=True
+    ).order_by().first() if participant_id else None
+    if updated_at is None:
+        return None
+    # name and email come from the user row (already loaded by authentication)
+    user = request.user
+    return (participant_id, updated_at, user.pk, user.updated_at), latest(updated_at, user.updated_at)
+
+
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsClient])
+@conditional_get(_profile_validators)
 def get_client_profile(request):
     """
     Get current client's profile information
     URL: /api/client/profile/
+    Query: ?sections=basic,ndis and/or ?fields=ndis_number,... (see fieldsets.py)
+    Conditional: ETag / Last-Modified, 304 when unchanged
     """
 
-    # Verify user is a client
+    # ?fields= / ?sections=: only those keys, and only their columns loaded
     try:
-        membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title='Casa Community Pty Ltd',
-            role='CLIENT'
-        )
-    except CompanyMembership.DoesNotExist:
-        return Response({
-            'error': 'Access denied. Client account required.'
-        }, status=status.HTTP_403_FORBIDDEN)
+        keys = requested_keys(request.query_params)
+    except InvalidFieldset as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Get or create participant profile
-    try:
-        participant = Participant.objects.get(user=request.user)
-        profile_exists = True
-    except Participant.DoesNotExist:
-        # Return empty profile structure
-        profile_exists = False
-        participant = None
+    # one query: the core row's columns and the side tables the keys need
+    participant_id = get_access_context(request).participant_id
+    participant = profile_queryset(keys).filter(
+        id=participant_id
+    ).order_by().first() if participant_id else None
+    profile_exists = participant is not None
 
     if profile_exists:
-        profile_data = {
-            'id': participant.id,
-            'uuid': str(participant.uuid),
-            'is_profile_completed': participant.is_profile_completed,
-
-            # Basic Info (NEW/UPDATED FIELDS)
-            'first_name': request.user.first_name,
-            'last_name': request.user.last_name,
-            'email': request.user.work_email,
-            'preferred_name': participant.preferred_name,
-            'date_of_birth': participant.date_of_birth.strftime('%Y-%m-%d') if participant.date_of_birth else None,
-            'address': participant.address,
-            'phone': str(participant.phone) if participant.phone else None,
-            'photo': participant.photo.url if participant.photo else None,
-
-            # Personal Details (UPDATED with gender choice)
-            'gender': participant.gender,
-            'height': float(participant.height) if participant.height else None,
-            'weight': float(participant.weight) if participant.weight else None,
-            'hair_colour': participant.hair_colour,
-            'eye_colour': participant.eye_colour,
-            'spoken_language': participant.spoken_language,
-            'distinguishing_features': participant.distinguishing_features,
-            'clothing_size': float(participant.clothing_size) if participant.clothing_size else None,
-            'shoe_size': float(participant.shoe_size) if participant.shoe_size else None,
-            'religion_or_culture': participant.religion_or_culture,
-
-            # NDIS Info
-            'ndis_number': participant.ndis_number,
-            'ndis_plan_start': participant.ndis_plan_start.strftime('%Y-%m-%d') if participant.ndis_plan_start else None,
-            'ndis_plan_end': participant.ndis_plan_end.strftime('%Y-%m-%d') if participant.ndis_plan_end else None,
-            'ndis_plan_managed_details': participant.ndis_plan_managed_details,
-
-            # Cards & Insurance
-            'pension_type': participant.pension_type,
-            'pension_number': participant.pension_number,
-            'pension_expiry': participant.pension_expiry.strftime('%Y-%m-%d') if participant.pension_expiry else None,
-            'private_insurance_type': participant.private_insurance_type,
-            'private_insurance_number': participant.private_insurance_number,
-            'private_insurance_expiry': participant.private_insurance_expiry.strftime('%Y-%m-%d') if participant.private_insurance_expiry else None,
-            'medicare_number': participant.medicare_number,
-            'medicare_expiry': participant.medicare_expiry.strftime('%Y-%m-%d') if participant.medicare_expiry else None,
-            'healthcare_card_number': participant.healthcare_card_number,
-            'healthcare_card_expiry': participant.healthcare_card_expiry.strftime('%Y-%m-%d') if participant.healthcare_card_expiry else None,
-            'companion_card_number': participant.companion_card_number,
-            'companion_card_expiry': participant.companion_card_expiry.strftime('%Y-%m-%d') if participant.companion_card_expiry else None,
-
-            # Emergency Contacts
-            'emergency_contact_1': str(participant.emergency_contact_1) if participant.emergency_contact_1 else None,
-            'emergency_contact_2': str(participant.emergency_contact_2) if participant.emergency_contact_2 else None,
-
-            # Medical requirements
-            'name_of_doctor': participant.name_of_doctor,
-            'medical_food_other_allergies': participant.medical_food_other_allergies,
-            'medical_condition': participant.medical_condition,
-            'dietary_requirements': participant.dietary_requirements,
-
-            # About Me
-            'likes': participant.likes,
-            'dislikes': participant.dislikes,
-            'hobbies_interests': participant.hobbies_interests,
-            'supports_required': participant.supports_required,
-            'level_assistance_required': participant.level_assistance_required,
-
-            # Specific Needs and Support (all boolean fields with details)
-            'opg_guardian_consent_required': participant.opg_guardian_consent_required,
-            'opg_guardian_consent_required_details': participant.opg_guardian_consent_required_details,
-            'public_trustee_or_financial_administrator': participant.public_trustee_or_financial_administrator,
-            'public_trustee_or_financial_administrator_details': participant.public_trustee_or_financial_administrator_details,
-            'behaviour_management': participant.behaviour_management,
-            'behaviour_management_details': participant.behaviour_management_details,
-            'restrictive_practices': participant.restrictive_practices,
-            'restrictive_practices_details': participant.restrictive_practices_details,
-            'complex_health_support_plan': participant.complex_health_support_plan,
-            'complex_health_support_plan_details': participant.complex_health_support_plan_details,
-            'unsupported_time': participant.unsupported_time,
-            'unsupported_time_details': participant.unsupported_time_details,
-
-            # Daily Living Support
-            'mobility': participant.mobility,
-            'mobility_details': participant.Mobility_details,  # Note: capital M in model
-            'aids_equipment': participant.aids_equipment,
-            'aids_equipment_details': participant.aids_equipment_details,
-            'communication': participant.communication,
-            'communication_details': participant.communication_details,
-            'eating': participant.eating,
-            'eating_details': participant.eating_details,
-            'menstrual_management': participant.menstrual_management,
-            'menstrual_management_details': participant.menstrual_management_details,
-            'toileting': participant.toileting,
-            'toileting_details': participant.toileting_details,
-            'getting_drinks': participant.getting_drinks,
-            'getting_drinks_details': participant.getting_drinks_details,
-            'food_preparation': participant.food_preparation,
-            'food_preparation_details': participant.food_preparation_details,
-            'dressing': participant.dressing,
-            'dressing_details': participant.dressing_details,
-            'showering_or_bathing': participant.showering_or_bathing,
-            'showering_or_bathing_details': participant.showering_or_bathing_details,
-            'medication': participant.medication,
-            'medication_details': participant.medication_details,
-
-            # Social and Community Support
-            'friendships_or_relationships': participant.friendships_or_relationships,
-            'friendships_or_relationships_details': participant.friendships_or_relationships_details,
-            'home_safety_and_security': participant.home_safety_and_security,
-            'home_safety_and_security_details': participant.home_safety_and_security_details,
-            'community_access': participant.community_access,
-            'community_access_details': participant.community_access_details,
-            'personal_or_road_safety': participant.personal_or_road_safety,
-            'personal_or_road_safety_details': participant.personal_or_road_safety_details,
-            'transport_or_travel': participant.transport_or_travel,
-            'transport_or_travel_details': participant.transport_or_travel_details,
-
-            # Life Skills Support
-            'chores': participant.chores,
-            'chores_details': participant.chores_details,
-            'hobbies_or_activities': participant.hobbies_or_activities,
-            'hobbies_or_activities_details': participant.hobbies_or_activities_details,
-            'pet_care': participant.pet_care,
-            'pet_care_details': participant.pet_care_details,
-            'handling_money_or_budgeting': participant.handling_money_or_budgeting,
-            'handling_money_or_budgeting_details': participant.handling_money_or_budgeting_details,
-            'education_or_employment': participant.education_or_employment,
-            'education_or_employment_details': participant.education_or_employment_details,
-            'learning_new_skills': participant.learning_new_skills,
-            'learning_new_skills_details': participant.learning_new_skills_details,
-            'other_needs_and_support': participant.other_needs_and_support,
-            'other_needs_and_support_details': participant.other_needs_and_support_details,
-
-            'created_at': participant.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'updated_at': participant.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-        }
+        profile_data = serialize_profile(participant, request.user, keys)
+        AuditLog.log_action(request.user, 'profile_viewed', f'Participant {participant.id}', request,
+                            buffered=True)
     else:
         profile_data = {
             'profile_exists': False,
@@ -206,7 +93,7 @@ def get_client_profile(request):
 
 
 @api_view(['POST', 'PUT'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsClient])
 def create_update_client_profile_with_notification(request):
     """
     Create or update client profile
@@ -252,17 +139,6 @@ def create_update_client_profile_with_notification(request):
     }
     """
 
-    # Verify user is a client
-    try:
-        membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title='Casa Community Pty Ltd',
-            role='CLIENT'
-        )
-    except CompanyMembership.DoesNotExist:
-        return Response({
-            'error': 'Access denied. Client account required.'
-        }, status=status.HTTP_403_FORBIDDEN)
 
     MyUser = request.user
         
@@ -478,6 +354,8 @@ def create_update_client_profile_with_notification(request):
                 )
 
             action = 'created' if created else 'updated'
+            AuditLog.log_action(request.user, f'profile_{action}', f'Participant {participant.id}', request,
+                                buffered=True)
 
             response_data = {
                 'success': True,
@@ -519,103 +397,175 @@ def create_update_client_profile_with_notification(request):
 # ==========================================
 
 
+def _status_validators(request):
+    participant_id = get_access_context(request).participant_id
+    row = Participant.objects.filter(id=participant_id).values_list(
+        'updated_at', 'completion_mask', 'is_profile_completed'
+    ).order_by().first() if participant_id else None
+    if row is None:
+        return None
+    # the mask too: backfill_participant_completion doesn't touch updated_at
+    return (participant_id, *row), row[0]
+
+
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsClient])
+@conditional_get(_status_validators)
 def get_profile_completion_status(request):
     """
     Get profile completion status and missing fields
     URL: /api/client/profile/status/
+    Conditional: ETag / Last-Modified, 304 when unchanged
     """
 
-    try:
-        membership = CompanyMembership.objects.get(
-            user=request.user,
-            company__title='Casa Community Pty Ltd',
-            role='CLIENT'
-        )
-    except CompanyMembership.DoesNotExist:
+    # the stored completion state only: two integers, not the ~100 column row
+    participant_id = get_access_context(request).participant_id
+    participant = Participant.objects.filter(id=participant_id).values(
+        'is_profile_completed', 'completion_mask', 'completion_percentage'
+    ).first() if participant_id else None
+    if participant is None:
         return Response({
-            'error': 'Access denied. Client account required.'
-        }, status=status.HTTP_403_FORBIDDEN)
+            'profile_exists': False,
+            'is_completed': False,
+            'completion_percentage': 0,
+            'message': 'Profile not created yet',
+            'next_steps': ['Create your NDIS participant profile to get started']
+        })
 
-    try:
-        participant = Participant.objects.get(user=request.user)
-
-        # Check required fields (UPDATED)
-        required_checks = {
-            'basic_info': bool(participant.date_of_birth and participant.address and participant.phone),
-            'ndis_number': bool(participant.ndis_number),
-            'ndis_plan_dates': bool(participant.ndis_plan_start and participant.ndis_plan_end),
-            'emergency_contacts': bool(participant.emergency_contact_1 and participant.emergency_contact_2),
-            'ndis_plan_details': bool(participant.ndis_plan_managed_details)
-        }
+    required_checks, optional_checks = decode(participant['completion_mask'])
 
-        # Check optional important fields
-        optional_checks = {
-            'personal_details': bool(participant.preferred_name and participant.gender),
-            'medical_info': bool(participant.medical_condition or participant.medical_food_other_allergies),
-            'dietary_requirements': bool(participant.dietary_requirements),
-            'daily_living_support': any([
-                participant.mobility, participant.communication, participant.medication,
-                participant.eating, participant.dressing, participant.toileting
-            ]),
-            'community_support': any([
-                participant.community_access, participant.transport_or_travel,
-                participant.friendships_or_relationships
-            ]),
-            'life_skills': any([
-                participant.education_or_employment, participant.handling_money_or_budgeting,
-                participant.learning_new_skills, participant.chores
-            ]),
-            'about_me': bool(participant.likes or participant.dislikes or participant.hobbies_interests)
-        }
+    completed_required = sum(required_checks.values())
+    total_required = len(required_checks)
 
-        completed_required = sum(required_checks.values())
-        total_required = len(required_checks)
+    completed_optional = sum(optional_checks.values())
+    total_optional = len(optional_checks)
 
-        completed_optional = sum(optional_checks.values())
-        total_optional = len(optional_checks)
+    return Response({
+        'profile_exists': True,
+        'is_completed': participant['is_profile_completed'],
+        'completion_percentage': participant['completion_percentage'],
+        'required_fields': {
+            'completed': completed_required,
+            'total': total_required,
+            'status': required_checks
+        },
+        'optional_fields': {
+            'completed': completed_optional,
+            'total': total_optional,
+            'status': optional_checks
+        },
+        'recommendations': [
+            'Complete basic information (address, phone, date of birth)' if not required_checks[
+                'basic_info'] else None,
+            'Add emergency contact information' if not required_checks[
+                'emergency_contacts'] else None,
+            'Add personal details (preferred name, gender)' if not optional_checks[
+                'personal_details'] else None,
+            'Add medical condition details' if not optional_checks['medical_info'] else None,
+            'Specify dietary requirements' if not optional_checks['dietary_requirements'] else None,
+            'Detail your daily living support needs' if not optional_checks[
+                'daily_living_support'] else None,
+            'Add community and social support needs' if not optional_checks[
+                'community_support'] else None
+        ]
+    })
 
-        overall_completion = (
-            (completed_required + completed_optional) / (total_required + total_optional)) * 100
 
-        return Response({
-            'profile_exists': True,
-            'is_completed': participant.is_profile_completed,
-            'completion_percentage': round(overall_completion, 1),
-            'required_fields': {
-                'completed': completed_required,
-                'total': total_required,
-                'status': required_checks
-            },
-            'optional_fields': {
-                'completed': completed_optional,
-                'total': total_optional,
-                'status': optional_checks
-            },
-            'recommendations': [
-                'Complete basic information (address, phone, date of birth)' if not required_checks[
-                    'basic_info'] else None,
-                'Add emergency contact information' if not required_checks[
-                    'emergency_contacts'] else None,
-                'Add personal details (preferred name, gender)' if not optional_checks[
-                    'personal_details'] else None,
-                'Add medical condition details' if not optional_checks['medical_info'] else None,
-                'Specify dietary requirements' if not optional_checks['dietary_requirements'] else None,
-                'Detail your daily living support needs' if not optional_checks[
-                    'daily_living_support'] else None,
-                'Add community and social support needs' if not optional_checks[
-                    'community_support'] else None
-            ]
-        })
+# ==========================================
+# PROFILE COMPLETION REPORT (ADMIN ONLY)
+# ==========================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
+def admin_profile_completion_report(request):
+    """
+    How many participants are missing each profile section - Admin only
+    URL: /api/admin/participants/completion/
+
+    One aggregate query that reads only the stored completion bitmask
+    (completion.py), so Postgres can answer it with an index-only scan of
+    participant_completion_idx. The average percentage is derived from
+    the per-section counts rather than read from the rows.
+    """
+    bits = {f'{name}_bit': F('completion_mask').bitand(bit) for name, bit in SECTION_BITS.items()}
+    counts = Participant.objects.alias(
+        required_bits=F('completion_mask').bitand(REQUIRED_MASK), **bits
+    ).aggregate(
+        total=Count('id'),
+        required_complete=Count('id', filter=Q(required_bits=REQUIRED_MASK)),
+        **{name: Count('id', filter=Q(**{f'{name}_bit': 0})) for name in SECTION_BITS},
+    )
+
+    total = counts['total']
+    # every participant's percentage is its done sections / all sections
+    sections_done = total * len(SECTION_BITS) - sum(counts[name] for name in SECTION_BITS)
+    average = sections_done / (total * len(SECTION_BITS)) * 100 if total else 0
+    return Response({
+        'total_participants': total,
+        'required_complete': counts['required_complete'],
+        'required_incomplete': total - counts['required_complete'],
+        'average_completion_percentage': round(average, 1),
+        'missing': {name: counts[name] for name in SECTION_BITS},
+    })
+
+
+# ==========================================
+# PARTICIPANTS BY SUPPORT NEEDS (ADMIN ONLY)
+# ==========================================
+
+needs_paginator = KeysetPaginator(ordering=('id',))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
+def admin_participants_by_needs(request):
+    """
+    Participants needing a combination of supports - Admin only
+    URL: /api/admin/participants/needs/?needs=mobility,medication
+    Query: match=all (default) | any, location (part of the address),
+           cursor, page_size
 
-    except Participant.DoesNotExist:
+    Matched through the support needs bitmask index (support_needs.py),
+    not by scanning the flag columns.
+    """
+    needs = [need.strip() for need in request.query_params.get('needs', '').split(',') if need.strip()]
+    if not needs:
         return Response({
-            'profile_exists': False,
-            'is_completed': False,
-            'completion_percentage': 0,
-            'message': 'Profile not created yet',
-            'next_steps': ['Create your NDIS participant profile to get started']
-        })
+            'error': 'needs is required',
+            'available_needs': list(NEED_BITS),
+        }, status=status.HTTP_400_BAD_REQUEST)
+    match = request.query_params.get('match', 'all')
+    if match not in ('all', 'any'):
+        return Response({'error': 'match must be all or any'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        participants = Participant.objects.with_needs(needs, match_all=match == 'all')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    location = request.query_params.get('location', '').strip()
+    if location:
+        # applied to the rows the mask already narrowed down
+        participants = participants.filter(address__icontains=location)
 
+    rows = participants.values(
+        'id', 'ndis_number', 'address', 'support_needs_mask', 'user__first_name', 'user__last_name'
+    )
+    try:
+        page, next_cursor = needs_paginator.paginate(rows, request)
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'needs': needs,
+        'match': match,
+        'participants': [{
+            'id': row['id'],
+            'name': f"{row['user__first_name']} {row['user__last_name']}",
+            'ndis_number': row['ndis_number'],
+            'address': row['address'],
+            'support_needs': decode_needs(row['support_needs_mask']),
+        } for row in page],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
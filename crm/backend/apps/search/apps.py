@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.search'
+
+    def ready(self):
+        # keep the search entries in step with participant / employee saves
+        from . import signals  # noqa: F401
@@ -0,0 +1,138 @@
+# ==========================================
+# SEARCH DOCUMENTS
+# ==========================================
+"""
+Every Participant and Employee has one SearchEntry: a display title and
+subtitle plus `document`, the text the full-text index is built from.
+
+    participant  names, preferred name, NDIS number, address, guardian,
+                 email, phone (+61..., 04... and the bare digits)
+    employee     names, email, phone, address, suburb, state, postcode
+
+signals.py rewrites the entry when one of the fields below is saved;
+rebuild_search_index() rebuilds them all in batches (new installs,
+changes to what goes into a document).
+"""
+
+from django.utils import timezone
+
+PARTICIPANT_FIELDS = frozenset({'preferred_name', 'ndis_number', 'address', 'guardian_name', 'phone'})
+EMPLOYEE_FIELDS = frozenset({'phone', 'address', 'suburb', 'state_territory', 'postcode'})
+USER_FIELDS = frozenset({'first_name', 'last_name', 'work_email'})
+
+ENTRY_FIELDS = ['title', 'subtitle', 'document', 'updated_at']
+BATCH_SIZE = 1000
+
+
+def _text(*parts):
+    return ' '.join(' '.join(str(part).split()) for part in parts if part)
+
+
+def _phone_terms(phone):
+    """+61412345678 -> '+61412345678 0412345678 61412345678', so any form matches"""
+    if not phone:
+        return ''
+    terms = [str(phone), str(phone).lstrip('+')]
+    national = getattr(phone, 'national_number', None)
+    if national:
+        terms.append(f'0{national}')
+    return ' '.join(terms)
+
+
+def participant_entry(entry_model, participant):
+    """Unsaved entry for participant (user loaded with it)"""
+    user = participant.user
+    name = _text(user.first_name, user.last_name)
+    return entry_model(
+        kind='participant',
+        object_id=participant.id,
+        title=_text(name, f'({participant.preferred_name})' if participant.preferred_name else ''),
+        subtitle=_text('NDIS', participant.ndis_number),
+        document=_text(
+            name, participant.preferred_name, participant.ndis_number, participant.address,
+            participant.guardian_name, user.work_email, _phone_terms(participant.phone),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def employee_entry(entry_model, employee):
+    """Unsaved entry for employee (user loaded with it)"""
+    user = employee.user
+    return entry_model(
+        kind='employee',
+        object_id=employee.id,
+        title=_text(user.first_name, user.last_name),
+        subtitle=_text(employee.suburb, employee.state_territory),
+        document=_text(
+            user.first_name, user.last_name, user.work_email, _phone_terms(employee.phone),
+            employee.address, employee.suburb, employee.state_territory, employee.postcode,
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def upsert_entries(entry_model, entries):
+    """Insert or overwrite the entries of their (kind, object_id)"""
+    if entries:
+        entry_model.objects.bulk_create(
+            entries, update_conflicts=True,
+            unique_fields=['kind', 'object_id'], update_fields=ENTRY_FIELDS,
+        )
+
+
+def _participant_query(participant_model):
+    return participant_model.objects.select_related('user').only(
+        'id', 'preferred_name', 'ndis_number', 'address', 'guardian_name', 'phone',
+        'user__first_name', 'user__last_name', 'user__work_email',
+    )
+
+
+def _employee_query(employee_model):
+    return employee_model.objects.select_related('user').only(
+        'id', 'phone', 'address', 'suburb', 'state_territory', 'postcode',
+        'user__first_name', 'user__last_name', 'user__work_email',
+    )
+
+
+def index_objects(entry_model, participants=(), employees=()):
+    upsert_entries(
+        entry_model,
+        [participant_entry(entry_model, p) for p in participants]
+        + [employee_entry(entry_model, e) for e in employees],
+    )
+
+
+def index_user(entry_model, participant_model, employee_model, user_id):
+    """Re-index whichever profile(s) belong to user_id (their name or email changed)"""
+    index_objects(
+        entry_model,
+        participants=_participant_query(participant_model).filter(user_id=user_id),
+        employees=_employee_query(employee_model).filter(user_id=user_id),
+    )
+
+
+def rebuild_search_index(entry_model, participant_model, employee_model, batch_size=BATCH_SIZE):
+    """
+    Rewrite every entry and drop the ones whose object is gone; returns the
+    number of entries written. Takes the models so migrations can pass
+    their historical ones.
+    """
+    written = 0
+    for kind, queryset, build in (
+        ('participant', _participant_query(participant_model), participant_entry),
+        ('employee', _employee_query(employee_model), employee_entry),
+    ):
+        batch = []
+        for obj in queryset.order_by('id').iterator(chunk_size=batch_size):
+            batch.append(build(entry_model, obj))
+            if len(batch) >= batch_size:
+                upsert_entries(entry_model, batch)
+                written += len(batch)
+                batch = []
+        upsert_entries(entry_model, batch)
+        written += len(batch)
+        entry_model.objects.filter(kind=kind).exclude(
+            object_id__in=queryset.model.objects.values('id')
+        ).delete()
+    return written
@@ -0,0 +1,235 @@
+# ==========================================
+# FULL-TEXT + FUZZY SEARCH
+# ==========================================
+"""
+Ranked search over the SearchEntry documents, by database:
+
+Postgres
+    search_vector   tsvector GENERATED from document ('simple' config: names
+                    and numbers are not stemmed), GIN indexed
+    document        GIN trigram index (pg_trgm)
+    A row matches when every term matches as a prefix (`smi` finds Smith)
+    OR the query is word-similar to the document (`jonh smtih` finds
+    John Smith) - unless a term has digits (see identifiers below).
+    Ranked by ts_rank_cd + word_similarity.
+
+SQLite (development)
+    search_searchentry_fts    FTS5 external-content table over document,
+                              with prefix indexes, kept in sync by triggers
+    search_searchentry_vocab  fts5vocab over it: the indexed terms
+    Terms are matched as prefixes. A word matching nothing is replaced by
+    the closest indexed terms (difflib over the vocabulary terms starting
+    with the same letter) - the typo tolerance. Ranked by bm25.
+
+Terms with digits (NDIS numbers, phones, postcodes) are identifiers: they
+only match exactly or as a prefix, never by similarity, so an unknown
+number finds nothing rather than somebody else's.
+
+Other databases fall back to unranked icontains, one per term.
+
+Both indexed paths answer from the index: no scan of the entries.
+"""
+
+import difflib
+import re
+import unicodedata
+
+from django.db import connection
+
+from . models import SearchEntry
+
+FTS_TABLE = 'search_searchentry_fts'
+VOCAB_TABLE = 'search_searchentry_vocab'
+
+MAX_TERMS = 8
+MIN_TERM_LENGTH = 2
+# typo tolerance on SQLite: corrections tried per unknown term
+MAX_CORRECTIONS = 3
+CORRECTION_CUTOFF = 0.75
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+_DIGIT = re.compile(r'\d')
+
+
+def query_terms(query):
+    """Lower-cased word terms of query (punctuation dropped), at most MAX_TERMS"""
+    terms = [t for t in _TERM.findall((query or '').lower()) if len(t) >= MIN_TERM_LENGTH]
+    return terms[:MAX_TERMS]
+
+
+# ------------------------------------------
+# Index DDL (run by the migrations)
+# ------------------------------------------
+
+POSTGRES_INDEX_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE search_searchentry ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', document)) STORED",
+    "CREATE INDEX search_entry_vector_idx ON search_searchentry USING gin (search_vector)",
+    "CREATE INDEX search_entry_trgm_idx ON search_searchentry USING gin (document gin_trgm_ops)",
+]
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS search_entry_trgm_idx",
+    "DROP INDEX IF EXISTS search_entry_vector_idx",
+    "ALTER TABLE search_searchentry DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        document, content='search_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    f"""CREATE TRIGGER search_searchentry_ai AFTER INSERT ON search_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.id, new.document);
+    END""",
+    f"""CREATE TRIGGER search_searchentry_ad AFTER DELETE ON search_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.id, old.document);
+    END""",
+    f"""CREATE TRIGGER search_searchentry_au AFTER UPDATE OF document ON search_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.id, old.document);
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.id, new.document);
+    END""",
+    f"CREATE VIRTUAL TABLE {VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')",
+    # index the rows that already exist
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS search_searchentry_ai",
+    "DROP TRIGGER IF EXISTS search_searchentry_ad",
+    "DROP TRIGGER IF EXISTS search_searchentry_au",
+    f"DROP TABLE IF EXISTS {VOCAB_TABLE}",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _run(conn, statements):
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def create_search_index(conn):
+    if conn.vendor == 'postgresql':
+        _run(conn, POSTGRES_INDEX_SQL)
+    elif conn.vendor == 'sqlite':
+        _run(conn, SQLITE_INDEX_SQL)
+
+
+def drop_search_index(conn):
+    if conn.vendor == 'postgresql':
+        _run(conn, POSTGRES_DROP_SQL)
+    elif conn.vendor == 'sqlite':
+        _run(conn, SQLITE_DROP_SQL)
+
+
+# ------------------------------------------
+# Queries
+# ------------------------------------------
+
+def _kind_clause(kind, column):
+    return (f" AND {column} = %s", [kind]) if kind else ('', [])
+
+
+def _is_identifier(term):
+    return _DIGIT.search(term) is not None
+
+
+def _postgres_ids(terms, kind, offset, limit):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    text = ' '.join(terms)
+    kind_sql, kind_params = _kind_clause(kind, 'kind')
+    # identifiers (terms with digits) must match, never be similar
+    fuzzy_sql, fuzzy_params = ('', []) if any(map(_is_identifier, terms)) else (' OR %s <%% document', [text])
+    sql = f"""
+        SELECT id, ts_rank_cd(search_vector, to_tsquery('simple', %s))
+                   + word_similarity(%s, document) AS rank
+        FROM search_searchentry
+        WHERE (search_vector @@ to_tsquery('simple', %s){fuzzy_sql}){kind_sql}
+        ORDER BY rank DESC, id
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [tsquery, text, tsquery, *fuzzy_params, *kind_params, limit, offset])
+        return cursor.fetchall()
+
+
+def _fold(term):
+    # the FTS5 tokenizer indexes 'zoë' as 'zoe'; fold the same way for the vocabulary lookups
+    return ''.join(c for c in unicodedata.normalize('NFKD', term) if not unicodedata.combining(c))
+
+
+def _has_prefix(cursor, term):
+    cursor.execute(
+        f"SELECT 1 FROM {VOCAB_TABLE} WHERE term >= %s AND term < %s LIMIT 1",
+        [term, term + '\uffff'],
+    )
+    return cursor.fetchone() is not None
+
+
+def _corrections(cursor, term):
+    """Indexed terms close to an unknown term: same first letter, similar length"""
+    cursor.execute(
+        f"SELECT term FROM {VOCAB_TABLE} WHERE term >= %s AND term < %s "
+        f"AND length(term) BETWEEN %s AND %s",
+        [term[0], term[0] + '\uffff', len(term) - 2, len(term) + 2],
+    )
+    candidates = [row[0] for row in cursor.fetchall()]
+    return difflib.get_close_matches(term, candidates, n=MAX_CORRECTIONS, cutoff=CORRECTION_CUTOFF)
+
+
+def _sqlite_ids(terms, kind, offset, limit):
+    kind_sql, kind_params = _kind_clause(kind, 'e.kind')
+    with connection.cursor() as cursor:
+        groups = []
+        for term in map(_fold, terms):
+            if _has_prefix(cursor, term):
+                groups.append(f'"{term}"*')
+                continue
+            # a near miss of a number is another person's number
+            corrected = [] if _is_identifier(term) else _corrections(cursor, term)
+            if not corrected:
+                # no indexed term is anything like it: nothing can match
+                return []
+            groups.append('(' + ' OR '.join(f'"{word}"' for word in corrected) + ')')
+
+        cursor.execute(f"""
+            SELECT e.id, -bm25({FTS_TABLE}) AS rank
+            FROM {FTS_TABLE} JOIN search_searchentry e ON e.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s{kind_sql}
+            ORDER BY bm25({FTS_TABLE}), e.id
+            LIMIT %s OFFSET %s
+        """, [' AND '.join(groups), *kind_params, limit, offset])
+        return cursor.fetchall()
+
+
+def _fallback_ids(terms, kind, offset, limit):
+    entries = SearchEntry.objects.all()
+    if kind:
+        entries = entries.filter(kind=kind)
+    for term in terms:
+        entries = entries.filter(document__icontains=term)
+    return [(pk, 0.0) for pk in entries.order_by('title', 'id').values_list('id', flat=True)[offset:offset + limit]]
+
+
+def search(query, kind=None, offset=0, limit=20):
+    """
+    (entries, scores, has_more) for one page of query's ranked matches.
+    entries are SearchEntry rows in rank order, scores their ranks.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return [], [], False
+
+    if connection.vendor == 'postgresql':
+        find = _postgres_ids
+    elif connection.vendor == 'sqlite':
+        find = _sqlite_ids
+    else:
+        find = _fallback_ids
+    # one row more than the page tells whether there is a next page
+    rows = find(terms, kind, offset, limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    by_id = SearchEntry.objects.in_bulk([pk for pk, _ in rows])
+    found = [(by_id[pk], rank) for pk, rank in rows if pk in by_id]
+    return [entry for entry, _ in found], [float(rank) for _, rank in found], has_more
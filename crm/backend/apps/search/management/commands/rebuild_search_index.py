@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.employee.models import Employee
+from apps.participant.models import Participant
+from apps.search.documents import BATCH_SIZE, rebuild_search_index
+from apps.search.models import SearchEntry
+
+
+class Command(BaseCommand):
+    """
+    Rewrite every participant / employee search entry.
+
+    Usage (after changing what goes into a search document):
+        python manage.py rebuild_search_index --batch-size 1000
+    """
+    help = 'Rebuild the participant and employee search entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f'Entries written per statement (default {BATCH_SIZE})')
+
+    def handle(self, *args, **options):
+        written = rebuild_search_index(SearchEntry, Participant, Employee, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {written} search entries'))
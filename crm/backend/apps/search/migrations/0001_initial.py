@@ -0,0 +1,160 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:57
+
+from django.db import migrations, models
+
+# Frozen copies of engines.py's DDL and documents.py's entries as of this
+# migration: later changes there must not change what it runs.
+FTS_TABLE = 'search_searchentry_fts'
+VOCAB_TABLE = 'search_searchentry_vocab'
+
+POSTGRES_INDEX_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE search_searchentry ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', document)) STORED",
+    "CREATE INDEX search_entry_vector_idx ON search_searchentry USING gin (search_vector)",
+    "CREATE INDEX search_entry_trgm_idx ON search_searchentry USING gin (document gin_trgm_ops)",
+]
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS search_entry_trgm_idx",
+    "DROP INDEX IF EXISTS search_entry_vector_idx",
+    "ALTER TABLE search_searchentry DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        document, content='search_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    f"""CREATE TRIGGER search_searchentry_ai AFTER INSERT ON search_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.id, new.document);
+    END""",
+    f"""CREATE TRIGGER search_searchentry_ad AFTER DELETE ON search_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.id, old.document);
+    END""",
+    f"""CREATE TRIGGER search_searchentry_au AFTER UPDATE OF document ON search_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.id, old.document);
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.id, new.document);
+    END""",
+    f"CREATE VIRTUAL TABLE {VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')",
+    # index the rows that already exist
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS search_searchentry_ai",
+    "DROP TRIGGER IF EXISTS search_searchentry_ad",
+    "DROP TRIGGER IF EXISTS search_searchentry_au",
+    f"DROP TABLE IF EXISTS {VOCAB_TABLE}",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+BATCH_SIZE = 1000
+
+
+def _run(schema_editor, statements):
+    statements = {'postgresql': statements[0], 'sqlite': statements[1]}.get(schema_editor.connection.vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def add_search_index(apps, schema_editor):
+    """tsvector + trigram GIN indexes on Postgres, FTS5 table + triggers on SQLite"""
+    _run(schema_editor, (POSTGRES_INDEX_SQL, SQLITE_INDEX_SQL))
+
+
+def remove_search_index(apps, schema_editor):
+    _run(schema_editor, (POSTGRES_DROP_SQL, SQLITE_DROP_SQL))
+
+
+def _text(*parts):
+    return ' '.join(' '.join(str(part).split()) for part in parts if part)
+
+
+def _phone_terms(phone):
+    if not phone:
+        return ''
+    terms = [str(phone), str(phone).lstrip('+')]
+    national = getattr(phone, 'national_number', None)
+    if national:
+        terms.append(f'0{national}')
+    return ' '.join(terms)
+
+
+def _participant_entry(SearchEntry, participant):
+    user = participant.user
+    name = _text(user.first_name, user.last_name)
+    return SearchEntry(
+        kind='participant',
+        object_id=participant.id,
+        title=_text(name, f'({participant.preferred_name})' if participant.preferred_name else ''),
+        subtitle=_text('NDIS', participant.ndis_number),
+        document=_text(
+            name, participant.preferred_name, participant.ndis_number, participant.address,
+            participant.guardian_name, user.work_email, _phone_terms(participant.phone),
+        ),
+    )
+
+
+def _employee_entry(SearchEntry, employee):
+    user = employee.user
+    return SearchEntry(
+        kind='employee',
+        object_id=employee.id,
+        title=_text(user.first_name, user.last_name),
+        subtitle=_text(employee.suburb, employee.state_territory),
+        document=_text(
+            user.first_name, user.last_name, user.work_email, _phone_terms(employee.phone),
+            employee.address, employee.suburb, employee.state_territory, employee.postcode,
+        ),
+    )
+
+
+def index_existing(apps, schema_editor):
+    SearchEntry = apps.get_model('search', 'SearchEntry')
+    user_fields = ('user__first_name', 'user__last_name', 'user__work_email')
+    sources = [
+        (apps.get_model('participant', 'Participant').objects.only(
+            'id', 'preferred_name', 'ndis_number', 'address', 'guardian_name', 'phone', *user_fields,
+        ), _participant_entry),
+        (apps.get_model('employee', 'Employee').objects.only(
+            'id', 'phone', 'address', 'suburb', 'state_territory', 'postcode', *user_fields,
+        ), _employee_entry),
+    ]
+    # the table is new: plain inserts
+    for queryset, build in sources:
+        batch = []
+        for obj in queryset.select_related('user').order_by('id').iterator(chunk_size=BATCH_SIZE):
+            batch.append(build(SearchEntry, obj))
+            if len(batch) >= BATCH_SIZE:
+                SearchEntry.objects.bulk_create(batch)
+                batch = []
+        SearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('participant', '0008_participant_support_needs_mask'),
+        ('employee', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('participant', 'Participant'), ('employee', 'Employee')], max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('subtitle', models.CharField(blank=True, max_length=200)),
+                ('document', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_entry_unique_object')],
+            },
+        ),
+        migrations.RunPython(add_search_index, remove_search_index),
+        # entries are deleted with the table on rollback
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """
+    One search document per Participant / Employee (see documents.py).
+    The full-text index over `document` is database specific and created
+    by the migrations: a generated tsvector + trigram GIN indexes on
+    Postgres, an FTS5 table kept in sync by triggers on SQLite.
+    """
+    KIND_PARTICIPANT = 'participant'
+    KIND_EMPLOYEE = 'employee'
+    KIND_CHOICES = [
+        (KIND_PARTICIPANT, 'Participant'),
+        (KIND_EMPLOYEE, 'Employee'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    title = models.CharField(max_length=200)
+    subtitle = models.CharField(max_length=200, blank=True)
+    document = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_entry_unique_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
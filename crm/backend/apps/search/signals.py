@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.participant.models import Participant
+from apps.employee.models import Employee
+from . models import SearchEntry
+from . documents import (
+    PARTICIPANT_FIELDS, EMPLOYEE_FIELDS, USER_FIELDS, index_user,
+)
+
+User = get_user_model()
+
+
+def _touches(update_fields, indexed):
+    # update_fields=None is a full save
+    return update_fields is None or not indexed.isdisjoint(update_fields)
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_save, sender=Employee)
+def index_profile(sender, instance, update_fields=None, **kwargs):
+    """Rewrite the entry when a searched field was saved"""
+    indexed = PARTICIPANT_FIELDS if sender is Participant else EMPLOYEE_FIELDS
+    if _touches(update_fields, indexed):
+        index_user(SearchEntry, Participant, Employee, instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def index_user_profiles(sender, instance, created=False, update_fields=None, **kwargs):
+    """Name or email changed - logins (update_fields=['last_login']) are skipped"""
+    if not created and _touches(update_fields, USER_FIELDS):
+        index_user(SearchEntry, Participant, Employee, instance.pk)
+
+
+@receiver(post_delete, sender=Participant)
+@receiver(post_delete, sender=Employee)
+def remove_profile_entry(sender, instance, **kwargs):
+    kind = SearchEntry.KIND_PARTICIPANT if sender is Participant else SearchEntry.KIND_EMPLOYEE
+    SearchEntry.objects.filter(kind=kind, object_id=instance.pk).delete()
@@ -0,0 +1,29 @@
+from django.test import TestCase
+
+from apps.membership import context as access_context
+from apps.membership.tests import clear_test_caches, make_client
+from . engines import search
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        access_context._default_company_id = None
+        clear_test_caches()
+        _, self.participant = make_client()
+
+    def _found(self, query):
+        return [entry.object_id for entry in search(query)[0]]
+
+    def test_prefix_and_typo(self):
+        self.assertEqual(self._found('citi'), [self.participant.id])
+        self.assertEqual(self._found('jo citizne'), [self.participant.id])
+        self.assertEqual(self._found('nobody'), [])
+
+    def test_identifiers_are_not_corrected(self):
+        self.assertEqual(self._found('430000001'), [self.participant.id])
+        self.assertEqual(self._found('4300000'), [self.participant.id])
+        self.assertEqual(self._found('0412345678'), [self.participant.id])
+        # one digit off is somebody else's number
+        self.assertEqual(self._found('430000002'), [])
+        self.assertEqual(self._found('citizen 430000002'), [])
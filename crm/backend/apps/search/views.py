@@ -0,0 +1,68 @@
+# ==========================================
+# SEARCH VIEWS
+# ==========================================
+
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from . engines import search, query_terms, MIN_TERM_LENGTH
+from . models import SearchEntry
+from apps.authentication.permissions import IsCompanyAdmin
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _positive_int(value, default):
+    try:
+        number = int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
+def admin_search(request):
+    """
+    Ranked, typo tolerant search across participants and staff - Admin only
+    URL: /api/admin/search/?q=jon smi
+    Query: kind=participant | employee (default both), page (from 1),
+           page_size (default 20, max 100)
+
+    Matches names, email, phone, NDIS number and address through the
+    full-text index (engines.py).
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query_terms(query):
+        return Response(
+            {'error': f'q needs a word of at least {MIN_TERM_LENGTH} characters'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    kind = request.query_params.get('kind') or None
+    kinds = [value for value, _ in SearchEntry.KIND_CHOICES]
+    if kind is not None and kind not in kinds:
+        return Response({'error': f"kind must be one of {', '.join(kinds)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    page = _positive_int(request.query_params.get('page'), 1)
+    page_size = _positive_int(request.query_params.get('page_size'), DEFAULT_PAGE_SIZE)
+    if page is None or page_size is None:
+        return Response({'error': 'page and page_size must be positive integers'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    page_size = min(page_size, MAX_PAGE_SIZE)
+
+    entries, scores, has_more = search(query, kind=kind, offset=(page - 1) * page_size, limit=page_size)
+    return Response({
+        'query': query,
+        'results': [{
+            'kind': entry.kind,
+            'id': entry.object_id,
+            'title': entry.title,
+            'subtitle': entry.subtitle,
+            'score': round(score, 4),
+        } for entry, score in zip(entries, scores)],
+        'page': page,
+        'page_size': page_size,
+        'has_more': has_more,
+    })
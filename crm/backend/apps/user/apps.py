@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ClientConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.user'
+
+    def ready(self):
+        # connect the cached-user invalidation signals
+        from . import signals  # noqa: F401
@@ -0,0 +1,38 @@
+# ==========================================
+# BUFFERED AUDIT LOG
+# ==========================================
+"""
+AuditLog.log_action(..., buffered=True) queues the entry in process and
+returns at once (the default writes it right away). The request paths that
+audit every call use it: profile reads and writes (participant, employee)
+and service agreement changes.
+
+Queued entries are written with one bulk_create per batch
+(BulkCreateBuffer): when AUDIT_LOG['BATCH_SIZE'] entries are queued, when
+the oldest is FLUSH_INTERVAL seconds old, and at worker shutdown (atexit -
+gunicorn's graceful stop and runserver reloads both run it).
+
+created_at is stamped when the entry is queued, not when it is written.
+"""
+
+from django.conf import settings
+
+from . buffers import BulkCreateBuffer
+from . models import AuditLog
+
+audit_buffer = BulkCreateBuffer(
+    AuditLog,
+    batch_size=settings.AUDIT_LOG['BATCH_SIZE'],
+    flush_interval=settings.AUDIT_LOG['FLUSH_INTERVAL'],
+)
+
+
+def enqueue_audit(entry):
+    """Queue an unsaved AuditLog for the next batch insert"""
+    audit_buffer.add(entry)
+    return entry
+
+
+def flush_audit_log():
+    """Write every queued entry now (tests, management commands)"""
+    return audit_buffer.flush()
@@ -1,6 +1,8 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
 from django.db.models import Q 
+from .hashing import password_hashing
+from .user_cache import get_cached_user
 
 # Q allows you to create complex database queries with OR, AND, and NOT logic, which you can't easily do with regular Django ORM filters.
 
@@ -18,14 +20,21 @@ class EmailAuthBackend(ModelBackend):
             return None 
         
         try:
-            user = User.objects.get(
-                Q(work_email__iexact = username)
-            )
-            if user.check_password(password) and self.user_can_authenticate(user):
+            # LOWER(work_email) = value hits the functional index (see models.py);
+            # __iexact compiles to UPPER() on Postgres and scans the table
+            username = username.strip().lower()
+            try:
+                user = User.objects.get(work_email__lower = username)
+            except User.MultipleObjectsReturned:
+                # legacy mixed-case duplicate left by the backfill: the stored-lowercase row wins
+                user = User.objects.get(work_email = username)
+            # hashed on the bounded pool; outdated hashes are upgraded after success
+            if password_hashing.check_password(user, password) and self.user_can_authenticate(user):
                 return user
             
         except User.DoesNotExist:
-            User().set_password(password)
+            # same hashing cost as a real check so timing doesn't reveal unknown emails
+            password_hashing.run_dummy_hash(password)
             return None
     
         return None
@@ -38,7 +47,6 @@ class EmailAuthBackend(ModelBackend):
         return is_active or is_active is None 
     
     def get_user(self, user_id):
-        try:
-            return User.objects.get(pk = user_id)
-        except User.DoesNotExist:
-            return None 
+        # session logins (admin) - built from the cached row, see user_cache.py
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
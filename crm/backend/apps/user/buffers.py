@@ -0,0 +1,112 @@
+# ==========================================
+# BATCHED INSERTS
+# ==========================================
+"""
+BulkCreateBuffer collects unsaved model instances in memory and writes them
+with one bulk_create() instead of one INSERT per row.
+
+A batch is flushed when it reaches `batch_size`, when a background timer
+sees it older than `flush_interval` seconds, and at interpreter exit.
+Rows still buffered when a worker is killed (SIGKILL/OOM) are lost, so only
+use it for best-effort records such as login attempts and audit trails.
+auto_now_add fields are stamped at flush time (at most flush_interval late).
+
+A batch that fails to write goes back in the buffer and is retried by the
+timer (not on every add) after flush_interval. At most max_pending rows
+are kept: past that the oldest are dropped and logged.
+
+With settings.BULK_BUFFER_SYNC (on under `manage.py test`) every add is
+written at once and no thread is started.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BulkCreateBuffer:
+
+    def __init__(self, model, batch_size=100, flush_interval=5.0, max_pending=None):
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending or batch_size * 10
+        self._rows = []
+        self._oldest = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+        self._timer = None
+        atexit.register(self.flush)
+
+    def add(self, instance):
+        with self._lock:
+            self._rows.append(instance)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            # after a failed write the timer retries, not every add
+            full = len(self._rows) >= self.batch_size and self._failed_at is None
+        if full or getattr(settings, 'BULK_BUFFER_SYNC', False):
+            self.flush()
+        else:
+            self._ensure_timer()
+
+    def _ensure_timer(self):
+        # One daemon thread per buffer, started on first use (not at import,
+        # so management commands and migrations don't spawn it).
+        if self._timer is None or not self._timer.is_alive():
+            with self._lock:
+                if self._timer is None or not self._timer.is_alive():
+                    self._timer = threading.Thread(
+                        target=self._run, name=f'{self.model.__name__}-buffer', daemon=True
+                    )
+                    self._timer.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            with self._lock:
+                due = self._oldest is not None and \
+                    time.monotonic() - self._oldest >= self.flush_interval
+            if due:
+                self.flush()
+                # the timer thread is not a request thread - release its connection
+                close_old_connections()
+
+    def flush(self):
+        """Write every buffered row now; returns the number of rows written"""
+        with self._lock:
+            rows, self._rows, self._oldest = self._rows, [], None
+        if not rows:
+            return 0
+        try:
+            self.model.objects.bulk_create(rows, batch_size=self.batch_size)
+        except Exception as e:
+            self._requeue(rows)
+            logger.error(f"Failed to write {len(rows)} {self.model.__name__} rows, will retry: {e}")
+            return 0
+        with self._lock:
+            self._failed_at = None
+        return len(rows)
+
+    def _requeue(self, rows):
+        # back in front of anything added meanwhile, due again after flush_interval
+        with self._lock:
+            self._rows = rows + self._rows
+            now = time.monotonic()
+            self._oldest = self._failed_at = now
+            dropped = len(self._rows) - self.max_pending
+            if dropped > 0:
+                del self._rows[:dropped]
+        if dropped > 0:
+            logger.error(f"Dropped the {dropped} oldest unwritten {self.model.__name__} rows")
+        if not getattr(settings, 'BULK_BUFFER_SYNC', False):
+            self._ensure_timer()
+
+    def __len__(self):
+        return len(self._rows)
@@ -0,0 +1,23 @@
+# ==========================================
+# CACHE BACKEND
+# ==========================================
+"""
+Whether the default cache is shared between workers (Redis, Memcached, the
+database cache) or private to one process (LocMemCache, DummyCache).
+
+Anything another worker must see - a revocation, an invalidated row -
+only goes through the cache when it is shared. Otherwise callers read the
+database, which stays the source of truth.
+"""
+
+from django.conf import settings
+
+# Cache backends that are private to one process
+_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared():
+    return settings.CACHES['default']['BACKEND'] not in _LOCAL_CACHES
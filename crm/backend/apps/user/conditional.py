@@ -0,0 +1,75 @@
+# ==========================================
+# CONDITIONAL GET (ETAG / LAST-MODIFIED)
+# ==========================================
+"""
+Lets a client re-use the response it already has when nothing changed.
+
+    GET /api/client/profile/get
+        200  ETag: W/"3f1c..."  Last-Modified: Sat, 17 Oct 2026 09:12:03 GMT
+    GET /api/client/profile/get   If-None-Match: W/"3f1c..."
+        304  (no body)
+
+A view opts in with @conditional_get(validators). validators(request, ...)
+runs after authentication and permissions, and returns (etag parts,
+last_modified) from a narrow primary-key lookup of the rows' updated_at -
+not the rows themselves. When the client's copy is current the view is
+never called: no wide row load, no serialization. Returning None skips
+the conditional handling (e.g. no profile yet).
+
+Responses are per user: Cache-Control private, no-cache makes browsers
+revalidate every time and keeps shared caches from storing them.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+# bump when a view's response format changes, so old ETags stop matching
+ETAG_VERSION = 1
+
+
+def make_etag(*parts):
+    """Weak ETag over parts (ids, timestamps, query options...)"""
+    raw = '|'.join(str(part) for part in (ETAG_VERSION,) + parts)
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def latest(*timestamps):
+    """Newest of the given timestamps, ignoring None"""
+    timestamps = [t for t in timestamps if t is not None]
+    return max(timestamps) if timestamps else None
+
+
+def _set_validators(response, etag, last_modified):
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+
+
+def conditional_get(validators):
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            found = validators(request, *args, **kwargs)
+            if found is None:
+                return view(request, *args, **kwargs)
+
+            parts, last_modified = found
+            # the query string selects the representation (e.g. ?sections=)
+            etag = make_etag(view.__name__, request.META.get('QUERY_STRING', ''), *parts)
+            timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            _set_validators(response, etag, last_modified)
+            return response
+        return wrapped
+    return decorator
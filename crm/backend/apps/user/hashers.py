@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iteration count taken from
+    settings.PASSWORD_HASHING['ITERATIONS'] (pick it with
+    `python manage.py benchmark_password_hasher`).
+
+    The algorithm name is unchanged, so existing hashes keep verifying and
+    Django's must_update() flags any hash stored with a different count.
+    Those are rehashed on the next successful login (apps/user/hashing.py).
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING.get('ITERATIONS') or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,202 @@
+# ==========================================
+# PASSWORD HASHING SERVICE
+# ==========================================
+"""
+Runs PBKDF2 on a bounded worker pool instead of inline in the request.
+
+- The pool size caps how many hashes a worker process computes at once, so a
+  login burst queues for a slot (with a timeout) instead of every request
+  fighting for the CPU at the same time.
+- hashlib.pbkdf2_hmac releases the GIL, so a thread pool hashes in parallel;
+  'process' is available for CPU-bound deployments.
+- When a stored hash was made with outdated parameters it is rehashed in the
+  background after a successful login (compare-and-swap on the old value).
+- Bulk provisioning hashes on a second long-lived pool of BULK_PROCESSES
+  processes, so it never takes the login pool's slots. Its processes are
+  spawned, not forked: a fork of a worker already running threads (buffer
+  flushers, session checkpoints) can deadlock the child on a held lock.
+
+The pooled functions only use hashlib so they also run in a process pool.
+"""
+
+import base64
+import hashlib
+import logging
+import multiprocessing
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher, make_password
+from django.utils.crypto import constant_time_compare, get_random_string, RANDOM_STRING_CHARS
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = 'pbkdf2_sha256'
+
+
+class PasswordHashingBusy(Exception):
+    """The hashing pool could not take the job within PASSWORD_HASHING['TIMEOUT']"""
+
+
+def _pbkdf2_encode(password, salt, iterations):
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations)
+    hash = base64.b64encode(digest).decode('ascii').strip()
+    return f"{ALGORITHM}${iterations}${salt}${hash}"
+
+
+def _pbkdf2_verify(password, encoded):
+    algorithm, iterations, salt, _hash = encoded.split('$', 3)
+    return constant_time_compare(encoded, _pbkdf2_encode(password, salt, int(iterations)))
+
+
+def benchmark_iterations(iterations, rounds=3):
+    """Best-of-rounds wall time (seconds) of one PBKDF2 hash with `iterations`"""
+    salt = secrets.token_hex(11)
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        _pbkdf2_encode('benchmark-password', salt, iterations)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class PasswordHashingService:
+    """Bounded-pool PBKDF2 hashing used by signup, signin and the auth backend"""
+
+    def __init__(self):
+        self._executor = None
+        self._bulk_executor = None
+        self._lock = threading.Lock()
+
+    # ---------- configuration ----------
+
+    @property
+    def config(self):
+        return settings.PASSWORD_HASHING
+
+    @property
+    def iterations(self):
+        return get_hasher('default').iterations
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    workers = self.config.get('MAX_WORKERS', 2)
+                    if self.config.get('EXECUTOR') == 'process':
+                        self._executor = ProcessPoolExecutor(max_workers=workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=workers, thread_name_prefix='password-hashing'
+                        )
+        return self._executor
+
+    def _bulk_pool(self):
+        if self._bulk_executor is None:
+            with self._lock:
+                if self._bulk_executor is None:
+                    self._bulk_executor = ProcessPoolExecutor(
+                        max_workers=self.config.get('BULK_PROCESSES') or 2,
+                        mp_context=multiprocessing.get_context('spawn'),
+                    )
+        return self._bulk_executor
+
+    def _run(self, fn, *args):
+        future = self._pool().submit(fn, *args)
+        try:
+            return future.result(timeout=self.config.get('TIMEOUT', 10))
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHashingBusy('Password hashing pool is saturated')
+
+    def _is_pooled(self, encoded):
+        # Only the default PBKDF2-SHA256 format is hashed on the pool; legacy
+        # algorithms fall back to Django's own (inline) check_password.
+        return bool(encoded) and encoded.startswith(ALGORITHM + '$')
+
+    # ---------- public API ----------
+
+    def make_password(self, password):
+        """Encoded hash of password with the configured cost"""
+        salt = get_random_string(22, RANDOM_STRING_CHARS)
+        return self._run(_pbkdf2_encode, password, salt, self.iterations)
+
+    def make_passwords(self, passwords):
+        """
+        Hash many passwords at once on the bulk process pool (bulk
+        provisioning). Returns the encoded hashes in input order; None
+        entries get an unusable password.
+        """
+        indexed = [(i, p) for i, p in enumerate(passwords) if p is not None]
+        encoded = [make_password(None) if p is None else None for p in passwords]
+        if not indexed:
+            return encoded
+
+        salts = [get_random_string(22, RANDOM_STRING_CHARS) for _ in indexed]
+        iterations = [self.iterations] * len(indexed)
+        if len(indexed) == 1:
+            results = [_pbkdf2_encode(indexed[0][1], salts[0], iterations[0])]
+        else:
+            pool = self._bulk_pool()
+            workers = self.config.get('BULK_PROCESSES') or 2
+            results = list(pool.map(
+                _pbkdf2_encode, [p for _, p in indexed], salts, iterations,
+                chunksize=max(1, len(indexed) // (4 * workers)),
+            ))
+        for (i, _), value in zip(indexed, results):
+            encoded[i] = value
+        return encoded
+
+    def check_password(self, user, password):
+        """
+        Verify password against user.password on the pool. On success an
+        outdated hash is replaced in the background.
+        """
+        encoded = user.password
+        if not self._is_pooled(encoded):
+            return user.check_password(password)
+
+        if not self._run(_pbkdf2_verify, password, encoded):
+            return False
+
+        try:
+            needs_rehash = identify_hasher(encoded).must_update(encoded)
+        except ValueError:
+            needs_rehash = False
+        if needs_rehash:
+            # A plain thread (not the pool) so this also works with 'process'
+            threading.Thread(
+                target=self._rehash, args=(user.pk, password, encoded), daemon=True
+            ).start()
+        return True
+
+    def run_dummy_hash(self, password):
+        """
+        Same cost as a real check for unknown emails, so response timing does
+        not reveal whether an account exists.
+        """
+        salt = get_random_string(22, RANDOM_STRING_CHARS)
+        self._run(_pbkdf2_encode, password, salt, self.iterations)
+
+    def _rehash(self, user_id, password, old_encoded):
+        from django.contrib.auth import get_user_model
+        from django.db import close_old_connections
+        try:
+            new_encoded = self.make_password(password)
+            # compare-and-swap: skip if the password changed meanwhile
+            get_user_model().objects.filter(pk=user_id, password=old_encoded).update(
+                password=new_encoded
+            )
+        except Exception as e:
+            logger.warning(f"Background password rehash failed for user {user_id}: {e}")
+        finally:
+            # pool threads are not request threads - release their connection
+            close_old_connections()
+
+
+password_hashing = PasswordHashingService()
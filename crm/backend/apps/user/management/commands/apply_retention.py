@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.user.retention import get_policies, run_retention
+
+
+class Command(BaseCommand):
+    """
+    Apply the DATA_RETENTION policies: delete (and optionally archive) old
+    rows in small primary-key-ordered chunks.
+
+    Usage (e.g. nightly from cron):
+        python manage.py apply_retention
+        python manage.py apply_retention --policy login_attempts --policy user_sessions --dry-run
+    """
+    help = 'Purge rows past their retention period in bounded chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', action='append', dest='policies',
+                            help='Only this policy (repeatable); default every policy')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help="Rows per DELETE (default DATA_RETENTION['CHUNK_SIZE'])")
+        parser.add_argument('--pause', type=float, default=None,
+                            help="Seconds to sleep between chunks (default DATA_RETENTION['PAUSE'])")
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the rows that would be deleted')
+
+    def handle(self, *args, **options):
+        try:
+            get_policies(options['policies'])
+        except KeyError as e:
+            raise CommandError(e.args[0])
+
+        results = run_retention(
+            options['policies'], chunk_size=options['chunk_size'],
+            pause=options['pause'], dry_run=options['dry_run'],
+        )
+
+        verb = 'would delete' if options['dry_run'] else 'deleted'
+        failed = False
+        for result in results:
+            if result.error:
+                failed = True
+                self.stdout.write(self.style.ERROR(f"{result.policy:<16} failed: {result.error}"))
+                continue
+            line = f"{result.policy:<16} {verb} {result.deleted:>8} rows  {result.seconds:6.2f}s"
+            if result.archived:
+                line += f"  archived {result.archived}"
+            self.stdout.write(line)
+
+        total = sum(result.deleted for result in results)
+        if failed:
+            raise CommandError('Some retention policies failed')
+        self.stdout.write(self.style.SUCCESS(f"Retention done: {verb} {total} rows"))
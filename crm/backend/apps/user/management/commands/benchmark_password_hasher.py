@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.user.hashing import benchmark_iterations
+
+
+class Command(BaseCommand):
+    """
+    Measure PBKDF2 on this machine and suggest PASSWORD_HASHING['ITERATIONS'].
+
+    Usage:
+        python manage.py benchmark_password_hasher --target-ms 250
+    """
+    help = 'Benchmark PBKDF2-SHA256 and suggest an iteration count for a target hash time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=250,
+                            help='Desired time of one hash in milliseconds (default 250)')
+        parser.add_argument('--sample-iterations', type=int, default=100_000,
+                            help='Iterations used for the calibration run')
+        parser.add_argument('--rounds', type=int, default=3,
+                            help='Runs per measurement, the fastest is used')
+
+    def handle(self, *args, **options):
+        target_ms = options['target_ms']
+        sample = options['sample_iterations']
+        if target_ms <= 0 or sample <= 0:
+            raise CommandError('--target-ms and --sample-iterations must be positive')
+
+        # PBKDF2 time is linear in iterations: calibrate, scale, then verify
+        sample_ms = benchmark_iterations(sample, options['rounds']) * 1000
+        suggested = max(int(sample * target_ms / sample_ms) // 1000 * 1000, 1000)
+        suggested_ms = benchmark_iterations(suggested, options['rounds']) * 1000
+
+        current = settings.PASSWORD_HASHING.get('ITERATIONS')
+        current_ms = benchmark_iterations(current, options['rounds']) * 1000 if current else None
+
+        self.stdout.write(f"{sample:>12,} iterations: {sample_ms:8.1f} ms (calibration)")
+        if current:
+            self.stdout.write(f"{current:>12,} iterations: {current_ms:8.1f} ms (current setting)")
+        self.stdout.write(f"{suggested:>12,} iterations: {suggested_ms:8.1f} ms (suggested)")
+
+        workers = settings.PASSWORD_HASHING.get('MAX_WORKERS', 2)
+        self.stdout.write(
+            f"~{workers * 1000 / suggested_ms:.1f} signins/second per worker process "
+            f"with MAX_WORKERS={workers}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Set PASSWORD_HASH_ITERATIONS={suggested} to use it. "
+            f"Existing hashes are upgraded on each user's next login."
+        ))
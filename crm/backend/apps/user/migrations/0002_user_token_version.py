@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user_model',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:24
+
+import logging
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Lower
+
+logger = logging.getLogger(__name__)
+
+
+def lowercase_emails(apps, schema_editor):
+    """
+    Lower-case stored emails. A row whose lower-cased email already belongs
+    to another user is left unchanged (it still matches through the
+    LOWER() index) and logged as a warning so it can be merged by hand.
+    """
+    User = apps.get_model('user', 'User_Model')
+    mixed_case = User.objects.exclude(work_email=Lower(F('work_email'))).values_list('id', 'work_email')
+    for user_id, email in mixed_case.iterator(chunk_size=1000):
+        lowered = email.lower()
+        if User.objects.filter(work_email=lowered).exists():
+            logger.warning('Email of user %s left as is: %s already belongs to another user', user_id, lowered)
+            continue
+        User.objects.filter(id=user_id).update(work_email=lowered)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('user', '0002_user_token_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user_model',
+            index=models.Index(django.db.models.functions.text.Lower('work_email'), name='custom_user_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersession',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usersession',
+            name='session_key',
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['user', 'is_active', 'last_seen'], name='user_session_active_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # renamed: databases that applied it under the old name keep it applied
+    replaces = [('user', '0005_auditlog_partitions')]
+
+    dependencies = [
+        ('user', '0004_user_session_tracking'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
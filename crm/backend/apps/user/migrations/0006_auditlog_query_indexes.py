@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_auditlog_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['user', 'created_at'], name='auditlog_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['action', 'created_at'], name='auditlog_action_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['created_at'], name='auditlog_created_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from phonenumber_field.modelfields import PhoneNumberField # type: ignore
 from . managers import ClientManager
@@ -7,6 +8,11 @@ import uuid
 
 # Create your models here.
 
+# work_email__lower=value -> LOWER(work_email) = value, which is served by the
+# functional index declared on User_Model (a case-insensitive lookup that
+# doesn't scan the table like work_email__iexact / UPPER() does).
+models.EmailField.register_lookup(Lower)
+
 
 class User_Model(AbstractBaseUser, PermissionsMixin):
 
@@ -29,6 +35,10 @@ class User_Model(AbstractBaseUser, PermissionsMixin):
     date_joined = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Stamped into every JWT as the 'tv' claim. Bumping it (revoke_all_sessions)
+    # invalidates every token issued before. Only ever changed with an UPDATE.
+    token_version = models.PositiveIntegerField(default=0)
+
     USERNAME_FIELD = 'work_email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
 
@@ -38,6 +48,26 @@ class User_Model(AbstractBaseUser, PermissionsMixin):
         db_table = 'custom_user'
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            models.Index(Lower('work_email'), name='custom_user_email_lower_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Emails are stored lower-cased so lookups can use the indexes
+        if self.work_email:
+            self.work_email = self.work_email.strip().lower()
+
+        # A full save of an instance loaded before a revoke must not write the
+        # old token_version back, so existing rows never save that column.
+        if not self._state.adding and self.pk is not None and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            # deferred columns (e.g. password on a cached request.user) are left as they are
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'token_version' and f.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
 
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -89,29 +119,56 @@ class LoginAttempt(models.Model):
     
 
 class UserSession(models.Model):
-    """Basic user session tracking"""
+    """
+    Basic user session tracking. Live sessions are kept in the cache and
+    checkpointed here in batches (see session_tracking.py).
+    """
     user = models.ForeignKey(User_Model, on_delete=models.CASCADE, related_name='sessions')
+    # the 'sid' claim of the session's tokens
+    session_key = models.CharField(max_length=32, unique=True, null=True, blank=True)
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_active', 'last_seen'], name='user_session_active_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.work_email} - {self.created_at}"
     
 
 class AuditLog(models.Model):
-    """Simple audit logging"""
+    """
+    Simple audit logging. Entries on hot paths are written in batches
+    (log_action(buffered=True), see audit.py).
+    """
     user = models.ForeignKey(User_Model, on_delete=models.SET_NULL, null=True)
     user_email = models.EmailField()
     action = models.CharField(max_length=100)
     description = models.TextField()
     ip_address = models.GenericIPAddressField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # set when the entry is queued, not when the batch is written
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # audit query API (views.admin_get_audit_log): filter + time order
+            models.Index(fields=['user', 'created_at'], name='auditlog_user_created_idx'),
+            models.Index(fields=['action', 'created_at'], name='auditlog_action_created_idx'),
+            models.Index(fields=['created_at'], name='auditlog_created_idx'),
+        ]
 
     @classmethod
-    def log_action(cls, user, action, description, request = None):
-        """Helper to log actions"""
+    def log_action(cls, user, action, description, request = None, buffered = False):
+        """
+        Helper to log actions. The entry is saved right away; with
+        buffered=True it is queued and bulk inserted with others (audit.py)
+        and the returned entry is not saved yet.
+        """
         ip_address = '127.0.0.1'
         if request:
             x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -120,13 +177,19 @@ class AuditLog(models.Model):
             else:
                 ip_address = request.META.get('REMOTE_ADDR', '127.0.0.1')
 
-        return cls.objects.create(
+        entry = cls(
             user = user,
             user_email = user.work_email if user else 'system',
             action = action,
             description = description,
             ip_address = ip_address
         )
+        if not buffered:
+            entry.save()
+            return entry
+
+        from . audit import enqueue_audit
+        return enqueue_audit(entry)
     
     def __str__(self):
         return f"{self.user_email} - {self.action}"
@@ -0,0 +1,108 @@
+# ==========================================
+# KEYSET (CURSOR) PAGINATION
+# ==========================================
+"""
+Pages through a queryset by the last row seen instead of an OFFSET.
+
+    WHERE (joined_at, id) > (:last_joined_at, :last_id)
+    ORDER BY joined_at, id
+    LIMIT :page_size + 1
+
+With an index on the ordering columns every page is an index range scan,
+so page 500 costs the same as page 1 and rows inserted meanwhile don't
+shift the pages. There is no total count (that would be a full scan);
+callers that need totals aggregate them separately.
+
+The cursor is the ordering values of the last row, JSON + urlsafe base64.
+The last ordering field must be unique (normally 'id').
+"""
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """The cursor query parameter could not be decoded"""
+
+
+def _json_default(value):
+    # full precision: DjangoJSONEncoder cuts datetimes to milliseconds, which
+    # would make a cursor land before rows of the same millisecond
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)  # UUID, Decimal
+
+
+class KeysetPaginator:
+
+    def __init__(self, ordering=('created_at', 'id'), descending=False,
+                 page_size=50, max_page_size=200):
+        self.ordering = tuple(ordering)
+        self.descending = descending
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+
+    # ---------- cursor encoding ----------
+
+    def encode_cursor(self, row):
+        values = [row[f] if isinstance(row, dict) else getattr(row, f) for f in self.ordering]
+        raw = json.dumps(values, default=_json_default, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, model):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            # back to Python values (e.g. ISO strings -> datetimes)
+            return [
+                model._meta.get_field(f).to_python(v) for f, v in zip(self.ordering, values)
+            ]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            raise InvalidCursor('Invalid cursor')
+
+    # ---------- paging ----------
+
+    def _after(self, values):
+        """Q for rows strictly after values in the ordering (row comparison)"""
+        op = 'lt' if self.descending else 'gt'
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            step = Q(**{f'{field}__{op}': values[i]})
+            for prev, value in zip(self.ordering[:i], values[:i]):
+                step &= Q(**{prev: value})
+            condition |= step
+        return condition
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get('page_size', self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate(self, queryset, request):
+        """
+        One page of queryset for the request's ?cursor= / ?page_size=.
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        Raises InvalidCursor.
+        """
+        size = self.get_page_size(request)
+        order_by = [f'-{f}' if self.descending else f for f in self.ordering]
+        queryset = queryset.order_by(*order_by)
+
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor, queryset.model)))
+
+        # one extra row tells whether there is a next page
+        rows = list(queryset[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        return rows, (self.encode_cursor(rows[-1]) if has_more else None)
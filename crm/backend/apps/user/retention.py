@@ -0,0 +1,175 @@
+# ==========================================
+# DATA RETENTION
+# ==========================================
+"""
+Deletes old rows from the append-only tables (login attempts, audit log,
+sessions, magic links, JWT tokens) according to DATA_RETENTION['POLICIES'].
+
+Each policy names a model and a date column and keeps rows by
+- age:   rows older than MAX_AGE_DAYS go, and/or
+- count: only the KEEP_LATEST newest rows stay.
+
+Rows are deleted oldest-id first in chunks of CHUNK_SIZE primary keys
+(one short DELETE ... WHERE id IN (...) each), sleeping PAUSE seconds in
+between, so no purge holds locks long enough to stall signins.
+
+ARCHIVE: the rows of every chunk are appended to a gzip JSON-lines file in
+ARCHIVE_DIR before they are deleted.
+
+Run from cron / a scheduler:
+    python manage.py apply_retention
+"""
+
+import datetime
+import gzip
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetentionResult:
+    policy: str
+    deleted: int = 0
+    archived: int = 0
+    seconds: float = 0.0
+    dry_run: bool = False
+    error: str = ''
+
+
+def _config():
+    return settings.DATA_RETENTION
+
+
+def get_policies(names=None):
+    policies = _config()['POLICIES']
+    if names:
+        unknown = set(names) - set(policies)
+        if unknown:
+            raise KeyError(f"Unknown retention policies: {', '.join(sorted(unknown))}")
+        return {name: policies[name] for name in names}
+    return policies
+
+
+def _cutoff(queryset, date_field, policy, now):
+    """Rows with date_field before this go (None: the policy keeps everything)"""
+    cutoffs = []
+    if policy.get('MAX_AGE_DAYS') is not None:
+        cutoffs.append(now - datetime.timedelta(days=policy['MAX_AGE_DAYS']))
+    if policy.get('KEEP_LATEST') is not None:
+        # date of the newest row beyond the ones to keep
+        boundary = queryset.order_by(f'-{date_field}', '-pk').values_list(
+            date_field, flat=True
+        )[policy['KEEP_LATEST']:policy['KEEP_LATEST'] + 1].first()
+        if boundary is not None:
+            # that row and everything older
+            cutoffs.append(boundary + datetime.timedelta(microseconds=1))
+    return max(cutoffs) if cutoffs else None
+
+
+class _Archive:
+    """Appends deleted rows to <ARCHIVE_DIR>/<policy>-<timestamp>.jsonl.gz"""
+
+    def __init__(self, policy_name, now):
+        directory = Path(_config()['ARCHIVE_DIR'])
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"{policy_name}-{now.strftime('%Y%m%d-%H%M%S')}.jsonl.gz"
+        self.file = None
+
+    def write(self, rows):
+        if self.file is None:
+            self.file = gzip.open(self.path, 'at', encoding='utf-8')
+        for row in rows:
+            self.file.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+        # on disk before the rows are deleted
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def apply_policy(name, policy, chunk_size=None, pause=None, dry_run=False, now=None):
+    """Apply one policy; returns a RetentionResult"""
+    config = _config()
+    chunk_size = chunk_size or config['CHUNK_SIZE']
+    pause = config['PAUSE'] if pause is None else pause
+    now = now or timezone.now()
+    result = RetentionResult(name, dry_run=dry_run)
+    started = time.perf_counter()
+
+    # policies with their own pruning (e.g. JWT tokens, which cascade);
+    # the handler counts instead of deleting on a dry run
+    if policy.get('HANDLER'):
+        result.deleted = import_string(policy['HANDLER'])(
+            chunk_size=chunk_size, pause=pause, now=now, dry_run=dry_run,
+        )
+        result.seconds = time.perf_counter() - started
+        return result
+
+    model = apps.get_model(policy['MODEL'])
+    date_field = policy.get('DATE_FIELD', 'created_at')
+    queryset = model._default_manager.filter(**policy.get('FILTER', {}))
+    cutoff = _cutoff(queryset, date_field, policy, now)
+    if cutoff is None:
+        return result
+    expired = queryset.filter(**{f'{date_field}__lt': cutoff})
+
+    if dry_run:
+        result.deleted = expired.count()
+        result.seconds = time.perf_counter() - started
+        return result
+
+    archive = _Archive(name, now) if policy.get('ARCHIVE') else None
+
+    try:
+        while True:
+            ids = list(expired.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            chunk = model._default_manager.filter(pk__in=ids)
+            if archive is not None:
+                archive.write(chunk.values())
+                result.archived += len(ids)
+            # nothing cascades from these models: one DELETE ... WHERE id IN
+            chunk.delete()
+            result.deleted += len(ids)
+            if len(ids) < chunk_size:
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    result.seconds = time.perf_counter() - started
+    if result.deleted:
+        logger.info(
+            f"Retention {name}: deleted {result.deleted} rows in {result.seconds:.2f}s"
+        )
+    return result
+
+
+def run_retention(names=None, chunk_size=None, pause=None, dry_run=False):
+    """Apply every configured policy (or only `names`); returns the RetentionResults"""
+    now = timezone.now()
+    results = []
+    for name, policy in get_policies(names).items():
+        try:
+            results.append(apply_policy(name, policy, chunk_size, pause, dry_run, now))
+        except Exception as e:
+            # one failing policy doesn't stop the others
+            logger.error(f"Retention {name} failed: {e}")
+            results.append(RetentionResult(name, dry_run=dry_run, error=str(e)))
+    return results
@@ -0,0 +1,246 @@
+# ==========================================
+# ACTIVE SESSION TRACKING
+# ==========================================
+"""
+Tracks signed-in sessions (ip, user agent, last seen) in the shared cache and
+checkpoints them to UserSession in batches.
+
+- Signin starts a session and signs its id into the refresh token as the
+  'sid' claim. Access tokens and rotated refresh tokens copy it.
+- CasaJWTAuthentication calls session_tracker.touch() on every request. A session is
+  written to the cache at most once per TOUCH_INTERVAL per worker; in
+  between the call is a dict lookup, no cache or database access.
+- Touched sessions are marked dirty and a background thread upserts them to
+  UserSession every CHECKPOINT_INTERVAL (one INSERT ... ON CONFLICT per
+  batch). Sessions are never written to the database on the request path.
+- session_tracker.list() reads the cache, plus checkpointed rows the cache no
+  longer (or, with a per-worker LocMem cache, never) had.
+
+Cache layout:
+    user_session:{sid}   -> {sid, user_id, ip_address, user_agent, created_at, last_seen, is_active}
+    user_sessions:{uid}  -> [sid, ...]
+"""
+
+import atexit
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . models import UserSession
+
+logger = logging.getLogger(__name__)
+
+SESSION_CLAIM = 'sid'
+SESSION_KEY = 'user_session:{}'
+USER_SESSIONS_KEY = 'user_sessions:{}'
+
+
+def _config():
+    return settings.SESSION_TRACKING
+
+
+def _timeout():
+    # a session is gone once its refresh token could no longer be used
+    return int(settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds())
+
+
+def _client_details(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    ip = forwarded.split(',')[0].strip() if forwarded else request.META.get('REMOTE_ADDR')
+    return ip or '127.0.0.1', request.META.get('HTTP_USER_AGENT', '')[:500]
+
+
+class SessionTracker:
+
+    def __init__(self):
+        self._dirty = set()
+        self._touched = {}  # sid -> monotonic time of the last cache write
+        self._lock = threading.Lock()
+        self._timer = None
+        atexit.register(self.checkpoint)
+
+    # ---------- request path ----------
+
+    def start(self, user_id, request):
+        """New session for user_id; returns its id (the 'sid' claim)"""
+        sid = uuid.uuid4().hex
+        ip, user_agent = _client_details(request)
+        now = timezone.now()
+        cache.set(SESSION_KEY.format(sid), {
+            'sid': sid, 'user_id': user_id, 'ip_address': ip, 'user_agent': user_agent,
+            'created_at': now, 'last_seen': now, 'is_active': True,
+        }, timeout=_timeout())
+
+        index_key = USER_SESSIONS_KEY.format(user_id)
+        sids = cache.get(index_key) or []
+        # drop ids whose session already expired from the cache
+        live = set(cache.get_many([SESSION_KEY.format(s) for s in sids]))
+        sids = [s for s in sids if SESSION_KEY.format(s) in live] + [sid]
+        cache.set(index_key, sids, timeout=_timeout())
+
+        self._mark(sid)
+        return sid
+
+    def touch(self, sid, user_id, request):
+        """Record activity on sid; a no-op within TOUCH_INTERVAL of the last write"""
+        if not sid:
+            return
+        now = time.monotonic()
+        last = self._touched.get(sid)
+        if last is not None and now - last < _config()['TOUCH_INTERVAL']:
+            return
+
+        key = SESSION_KEY.format(sid)
+        session = cache.get(key)
+        if session is None or session['user_id'] != user_id:
+            # expired from the cache (or a worker restart with LocMem): start
+            # again from the request, the checkpoint keeps created_at
+            ip, user_agent = _client_details(request)
+            session = {'sid': sid, 'user_id': user_id, 'ip_address': ip, 'user_agent': user_agent,
+                       'created_at': timezone.now(), 'is_active': True}
+            index_key = USER_SESSIONS_KEY.format(user_id)
+            sids = cache.get(index_key) or []
+            if sid not in sids:
+                cache.set(index_key, sids + [sid], timeout=_timeout())
+        elif not session['is_active']:
+            return
+        else:
+            session['ip_address'], session['user_agent'] = _client_details(request)
+        session['last_seen'] = timezone.now()
+        cache.set(key, session, timeout=_timeout())
+
+        self._touched[sid] = now
+        self._mark(sid)
+
+    def end(self, sid):
+        """Signout of one session"""
+        if not sid:
+            return
+        key = SESSION_KEY.format(sid)
+        session = cache.get(key)
+        if session is not None:
+            session['is_active'] = False
+            # kept until the next checkpoint has written it
+            cache.set(key, session, timeout=_config()['CHECKPOINT_INTERVAL'] * 4)
+        self._touched.pop(sid, None)
+        self._mark(sid)
+
+    def end_all(self, user_ids):
+        """Signout everywhere / deactivation: rare, so written straight through"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        index_keys = [USER_SESSIONS_KEY.format(user_id) for user_id in user_ids]
+        sids = [sid for sids in cache.get_many(index_keys).values() for sid in sids]
+        cached = cache.get_many([SESSION_KEY.format(sid) for sid in sids])
+        for session in cached.values():
+            session['is_active'] = False
+        # ended in the cache too, so list() and later touches see it
+        cache.set_many(cached, timeout=_config()['CHECKPOINT_INTERVAL'] * 4)
+        cache.delete_many(index_keys)
+        with self._lock:
+            # already final in the database below: nothing left to checkpoint
+            self._dirty.difference_update(sids)
+            for sid in sids:
+                self._touched.pop(sid, None)
+        UserSession.objects.filter(user_id__in=user_ids, is_active=True).update(
+            is_active=False, last_seen=timezone.now()
+        )
+
+    # ---------- reads (admin) ----------
+
+    def list(self, user_id):
+        """Active sessions of user_id, most recently seen first"""
+        sids = cache.get(USER_SESSIONS_KEY.format(user_id)) or []
+        cached = cache.get_many([SESSION_KEY.format(sid) for sid in sids])
+        sessions = {s['sid']: s for s in cached.values() if s['is_active']}
+        ended = {s['sid'] for s in cached.values() if not s['is_active']}
+
+        cutoff = timezone.now() - settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME']
+        stored = UserSession.objects.filter(
+            user_id=user_id, is_active=True, last_seen__gte=cutoff
+        ).exclude(session_key__in=list(sessions) + list(ended)).values(
+            'session_key', 'user_id', 'ip_address', 'user_agent', 'created_at', 'last_seen'
+        )
+        for row in stored:
+            row['sid'] = row.pop('session_key')
+            row['is_active'] = True
+            sessions[row['sid']] = row
+
+        return sorted(sessions.values(), key=lambda s: s['last_seen'], reverse=True)
+
+    # ---------- checkpoints ----------
+
+    def _mark(self, sid):
+        with self._lock:
+            self._dirty.add(sid)
+        self._ensure_timer()
+
+    def _ensure_timer(self):
+        # started on first use, like BulkCreateBuffer (not at import)
+        if self._timer is None or not self._timer.is_alive():
+            with self._lock:
+                if self._timer is None or not self._timer.is_alive():
+                    self._timer = threading.Thread(
+                        target=self._run, name='session-checkpoint', daemon=True
+                    )
+                    self._timer.start()
+
+    def _run(self):
+        while True:
+            time.sleep(_config()['CHECKPOINT_INTERVAL'])
+            self.checkpoint()
+            # the timer thread is not a request thread - release its connection
+            close_old_connections()
+
+    def checkpoint(self):
+        """Upsert every dirty session to UserSession; returns the number written"""
+        with self._lock:
+            sids, self._dirty = list(self._dirty), set()
+            # forget touch times old enough that the next touch writes anyway
+            horizon = time.monotonic() - _config()['TOUCH_INTERVAL']
+            self._touched = {s: t for s, t in self._touched.items() if t >= horizon}
+        if not sids:
+            return 0
+
+        try:
+            cached = cache.get_many([SESSION_KEY.format(sid) for sid in sids])
+            rows = [
+                UserSession(
+                    session_key=s['sid'], user_id=s['user_id'], ip_address=s['ip_address'],
+                    user_agent=s['user_agent'], last_seen=s.get('last_seen') or s['created_at'],
+                    is_active=s['is_active'],
+                )
+                for s in cached.values()
+            ]
+            # is_active is only written on insert: an ended session never
+            # becomes active again, whatever copy another worker still holds
+            UserSession.objects.bulk_create(
+                rows,
+                batch_size=_config()['BATCH_SIZE'],
+                update_conflicts=True,
+                unique_fields=['session_key'],
+                update_fields=['ip_address', 'user_agent', 'last_seen'],
+            )
+            ended = [row.session_key for row in rows if not row.is_active]
+            if ended:
+                UserSession.objects.filter(session_key__in=ended).update(is_active=False)
+            # dirty but gone from the cache: expired
+            expired = [sid for sid in sids if SESSION_KEY.format(sid) not in cached]
+            if expired:
+                UserSession.objects.filter(session_key__in=expired).update(is_active=False)
+        except Exception as e:
+            logger.error(f"Session checkpoint of {len(sids)} sessions failed: {e}")
+            with self._lock:
+                self._dirty.update(sids)
+            return 0
+        return len(rows)
+
+
+session_tracker = SessionTracker()
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . models import User_Model
+from . user_cache import invalidate_cached_user
+
+
+@receiver([post_save, post_delete], sender=User_Model)
+def clear_cached_user(sender, instance, **kwargs):
+    """The cached row used to build request.user is stale"""
+    invalidate_cached_user(instance.pk)
@@ -1,3 +1,136 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from apps.membership.tests import LOCAL_CACHE, SHARED_CACHE, clear_test_caches
+from . buffers import BulkCreateBuffer
+from . models import LoginAttempt, User_Model, UserSession
+from . retention import get_policies, run_retention
+from . session_tracking import SESSION_KEY, SessionTracker
+from . user_cache import USER_ROW_KEY, get_cached_user
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class SessionTrackerTests(TestCase):
+
+    def setUp(self):
+        clear_test_caches()
+        self.tracker = SessionTracker()
+        self.tracker._ensure_timer = lambda: None  # checkpoints are run by the tests
+        self.user = User_Model.objects.create(work_email='jo@example.com', first_name='Jo', last_name='Citizen')
+        self.request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_USER_AGENT='test')
+
+    def test_checkpoint_writes_sessions(self):
+        sid = self.tracker.start(self.user.pk, self.request)
+        self.assertEqual(self.tracker.checkpoint(), 1)
+        self.assertTrue(UserSession.objects.get(session_key=sid).is_active)
+        self.assertEqual([s['sid'] for s in self.tracker.list(self.user.pk)], [sid])
+
+    def test_end_all_survives_the_next_checkpoint(self):
+        first = self.tracker.start(self.user.pk, self.request)
+        self.tracker.checkpoint()
+        # still dirty when everything is revoked
+        second = self.tracker.start(self.user.pk, self.request)
+
+        self.tracker.end_all([self.user.pk])
+        self.assertFalse(cache.get(SESSION_KEY.format(second))['is_active'])
+        self.tracker.checkpoint()
+
+        self.assertEqual(self.tracker.list(self.user.pk), [])
+        self.assertFalse(UserSession.objects.filter(session_key__in=[first, second], is_active=True).exists())
+
+    def test_stale_active_copy_does_not_reactivate(self):
+        sid = self.tracker.start(self.user.pk, self.request)
+        self.tracker.checkpoint()
+        UserSession.objects.filter(session_key=sid).update(is_active=False)
+        # another worker checkpoints its older, still active copy
+        self.tracker._mark(sid)
+        self.tracker.checkpoint()
+        self.assertFalse(UserSession.objects.get(session_key=sid).is_active)
+
+
+class RetentionTests(TestCase):
+
+    def setUp(self):
+        self.user = User_Model.objects.create(work_email='jo@example.com', first_name='Jo', last_name='Citizen')
+        now = timezone.now()
+        for jti, expires_at in (('old-1', now - timedelta(days=1)), ('old-2', now - timedelta(days=2)),
+                                ('live', now + timedelta(days=1))):
+            OutstandingToken.objects.create(user=self.user, jti=jti, token=jti, expires_at=expires_at)
+
+    def test_handler_dry_run_counts(self):
+        self.assertIn('HANDLER', get_policies(['jwt_tokens'])['jwt_tokens'])
+        [result] = run_retention(['jwt_tokens'], dry_run=True)
+        self.assertEqual((result.deleted, result.error), (2, ''))
+        self.assertEqual(OutstandingToken.objects.count(), 3)
+
+    def test_handler_deletes(self):
+        [result] = run_retention(['jwt_tokens'], pause=0)
+        self.assertEqual(result.deleted, 2)
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+
+
+class UserCacheTests(TestCase):
+
+    def setUp(self):
+        clear_test_caches()
+        self.user = User_Model.objects.create(work_email='jo@example.com', first_name='Jo', last_name='Citizen',
+                                              is_active=True)
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_shared_cache_serves_the_row(self):
+        get_cached_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_user(self.user.pk).work_email, 'jo@example.com')
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(get_cached_user(self.user.pk).is_active)
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_local_cache_reads_database(self):
+        self.assertTrue(get_cached_user(self.user.pk).is_active)
+        # deactivated by another worker: its signal cleared only its own cache
+        User_Model.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertFalse(get_cached_user(self.user.pk).is_active)
+        self.assertIsNone(cache.get(USER_ROW_KEY.format(self.user.pk)))
+
+
+class BulkCreateBufferTests(TestCase):
+
+    def _attempt(self, number):
+        return LoginAttempt(email=f'jo{number}@example.com', ip_address='10.0.0.1', success=False)
+
+    def _failing(self):
+        return mock.patch.object(LoginAttempt.objects, 'bulk_create', side_effect=Exception('database is locked'))
+
+    @override_settings(BULK_BUFFER_SYNC=True)
+    def test_sync_writes_on_add(self):
+        buffer = BulkCreateBuffer(LoginAttempt, batch_size=10)
+        buffer.add(self._attempt(1))
+        self.assertEqual(LoginAttempt.objects.count(), 1)
+        self.assertIsNone(buffer._timer)
+
+    @override_settings(BULK_BUFFER_SYNC=True)
+    def test_failed_batch_is_retried(self):
+        buffer = BulkCreateBuffer(LoginAttempt, batch_size=10)
+        with self._failing(), self.assertLogs('apps.user.buffers', 'ERROR'):
+            buffer.add(self._attempt(1))
+            buffer.add(self._attempt(2))
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(LoginAttempt.objects.count(), 2)
+
+    @override_settings(BULK_BUFFER_SYNC=True)
+    def test_pending_rows_are_capped(self):
+        buffer = BulkCreateBuffer(LoginAttempt, batch_size=2, max_pending=3)
+        with self._failing(), self.assertLogs('apps.user.buffers', 'ERROR') as logs:
+            for number in range(5):
+                buffer.add(self._attempt(number))
+        self.assertIn('Dropped the 1 oldest', '\n'.join(logs.output))
+        buffer.flush()
+        self.assertEqual(sorted(LoginAttempt.objects.values_list('email', flat=True)),
+                         ['jo2@example.com', 'jo3@example.com', 'jo4@example.com'])
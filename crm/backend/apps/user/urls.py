@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('audit/', views.admin_get_audit_log, name='admin_audit_log'),
+    path('<int:user_id>/sessions/', views.admin_get_user_sessions, name='admin_user_sessions'),
+]
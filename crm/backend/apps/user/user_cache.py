@@ -0,0 +1,60 @@
+# ==========================================
+# CACHED USER ROWS
+# ==========================================
+"""
+Builds the request user from a cached copy of its row instead of a
+SELECT on custom_user for every authenticated request.
+
+The user is a real User_Model instance, made with Model.from_db(). Columns
+that are not cached (password, token_version) are deferred. Touching one of
+them loads it from the database on first access, so views keep working
+unchanged.
+
+Rows are dropped from the cache on User_Model save/delete (see signals.py).
+QuerySet.update() sends no signal: call invalidate_cached_user() after one
+that changes cached columns.
+
+Only a shared cache is used: with a per-worker one (LocMemCache) the other
+workers would never see the invalidation and keep a deactivated user for
+USER_CACHE_TTL, so the row is read from the database every time.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+
+from . caching import cache_is_shared
+from . models import User_Model
+
+USER_ROW_KEY = 'user_row:{}'
+
+# Never cached: secrets, and columns with their own cache (revocation.py)
+_UNCACHED_FIELDS = ('password', 'token_version')
+
+
+def _cached_attnames():
+    return [
+        f.attname for f in User_Model._meta.concrete_fields
+        if f.name not in _UNCACHED_FIELDS
+    ]
+
+
+def get_cached_user(user_id):
+    """User_Model for user_id from the cache (one query on a miss), or None"""
+    key = USER_ROW_KEY.format(user_id)
+    attnames = _cached_attnames()
+    shared = cache_is_shared()
+    row = cache.get(key) if shared else None
+    if row is None or set(row) != set(attnames):
+        row = User_Model.objects.filter(pk=user_id).values(*attnames).first()
+        if row is None:
+            return None
+        if shared:
+            cache.set(key, row, timeout=getattr(settings, 'USER_CACHE_TTL', 300))
+    return User_Model.from_db(
+        router.db_for_read(User_Model), attnames, [row[name] for name in attnames]
+    )
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(USER_ROW_KEY.format(user_id))
@@ -0,0 +1,180 @@
+# ==========================================
+# USER ADMIN VIEWS (SESSIONS, AUDIT LOG)
+# ==========================================
+
+import csv
+import datetime
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from apps.membership.models import CompanyMembership
+from apps.membership.context import get_access_context
+from apps.authentication.permissions import IsCompanyAdmin
+from . models import AuditLog
+from . pagination import KeysetPaginator, InvalidCursor
+from . session_tracking import SESSION_CLAIM, session_tracker
+
+
+# ==========================================
+# ACTIVE SESSIONS (ADMIN ONLY)
+# ==========================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
+def admin_get_user_sessions(request, user_id):
+    """
+    Active sessions of a user (ip, device, last seen) - Admin only
+    URL: /api/user/<user_id>/sessions/
+
+    Read from the session cache and the last checkpoint; signin and
+    authenticated requests never wait on this table.
+    """
+    context = get_access_context(request)
+    if not CompanyMembership.objects.filter(user_id=user_id, company_id=context.company_id).exists():
+        return Response({
+            'error': 'User not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    sessions = session_tracker.list(user_id)
+
+    return Response({
+        'user_id': user_id,
+        'count': len(sessions),
+        'sessions': [
+            {
+                'session_id': session['sid'],
+                'ip_address': session['ip_address'],
+                'user_agent': session['user_agent'],
+                'created_at': session['created_at'],
+                'last_seen': session['last_seen'],
+                'is_current': session['sid'] == request.auth.get(SESSION_CLAIM) if request.auth else False,
+            }
+            for session in sessions
+        ],
+    }, status=status.HTTP_200_OK)
+
+
+# ==========================================
+# AUDIT LOG QUERIES (ADMIN ONLY)
+# ==========================================
+
+AUDIT_FIELDS = ['id', 'created_at', 'user_id', 'user_email', 'action', 'description', 'ip_address']
+
+# newest first; (created_at, id) pages match the (user|action, created_at) indexes
+audit_paginator = KeysetPaginator(ordering=('created_at', 'id'), descending=True,
+                                  page_size=100, max_page_size=1000)
+
+
+class AuditFilterError(ValueError):
+    pass
+
+
+def _parse_moment(value, end_of_day=False):
+    """ISO datetime or date; a bare date until= covers that whole day"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise AuditFilterError(f'Invalid date: {value}')
+        if end_of_day:
+            day += datetime.timedelta(days=1)
+        moment = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _audit_queryset(params):
+    """AuditLog rows matching the query params (user_id, user_email, action, ip, since, until)"""
+    entries = AuditLog.objects.all()
+
+    if params.get('user_id'):
+        try:
+            entries = entries.filter(user_id=int(params['user_id']))
+        except ValueError:
+            raise AuditFilterError('user_id must be a number')
+    if params.get('user_email'):
+        entries = entries.filter(user_email=params['user_email'].strip().lower())
+    if params.get('action'):
+        entries = entries.filter(action__in=[a.strip() for a in params['action'].split(',')])
+    if params.get('ip'):
+        entries = entries.filter(ip_address=params['ip'].strip())
+    # half-open range [since, until)
+    if params.get('since'):
+        entries = entries.filter(created_at__gte=_parse_moment(params['since']))
+    if params.get('until'):
+        entries = entries.filter(created_at__lt=_parse_moment(params['until'], end_of_day=True))
+
+    return entries.values(*AUDIT_FIELDS)
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line back"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    # spreadsheet apps run cells starting with these as formulas
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
+
+
+def _stream_csv(entries):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(AUDIT_FIELDS)
+    for row in entries.order_by('-created_at', '-id').values_list(*AUDIT_FIELDS).iterator(chunk_size=2000):
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsCompanyAdmin])
+def admin_get_audit_log(request):
+    """
+    Search the audit log - Admin only
+    URL: /api/user/audit/
+
+    Query params (all optional, combined with AND):
+        user_id, user_email, action (comma separated), ip
+        since, until   ISO date or datetime, until is exclusive
+        page_size      default 100, max 1000
+        cursor         next_cursor of the previous page
+        export=csv     stream every matching row as CSV instead of a page
+
+    Newest first, paged by (created_at, id) instead of OFFSET and without
+    a COUNT(*), so each page is an index range scan. Entries still queued
+    in a worker's audit buffer appear within AUDIT_LOG['FLUSH_INTERVAL'].
+    """
+    try:
+        entries = _audit_queryset(request.query_params)
+    except AuditFilterError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.query_params.get('export') == 'csv':
+        # rows are read from a server-side cursor in chunks and written as they arrive
+        response = StreamingHttpResponse(_stream_csv(entries), content_type='text/csv')
+        stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+        response['Content-Disposition'] = f'attachment; filename="audit-log-{stamp}.csv"'
+        return response
+
+    try:
+        page, next_cursor = audit_paginator.paginate(entries, request)
+    except InvalidCursor:
+        return Response({
+            'error': 'Invalid cursor'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'results': page,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    }, status=status.HTTP_200_OK)
@@ -3,6 +3,7 @@ from pathlib import Path
 import dj_database_url
 #from decouple import os.environ.get  # type:ignore
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
     'apps.employee',
     'apps.document',
     'apps.onboarding',
+    'apps.search',
     'phonenumber_field',
     # 'magiclink',
 ]
@@ -112,7 +114,8 @@ CORS_EXPOSE_HEADERS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication + role/company claims, see apps/authentication/tokens.py
+        'apps.authentication.authentication.CasaJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -169,6 +172,19 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': True,  # generate new refresh token
     'BLACKLIST_AFTER_ROTATION': True, # blacklist old refresh token
+    # re-stamps role/company claims on refresh when they are stale
+    'TOKEN_REFRESH_SERIALIZER': 'apps.authentication.tokens.CasaTokenRefreshSerializer',
+}
+
+# Refresh-token blacklist fast path and pruning (apps/authentication/blacklist.py)
+JWT_BLACKLIST = {
+    'BLOOM_CAPACITY': 100_000,   # blacklisted unexpired tokens the filter is sized for
+    'BLOOM_ERROR_RATE': 0.01,
+    'SYNC_INTERVAL': 30,         # seconds between incremental filter syncs
+    'REBUILD_INTERVAL': 3600,    # seconds between full rebuilds (drops expired jtis)
+    'PRUNE_INTERVAL': int(os.environ.get('JWT_PRUNE_INTERVAL', 3600)),  # 0 disables the thread
+    'PRUNE_CHUNK_SIZE': 1000,
+    'PRUNE_PAUSE': 0.1,          # seconds between chunks
 }
 
 MEDIA_URL = '/media/'
@@ -197,11 +213,35 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# EmailAuthBackend extends ModelBackend (permissions included). ModelBackend is
+# not listed again: a failed signin would otherwise hash the password twice.
 AUTHENTICATION_BACKENDS = (
     'apps.user.backends.EmailAuthBackend',
-    'django.contrib.auth.backends.ModelBackend',
 )
 
+# Password hashing (apps/user/hashers.py, apps/user/hashing.py)
+# ITERATIONS: PBKDF2 cost, pick it with `python manage.py benchmark_password_hasher`.
+#   Stored hashes with another count are rehashed on the next successful login.
+# EXECUTOR: 'thread' (pbkdf2 releases the GIL) or 'process'
+# MAX_WORKERS: hashes computed at once per worker process
+# TIMEOUT: seconds a signin waits for a pool slot before answering 503
+PASSWORD_HASHING = {
+    'ITERATIONS': int(os.environ.get('PASSWORD_HASH_ITERATIONS', 1_000_000)),
+    'EXECUTOR': os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread'),
+    'MAX_WORKERS': int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+    'TIMEOUT': float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10)),
+    # long-lived (spawned) processes used by bulk staff provisioning
+    'BULK_PROCESSES': int(os.environ.get('PASSWORD_HASH_BULK_PROCESSES', 2)),
+}
+
+PASSWORD_HASHERS = [
+    'apps.user.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 # Email Backend (Development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # logs to console
 
@@ -278,6 +318,112 @@ CACHES = {
     }
 }
 
+# A shared cache is required for the signin/signup throttles (and the JWT
+# claims version) to hold across worker processes.
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+        'TIMEOUT': 3600,
+    }
+
+# Sliding-window throttles (apps/authentication/throttle.py)
+# {scope: (max hits, window seconds)}. LOGIN counts failed signins only.
+AUTH_THROTTLE = {
+    'LOGIN': {
+        'ip': (20, 15 * 60),
+        'email': (5, 15 * 60),
+    },
+    'SIGNUP': {
+        'ip': (10, 60 * 60),
+    },
+    'MAGIC_LINK': {
+        'ip': (10, 60 * 60),
+        'email': (3, 15 * 60),
+    },
+    # LoginAttempt rows are bulk inserted in batches
+    'ATTEMPT_BATCH_SIZE': 100,
+    'ATTEMPT_FLUSH_INTERVAL': 5,  # seconds
+}
+
+# Seconds a user's token_version (sign out everywhere, apps/authentication/revocation.py)
+# is cached; only used with a shared cache
+TOKEN_VERSION_CACHE_TTL = 300
+
+# Shared-cache copy of the request AccessContext ids and role
+# see apps/membership/context.py. Signals clear it on membership/profile saves.
+ACCESS_CONTEXT_CACHE_TTL = 60  # seconds
+
+# Signup password policy (apps/authentication/password_policy.py)
+# BLOOM_PATH: memory-mapped filter of common/breached passwords, built with
+#   `python manage.py build_password_bloom <wordlist>`
+PASSWORD_POLICY = {
+    'BLOOM_PATH': os.environ.get('PASSWORD_BLOOM_PATH', str(BASE_DIR / 'data' / 'breached-passwords.bloom')),
+}
+
+# Bulk staff provisioning (apps/authentication/provisioning.py)
+STAFF_PROVISIONING_MAX_ROWS = 1000
+
+# Magic link sign-in (apps/authentication/magic_link.py)
+FRONTEND_URL = os.environ.get('FRONTEND_URL', 'https://gododo.com.au')
+MAGIC_LINK = {
+    'LIFETIME': {
+        'login': timedelta(minutes=15),
+        'register': timedelta(hours=24),
+        'invite': timedelta(hours=48),
+    },
+}
+
+# Cached custom_user rows used to build request.user (apps/user/user_cache.py),
+# only with a shared cache (REDIS_URL); LocMem reads the row every request
+USER_CACHE_TTL = 300  # seconds
+
+# Batched inserts (apps/user/buffers.py: login attempts, audit log) are
+# written on add, without the flush thread, under `manage.py test`
+BULK_BUFFER_SYNC = sys.argv[1:2] == ['test']
+
+# Audit log (apps/user/audit.py): buffered entries are bulk inserted in batches.
+# Old entries are removed by the 'audit_log' retention policy below.
+AUDIT_LOG = {
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2,           # seconds an entry may wait in the queue
+}
+
+# Data retention (apps/user/retention.py, `python manage.py apply_retention`)
+# Per policy: MODEL, DATE_FIELD, MAX_AGE_DAYS and/or KEEP_LATEST, FILTER,
+# ARCHIVE (write deleted rows to ARCHIVE_DIR first) or HANDLER (own pruning,
+# called with chunk_size, pause, now and dry_run).
+DATA_RETENTION = {
+    'CHUNK_SIZE': 1000,   # rows per DELETE
+    'PAUSE': 0.1,         # seconds between chunks
+    'ARCHIVE_DIR': os.environ.get('RETENTION_ARCHIVE_DIR', str(BASE_DIR / 'data' / 'archive')),
+    'POLICIES': {
+        'login_attempts': {'MODEL': 'user.LoginAttempt', 'MAX_AGE_DAYS': 90},
+        'audit_log': {'MODEL': 'user.AuditLog', 'MAX_AGE_DAYS': 7 * 365, 'ARCHIVE': True},
+        'user_sessions': {
+            'MODEL': 'user.UserSession', 'DATE_FIELD': 'last_seen',
+            'FILTER': {'is_active': False}, 'MAX_AGE_DAYS': 30,
+        },
+        'magic_links': {'MODEL': 'authentication.MagicLinkToken', 'DATE_FIELD': 'expires_at', 'MAX_AGE_DAYS': 30},
+        'jwt_tokens': {'HANDLER': 'apps.authentication.blacklist.prune_expired_tokens'},
+    },
+}
+
+# Active sessions (apps/user/session_tracking.py): kept in the cache,
+# written to UserSession in batches
+SESSION_TRACKING = {
+    'TOUCH_INTERVAL': 60,       # seconds between last_seen updates of a session
+    'CHECKPOINT_INTERVAL': 30,  # seconds between database checkpoints
+    'BATCH_SIZE': 500,
+}
+
+# Credential expiry reminders (apps/participant/expiries.py,
+# `python manage.py send_expiry_reminders`, daily)
+EXPIRY_REMINDERS = {
+    'DAYS_AHEAD': 30,    # remind about everything expiring within this many days
+    'BATCH_SIZE': 200,   # participants per batch of emails
+}
+
 # Template Action IDs from your Zoho template
 ZOHO_TEMPLATE_ACTION_IDS = {
     'CASA_REP': '102698000000040534',  # Casa Community Representative
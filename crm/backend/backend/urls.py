@@ -30,6 +30,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('apps.authentication.urls')),
     path('api/admin/', include('apps.authentication.urls')),
+    path('api/user/', include('apps.user.urls')),
     path('api/company/', include('apps.company.urls')), 
     path('api/client/', include('apps.participant.urls')),
     path('api/employee/', include('apps.employee.urls')),